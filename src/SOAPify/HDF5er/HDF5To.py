@@ -1,20 +1,35 @@
 """This submodule gives the user some function to extract data from the hdf5 files"""
 from typing import IO, List
-import re
+import os
+import shutil
+import tempfile
+from concurrent.futures import Executor, ProcessPoolExecutor
 import MDAnalysis
+from MDAnalysis.coordinates.base import ReaderBase
 import h5py
 from ase import Atoms as aseAtoms
 import numpy
 from MDAnalysis.lib.mdamath import triclinic_vectors
+from .HDF5erUtils import (
+    getAtomsSelection,
+    getAtomsSelectionLength,
+    getTrajectoryDataset,
+)
+from ..chunking import planChunks
 
 __all__ = [
     "getXYZfromTrajGroup",
     "saveXYZfromTrajGroup",
+    "saveXYZfromTrajGroupInParallel",
     "HDF52AseAtomsChunckedwithSymbols",
     "getXYZfromMDA",
     "createUniverseFromSlice",
+    "TrajectoryGroupReader",
 ]
 
+#: an estimate of the memory needed to write the line of an atom in an xyz file
+_XYZBYTESPERATOM = 256
+
 
 # TODO: using slices is not the best compromise here
 # TODO: maybe it is better to make this and iterator/generator
@@ -23,6 +38,7 @@ def HDF52AseAtomsChunckedwithSymbols(
     chunkTraj: "tuple[slice]",
     chunkBox: "tuple[slice]",
     symbols: "list[str]",
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
 ) -> "list[aseAtoms]":
     """generates an ase trajectory from an hdf5 trajectory
 
@@ -35,16 +51,25 @@ def HDF52AseAtomsChunckedwithSymbols(
             the list of the chunks of the frame boxes within the given group
         symbols (list[str]):
             the list of the name of the atoms
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+            the atoms to read, see :func:`SOAPify.HDF5er.getAtomsSelection`,
+            `symbols` are the names of all the atoms and are selected in the
+            same way. Defaults to None (all the atoms).
 
 
     Returns:
         list[ase.Atoms]: the trajectory stored in the given group
     """
     atoms = []
-
-    for frame, box in zip(
-        groupTraj["Trajectory"][chunkTraj], groupTraj["Box"][chunkBox]
-    ):
+    trajectory = getTrajectoryDataset(groupTraj)
+    if atomsSelection is not None:
+        selection = getAtomsSelection(trajectory.shape[1], atomsSelection, symbols)
+        symbols = numpy.asarray(symbols)[selection].tolist()
+        # only the frames are taken from the chunk, the atoms from the selection
+        framesChunk = chunkTraj[0] if isinstance(chunkTraj, tuple) else chunkTraj
+        chunkTraj = (framesChunk, selection)
+
+    for frame, box in zip(trajectory[chunkTraj], groupTraj["Box"][chunkBox]):
         # theBox = [[box[0], 0, 0], [0, box[1], 0], [0, 0, box[2]]]
         # celldisp = -box[0:3] / 2
         atoms.append(
@@ -115,12 +140,58 @@ def __prepareHeaders(
     return f"{nat}\nProperties=species:S:1:pos:R:3{additional} {allFramesProperty}"
 
 
+def _framesIndexes(nframes: int, framesToExport: "List | slice") -> numpy.ndarray:
+    """returns the indexes of the frames selected by `framesToExport`
+
+    Args:
+        nframes (int): the number of frames in the trajectory
+        framesToExport (List | slice): the frames to export
+
+    Returns:
+        numpy.ndarray: the indexes of the asked frames
+    """
+    return numpy.arange(nframes)[framesToExport].reshape(-1)
+
+
+def _readFrames(
+    dataset: h5py.Dataset,
+    frames: numpy.ndarray,
+    atoms: "slice|numpy.ndarray" = slice(None),
+) -> numpy.ndarray:
+    """reads the asked frames from a dataset with a single hdf5 selection
+
+        contiguous frames are read as a slice, the others with a list selection;
+        h5py accepts only one list in a selection, so if both the frames and the
+        atoms are lists the frames are read one by one
+
+    Args:
+        dataset (h5py.Dataset): the dataset to read
+        frames (numpy.ndarray): the indexes of the frames to read
+        atoms (slice|numpy.ndarray, optional):
+            the selection of the atoms, from :func:`getAtomsSelection`.
+            Defaults to slice(None).
+
+    Returns:
+        numpy.ndarray: the asked frames, in the asked order
+    """
+    uniqueFrames, order = numpy.unique(frames, return_inverse=True)
+    if uniqueFrames[-1] - uniqueFrames[0] + 1 == len(uniqueFrames):
+        data = dataset[uniqueFrames[0] : uniqueFrames[-1] + 1, atoms]
+    elif isinstance(atoms, slice):
+        data = dataset[uniqueFrames, atoms]
+    else:
+        data = numpy.stack([dataset[frame, atoms] for frame in uniqueFrames])
+    return data[order]
+
+
 def getXYZfromTrajGroup(
     filelike: IO,
     group: h5py.Group,
     framesToExport: "List | slice" = slice(None),
     allFramesProperty: str = "",
     perFrameProperties: "list[str]" = None,
+    chunkSize: int = None,
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
     **additionalColumns,
 ) -> None:
     """generate an xyz-file in a IO object from a trajectory group in an hdf5
@@ -131,6 +202,9 @@ def getXYZfromTrajGroup(
         this will add one or more columns to the xyz file, named after the keyword
         argument
 
+        The trajectory is read and written in chunks of frames, so only a chunk
+        of the trajectory is loaded in memory at a time
+
     Args:
         filelike (IO):
             the IO destination, can be a file
@@ -144,44 +218,78 @@ def getXYZfromTrajGroup(
         perFrameProperties (list[str], optional):
             A list of comment.
             Defaults to None.
+        chunkSize (int, optional):
+            the number of frames read and written at once, if None is planned
+            from the memory budget (see :mod:`SOAPify.chunking`) and aligned
+            to the chunks of the trajectory dataset. Defaults to None.
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+            the atoms to export, see :func:`SOAPify.HDF5er.getAtomsSelection`;
+            only the selected atoms are read from the file and the additional
+            columns must contain only the data of the selected atoms.
+            Defaults to None (all the atoms).
         additionalColumns():
             the additional columns to add to the file: each new keyword arguments
             will add a column to the xyz file
     """
 
-    atomtypes = group["Types"].asstr()
-    boxes: h5py.Dataset = group["Box"][framesToExport]
-    coordData: h5py.Dataset = group["Trajectory"][framesToExport]
+    atomtypes = group["Types"].asstr()[:]
+    boxes: h5py.Dataset = group["Box"]
+    coordData: h5py.Dataset = getTrajectoryDataset(group)
+    frames = _framesIndexes(coordData.shape[0], framesToExport)
+    atoms = getAtomsSelection(coordData.shape[1], atomsSelection, atomtypes)
+    atomtypes = atomtypes[atoms]
 
-    trajlen: int = coordData.shape[0]
-    nat: int = coordData.shape[1]
+    trajlen: int = len(frames)
+    nat: int = len(atomtypes)
 
     header: str = __prepareHeaders(
         additionalColumns, nframes=trajlen, nat=nat, allFramesProperty=allFramesProperty
     )
-
-    for frameIndex in range(trajlen):
-        coord = coordData[frameIndex, :]
-        data = __writeAframe(
-            header,
+    if chunkSize is None:
+        chunkSize = planChunks(
             nat,
-            atomtypes,
-            coord,
-            boxes[frameIndex],
-            perFrameProperties[frameIndex] if perFrameProperties is not None else None,
-            # this may create a bottleneck
-            **{k: additionalColumns[k][frameIndex] for k in additionalColumns},
+            dtype=coordData.dtype,
+            nframes=trajlen,
+            extraBytesPerFrame=nat * _XYZBYTESPERATOM,
+            alignTo=coordData.chunks[0] if coordData.chunks is not None else None,
+        ).compute
+
+    for chunkStart in range(0, trajlen, chunkSize):
+        chunkEnd = min(chunkStart + chunkSize, trajlen)
+        chunkFrames = frames[chunkStart:chunkEnd]
+        coordChunk = _readFrames(coordData, chunkFrames, atoms)
+        boxChunk = _readFrames(boxes, chunkFrames)
+        # the additional columns are read once per chunk
+        columnsChunk = {
+            k: additionalColumns[k][chunkStart:chunkEnd] for k in additionalColumns
+        }
+        filelike.write(
+            "".join(
+                [
+                    __writeAframe(
+                        header,
+                        nat,
+                        atomtypes,
+                        coordChunk[frameIndex],
+                        boxChunk[frameIndex],
+                        perFrameProperties[chunkStart + frameIndex]
+                        if perFrameProperties is not None
+                        else None,
+                        **{k: columnsChunk[k][frameIndex] for k in columnsChunk},
+                    )
+                    for frameIndex in range(chunkEnd - chunkStart)
+                ]
+            )
         )
-        filelike.write(data)
 
 
-# TODO: it is slow with huge files
 def saveXYZfromTrajGroup(
     filename: str,
     group: h5py.Group,
     framesToExport: "List | slice" = slice(None),
     allFramesProperty: str = "",
     perFrameProperties: "list[str]" = None,
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
     **additionalColumns,
 ) -> None:
     """Saves "filename" as an xyz file
@@ -201,6 +309,8 @@ def saveXYZfromTrajGroup(
         perFrameProperties (list[str], optional):
             A list of comment.
             Defaults to None.
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+            the atoms to export. Defaults to None (all the atoms).
     """
     with open(filename, "w") as file:
         getXYZfromTrajGroup(
@@ -209,10 +319,164 @@ def saveXYZfromTrajGroup(
             framesToExport,
             allFramesProperty,
             perFrameProperties,
+            atomsSelection=atomsSelection,
             **additionalColumns,
         )
 
 
+def _saveXYZSegmentWorker(
+    outFilename: str,
+    h5Filename: str,
+    groupName: str,
+    frames: numpy.ndarray,
+    allFramesProperty: str,
+    perFrameProperties: "list[str]|None",
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray",
+    additionalColumns: dict,
+) -> str:
+    """Writes a segment of a trajectory group in an xyz file
+
+        this is an helper function for :func:`saveXYZfromTrajGroupInParallel`,
+        the hdf5 file is opened again in read mode in the worker process
+
+    Args:
+        outFilename (str): the name of the xyz file
+        h5Filename (str): the name of the hdf5 file
+        groupName (str): the full name of the trajectory group
+        frames (numpy.ndarray): the indexes of the frames of the segment
+        allFramesProperty (str): the comment string present in all of the frames
+        perFrameProperties (list[str]|None): the comments of the frames of the segment
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray):
+            the atoms to export
+        additionalColumns (dict): the additional columns of the frames of the segment
+
+    Returns:
+        str: the name of the written file
+    """
+    with h5py.File(h5Filename, "r") as h5file, open(outFilename, "w") as file:
+        getXYZfromTrajGroup(
+            file,
+            h5file[groupName],
+            frames,
+            allFramesProperty,
+            perFrameProperties,
+            atomsSelection=atomsSelection,
+            **additionalColumns,
+        )
+    return outFilename
+
+
+def saveXYZfromTrajGroupInParallel(
+    filename: str,
+    group: h5py.Group,
+    framesToExport: "List | slice" = slice(None),
+    allFramesProperty: str = "",
+    perFrameProperties: "list[str]" = None,
+    splitFiles: bool = False,
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
+    nSegments: "int|None" = None,
+    n_jobs: int = -1,
+    executor: "Executor|None" = None,
+    **additionalColumns,
+) -> "list[str]":
+    """Saves the asked frames as xyz, formatting segments of frames in parallel
+
+    The frames in `framesToExport` are split in `nSegments` ranges of consecutive
+    frames that are formatted by different processes: if `splitFiles` is True
+    each segment is saved in its own file, named after `filename` with the index
+    of the segment (`traj.xyz` becomes `traj_0.xyz`, `traj_1.xyz`, ...),
+    otherwise the segments are concatenated in order in `filename`.
+    The additional columns and the per frame properties are treated as in
+    :func:`getXYZfromTrajGroup` and are sliced so that each process receives
+    only the data of its segment.
+
+    The processes open again the hdf5 file in read mode: the file must not be
+    open in write mode by another process while exporting.
+
+    Args:
+        filename (str):
+            name of the file
+        group (h5py.Group):
+            the trajectory group
+        framesToExport (List or slice, optional):
+            the frames to export. Defaults to slice(None).
+        allFramesProperty (str, optional):
+            A comment string that will be present in all of the frames.
+            Defaults to "".
+        perFrameProperties (list[str], optional):
+            A list of comment.
+            Defaults to None.
+        splitFiles (bool, optional):
+            if True each segment is saved in a different file. Defaults to False.
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+            the atoms to export. Defaults to None (all the atoms).
+        nSegments (int|None, optional):
+            the number of segments, if None is the number of processes.
+            Defaults to None.
+        n_jobs (int, optional):
+            the number of processes used if `executor` is None. If less than 1
+            uses all of the available cpus. Defaults to -1.
+        executor (concurrent.futures.Executor, optional):
+            the executor that will format the segments. Defaults to None.
+        additionalColumns():
+            the additional columns to add to the file
+
+    Returns:
+        list[str]: the names of the written files
+    """
+    if n_jobs < 1:
+        n_jobs = os.cpu_count()
+    if nSegments is None:
+        nSegments = n_jobs
+    frames = _framesIndexes(group["Trajectory"].shape[0], framesToExport)
+    nSegments = max(1, min(len(frames), nSegments))
+    segmentLimits = numpy.linspace(0, len(frames), nSegments + 1, dtype=int)
+    root, ext = os.path.splitext(filename)
+    group.file.flush()
+    with tempfile.TemporaryDirectory(
+        dir=os.path.dirname(os.path.abspath(filename))
+    ) as tmpDir:
+        if splitFiles:
+            outFilenames = [f"{root}_{i}{ext}" for i in range(nSegments)]
+        else:
+            outFilenames = [
+                os.path.join(tmpDir, f"segment{i}{ext}") for i in range(nSegments)
+            ]
+        workers = executor if executor is not None else ProcessPoolExecutor(n_jobs)
+        try:
+            futures = [
+                workers.submit(
+                    _saveXYZSegmentWorker,
+                    outFilename,
+                    group.file.filename,
+                    group.name,
+                    frames[start:stop],
+                    allFramesProperty,
+                    perFrameProperties[start:stop]
+                    if perFrameProperties is not None
+                    else None,
+                    atomsSelection,
+                    # only the data of the segment is read and sent to the worker
+                    {k: additionalColumns[k][start:stop] for k in additionalColumns},
+                )
+                for outFilename, start, stop in zip(
+                    outFilenames, segmentLimits[:-1], segmentLimits[1:]
+                )
+            ]
+            for future in futures:
+                future.result()
+        finally:
+            if executor is None:
+                workers.shutdown()
+        if splitFiles:
+            return outFilenames
+        with open(filename, "w") as file:
+            for segment in outFilenames:
+                with open(segment, "r") as segmentFile:
+                    shutil.copyfileobj(segmentFile, file)
+    return [filename]
+
+
 def getXYZfromMDA(
     filelike: IO,
     trajToExport: "MDAnalysis.Universe | MDAnalysis.AtomGroup",
@@ -284,6 +548,30 @@ def __writeAframe(
     perFrameProperty: str = None,
     **additionalColumns,
 ) -> str:
+    """formats a whole frame of an extended xyz file
+
+        The numeric columns are converted to strings all at once with numpy,
+        the coordinates are written with the float64 representation
+
+    Args:
+        header (str):
+            the static part of the header, from :func:`__prepareHeaders`
+        nat (int):
+            the number of atoms
+        atomtypes (list[str]):
+            the types of the atoms
+        coord (numpy.ndarray):
+            the coordinates of the atoms, with shape (nat,3)
+        boxDimensions (numpy.ndarray):
+            the 6 values of the box (the dimensions and the angles)
+        perFrameProperty (str, optional):
+            the comment specific to this frame. Defaults to None.
+        additionalColumns():
+            the additional data of each atom in this frame
+
+    Returns:
+        str: the frame, ready to be written
+    """
     data = f"{header}"
     data += f" {perFrameProperty}" if perFrameProperty is not None else ""
     theBox = triclinic_vectors(boxDimensions)
@@ -292,19 +580,125 @@ def __writeAframe(
     data += f'{theBox[2][0]} {theBox[2][1]} {theBox[2][2]}"'
     data += "\n"
 
-    for atomID in range(nat):
-        data += (
-            f"{atomtypes[atomID]} {coord[atomID,0]} {coord[atomID,1]} {coord[atomID,2]}"
+    table = [
+        numpy.asarray(atomtypes).astype(str).reshape(nat, 1),
+        numpy.asarray(coord, dtype=numpy.float64).astype(str).reshape(nat, 3),
+    ]
+    for key in additionalColumns:
+        table.append(numpy.asarray(additionalColumns[key]).astype(str).reshape(nat, -1))
+    lines = map(" ".join, numpy.concatenate(table, axis=1).tolist())
+    return data + "\n".join(lines) + "\n"
+
+
+class TrajectoryGroupReader(ReaderBase):
+    """MDAnalysis reader that streams the frames from a trajectory group
+
+    The frames are read from the hdf5 file only when asked: the frames that are
+    in the same chunk of the `Trajectory` dataset of the asked one are read
+    together and kept in memory, so that iterating over the trajectory reads
+    each chunk only once.
+
+    The hdf5 file must be kept open while the reader is in use.
+    """
+
+    units = {"time": "ps", "length": "Angstrom"}
+
+    def __init__(
+        self,
+        trajectoryGroup: h5py.Group,
+        useSlice: "List | slice" = slice(None),
+        atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
+        **kwargs,
+    ) -> None:
+        """Initializes the reader
+
+        Args:
+            trajectoryGroup (h5py.Group):
+                the trajectory group
+            useSlice (List | slice, optional):
+                the frames of the trajectory group that will be in the reader.
+                Defaults to slice(None).
+            atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+                the atoms that will be in the reader, only their coordinates
+                are read from the file, see
+                :func:`SOAPify.HDF5er.getAtomsSelection`.
+                Defaults to None (all the atoms).
+        """
+        kwargs.setdefault("dt", 1.0)
+        super().__init__(trajectoryGroup, **kwargs)
+        self.filename = trajectoryGroup.file.filename
+        self.trajectoryGroup = trajectoryGroup
+        self._traj: h5py.Dataset = getTrajectoryDataset(trajectoryGroup)
+        self._box: h5py.Dataset = trajectoryGroup["Box"]
+        self._frames = _framesIndexes(self._traj.shape[0], useSlice)
+        self._atoms = getAtomsSelection(
+            self._traj.shape[1],
+            atomsSelection,
+            None if atomsSelection is None else trajectoryGroup["Types"].asstr()[:],
         )
-        for key in additionalColumns:
-            # this removes the brackets from the data if the dimensions are >1
-            data += " " + re.sub("( \[|\[|\])", "", str(additionalColumns[key][atomID]))
-        data += "\n"
-    return data
+        self._chunkSize = self._traj.chunks[0] if self._traj.chunks is not None else 1
+        self._cacheStart = 0
+        self.n_atoms = getAtomsSelectionLength(self._traj.shape[1], self._atoms)
+        self._cachedTraj = numpy.empty((0, self.n_atoms, 3))
+        self._cachedBox = numpy.empty((0,) + self._box.shape[1:])
+        self.ts = self._Timestep(self.n_atoms, **self._ts_kwargs)
+        if self.n_frames > 0:
+            self._read_frame(0)
+
+    @property
+    def n_frames(self) -> int:
+        """the number of frames in the reader"""
+        return len(self._frames)
+
+    def _readAhead(self, fileFrame: int) -> None:
+        """loads in the cache the chunk of the trajectory group with the given frame
+
+        Args:
+            fileFrame (int): the index of the frame in the trajectory group
+        """
+        self._cacheStart = fileFrame - fileFrame % self._chunkSize
+        cacheStop = min(self._cacheStart + self._chunkSize, self._traj.shape[0])
+        self._cachedTraj = self._traj[self._cacheStart : cacheStop, self._atoms]
+        self._cachedBox = self._box[self._cacheStart : cacheStop]
+
+    def _read_frame(self, frame: int) -> MDAnalysis.coordinates.base.Timestep:
+        """reads the asked frame in the timestep"""
+        fileFrame = self._frames[frame]
+        if not 0 <= fileFrame - self._cacheStart < len(self._cachedTraj):
+            self._readAhead(fileFrame)
+        self.ts.frame = frame
+        self.ts.positions = self._cachedTraj[fileFrame - self._cacheStart]
+        self.ts.dimensions = self._cachedBox[fileFrame - self._cacheStart]
+        return self.ts
+
+    def _read_next_timestep(self, ts=None) -> MDAnalysis.coordinates.base.Timestep:
+        """reads the next frame in the timestep"""
+        if self.ts.frame >= self.n_frames - 1:
+            raise IOError("trying to go over trajectory limit")
+        self._read_frame(self.ts.frame + 1)
+        if ts is None or ts is self.ts:
+            return self.ts
+        ts.frame = self.ts.frame
+        ts.positions = self.ts.positions
+        ts.dimensions = self.ts.dimensions
+        return ts
+
+    def _reopen(self) -> None:
+        """resets the iteration to the first frame"""
+        self.ts.frame = -1
+
+    def close(self) -> None:
+        """frees the cached frames, the hdf5 file is left open"""
+        self._cacheStart = 0
+        self._cachedTraj = self._cachedTraj[:0]
+        self._cachedBox = self._cachedBox[:0]
 
 
 def createUniverseFromSlice(
-    trajectoryGroup: h5py.Group, useSlice=slice(None)
+    trajectoryGroup: h5py.Group,
+    useSlice=slice(None),
+    stream: bool = False,
+    atomsSelection: "None|slice|list[int]|list[str]|numpy.ndarray" = None,
 ) -> MDAnalysis.Universe:
     """Creates a MDanalysis.Universe from a trajectory group
 
@@ -314,16 +708,26 @@ def createUniverseFromSlice(
         useSlice (_type_, optional):
             the asked slice from wich create an universe.
             Defaults to slice(None).
+        stream (bool, optional):
+            if True the frames are read from the hdf5 file only when asked
+            with a :class:`TrajectoryGroupReader`, and the file must be kept
+            open while using the universe; otherwise the asked frames are
+            copied in memory. Defaults to False.
+        atomsSelection (None|slice|list[int]|list[str]|numpy.ndarray, optional):
+            the atoms that will be in the universe, only their coordinates are
+            read from the file, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
 
     Returns:
         MDAnalysis.Universe:
             an universe containing the wnated part of the trajectory
     """
-    # TODO: also add a slice for the atoms
-    traj = trajectoryGroup["Trajectory"]
+    traj = getTrajectoryDataset(trajectoryGroup)
     box = trajectoryGroup["Box"]
-    atomNames = trajectoryGroup["Types"].asstr()
-    nAt = traj.shape[1]
+    atomNames = trajectoryGroup["Types"].asstr()[:]
+    atoms = getAtomsSelection(traj.shape[1], atomsSelection, atomNames)
+    atomNames = atomNames[atoms]
+    nAt = len(atomNames)
     # TODO add names
     toRet = MDAnalysis.Universe.empty(
         n_atoms=nAt,
@@ -334,10 +738,25 @@ def createUniverseFromSlice(
         trajectory=True,
     )
     toRet.add_TopologyAttr("type", atomNames)
-    toRet.load_new(
-        traj[useSlice],
-        format=MDAnalysis.coordinates.memory.MemoryReader,
-        dimensions=box[useSlice],
-    )
+    if stream:
+        toRet.load_new(
+            trajectoryGroup,
+            format=TrajectoryGroupReader,
+            useSlice=useSlice,
+            atomsSelection=atomsSelection,
+        )
+    elif atomsSelection is not None:
+        frames = _framesIndexes(traj.shape[0], useSlice)
+        toRet.load_new(
+            _readFrames(traj, frames, atoms),
+            format=MDAnalysis.coordinates.memory.MemoryReader,
+            dimensions=_readFrames(box, frames),
+        )
+    else:
+        toRet.load_new(
+            traj[useSlice],
+            format=MDAnalysis.coordinates.memory.MemoryReader,
+            dimensions=box[useSlice],
+        )
 
     return toRet
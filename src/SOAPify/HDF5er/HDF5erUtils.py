@@ -1,9 +1,9 @@
 """Simple submodule with support functions for SOAPify.HDF5er"""
-from sys import getsizeof
+import numpy
 from numpy import ndarray
 import h5py
 
-from MDAnalysis import Universe as mdaUniverse
+from ..instrumentation import timedStage
 
 
 def isTrajectoryGroup(trajGroup: h5py.Group) -> bool:
@@ -29,15 +29,246 @@ def isTrajectoryGroup(trajGroup: h5py.Group) -> bool:
     return False
 
 
+def getAtomsSelection(
+    nat: int,
+    atomsSelection: "None|slice|list[int]|list[str]|ndarray" = None,
+    types: "list[str]|ndarray|None" = None,
+) -> "slice|ndarray":
+    """Converts a selection of atoms in a selection usable to read an hdf5 dataset
+
+    The returned selection is a slice if the selected atoms are contiguous, so
+    that h5py reads them as a single hyperslab, otherwise it is the sorted array
+    of the indexes of the selected atoms: the atoms are always read in the same
+    order in which they are stored.
+
+    Args:
+        nat (int):
+            the number of atoms in the dataset
+        atomsSelection (None|slice|list[int]|list[str]|ndarray, optional):
+            the atoms to select: can be a slice, an array of indexes, a boolean
+            mask with an element per atom or the name of one or more species.
+            Defaults to None (all the atoms).
+        types (list[str]|ndarray|None, optional):
+            the types of the atoms, needed to select the atoms by species.
+            Defaults to None.
+
+    Raises:
+        ValueError: if the species are asked but the types are not given
+        ValueError: if the mask has not an element for each atom
+
+    Returns:
+        slice|ndarray: the selection of the atoms
+    """
+    if atomsSelection is None:
+        return slice(None)
+    if isinstance(atomsSelection, str):
+        atomsSelection = [atomsSelection]
+    selection = numpy.asarray(atomsSelection)
+    if isinstance(atomsSelection, slice):
+        indexes = numpy.unique(numpy.arange(nat)[atomsSelection])
+    elif selection.dtype.kind in "USO":
+        if types is None:
+            raise ValueError("the types of the atoms are needed to select the species")
+        indexes = numpy.flatnonzero(
+            numpy.isin(numpy.asarray(types).astype(str), selection.astype(str))
+        )
+    elif selection.dtype == bool:
+        if selection.shape != (nat,):
+            raise ValueError("the mask must have an element for each atom")
+        indexes = numpy.flatnonzero(selection)
+    else:
+        indexes = numpy.unique(numpy.arange(nat)[selection.reshape(-1)])
+    if len(indexes) == 0:
+        return slice(0, 0)
+    if indexes[-1] - indexes[0] + 1 == len(indexes):
+        return slice(int(indexes[0]), int(indexes[-1]) + 1)
+    return indexes
+
+
+def getAtomsSelectionLength(nat: int, atomsSelection: "slice|ndarray") -> int:
+    """Returns the number of atoms in a selection given by :func:`getAtomsSelection`
+
+    Args:
+        nat (int): the number of atoms in the dataset
+        atomsSelection (slice|ndarray): the selection of the atoms
+
+    Returns:
+        int: the number of selected atoms
+    """
+    if isinstance(atomsSelection, slice):
+        return len(range(*atomsSelection.indices(nat)))
+    return len(atomsSelection)
+
+
+class QuantizedTrajectory:
+    """Reads and writes a quantized `Trajectory` dataset as if it stored floats
+
+    The coordinates are stored as integers, in units of the `quantization`
+    attribute of the dataset (a fixed point representation, like in the xtc
+    files): the first frame of each block of `keyframeInterval` frames stores
+    the coordinates, the other frames store the difference with the previous
+    frame, that compress way better with the shuffle and gzip filters.
+    Each read decodes the blocks that contain the asked frames.
+    """
+
+    def __init__(self, dataset: h5py.Dataset) -> None:
+        """Initializes the wrapper
+
+        Args:
+            dataset (h5py.Dataset): the quantized `Trajectory` dataset
+        """
+        self.dataset = dataset
+        self.quantization = float(dataset.attrs["quantization"])
+        self.keyframeInterval = int(dataset.attrs["keyframeInterval"])
+        self.dtype = numpy.dtype(dataset.attrs["decodedType"])
+
+    @property
+    def shape(self) -> tuple:
+        """the shape of the dataset"""
+        return self.dataset.shape
+
+    @property
+    def chunks(self) -> tuple:
+        """the shape of the chunks of the dataset"""
+        return self.dataset.chunks
+
+    @property
+    def ndim(self) -> int:
+        """the number of dimensions of the dataset"""
+        return self.dataset.ndim
+
+    @property
+    def attrs(self):
+        """the attributes of the dataset"""
+        return self.dataset.attrs
+
+    def __len__(self) -> int:
+        return len(self.dataset)
+
+    def iter_chunks(self, sel=None):
+        """see :meth:`h5py.Dataset.iter_chunks`"""
+        return self.dataset.iter_chunks(sel)
+
+    def resize(self, size, axis=None):
+        """see :meth:`h5py.Dataset.resize`"""
+        self.dataset.resize(size, axis)
+
+    def _absolute(self, frames: ndarray, otherDimensions: tuple = ()) -> ndarray:
+        """returns the quantized coordinates of the asked frames
+
+        Args:
+            frames (ndarray): the indexes of the frames
+            otherDimensions (tuple, optional):
+                the selection on the atoms and on the coordinates. Defaults to ().
+
+        Returns:
+            ndarray: the quantized coordinates of the asked frames
+        """
+        blocks = frames // self.keyframeInterval
+        toRet = None
+        for block in numpy.unique(blocks):
+            inBlock = blocks == block
+            start = block * self.keyframeInterval
+            stop = frames[inBlock].max() + 1
+            decoded = numpy.cumsum(
+                self.dataset[(slice(start, stop),) + otherDimensions],
+                axis=0,
+                dtype=numpy.int64,
+            )
+            if toRet is None:
+                toRet = numpy.empty(
+                    (len(frames),) + decoded.shape[1:], dtype=numpy.int64
+                )
+            toRet[inBlock] = decoded[frames[inBlock] - start]
+        if toRet is None:
+            toRet = self.dataset[(slice(0, 0),) + otherDimensions].astype(numpy.int64)
+        return toRet
+
+    def __getitem__(self, key) -> ndarray:
+        if not isinstance(key, tuple):
+            key = (key,)
+        if len(key) == 0 or key[0] is Ellipsis:
+            key = (slice(None),) + key[1:]
+        frames = numpy.arange(len(self))[key[0]]
+        isScalar = numpy.ndim(frames) == 0
+        data = self._absolute(numpy.atleast_1d(frames), key[1:])
+        data = (data * self.quantization).astype(self.dtype)
+        return data[0] if isScalar else data
+
+    def __setitem__(self, key: slice, value: "ndarray|list") -> None:
+        if not isinstance(key, slice) or key.step not in (None, 1):
+            raise ValueError(
+                "only contiguous frames can be written in a quantized trajectory"
+            )
+        start, stop, _ = key.indices(len(self))
+        if stop <= start:
+            return
+        quantized = numpy.rint(
+            numpy.asarray(value, dtype=numpy.float64) / self.quantization
+        )
+        limit = numpy.iinfo(self.dataset.dtype).max
+        if numpy.any(numpy.abs(quantized) > limit):
+            raise ValueError(
+                "the coordinates are too big to be stored with a quantization of"
+                f" {self.quantization}"
+            )
+        quantized = quantized.astype(numpy.int64)
+        # the frame after the interval stores a difference that must be updated
+        nextFrame = None
+        if stop < len(self) and stop % self.keyframeInterval != 0:
+            nextFrame = self._absolute(numpy.array([stop]))[0]
+        previous = numpy.empty_like(quantized)
+        previous[1:] = quantized[:-1]
+        previous[0] = (
+            self._absolute(numpy.array([start - 1]))[0]
+            if start % self.keyframeInterval != 0
+            else 0
+        )
+        deltas = quantized - previous
+        isKeyframe = numpy.arange(start, stop) % self.keyframeInterval == 0
+        deltas[isKeyframe] = quantized[isKeyframe]
+        self.dataset[start:stop] = deltas
+        if nextFrame is not None:
+            self.dataset[stop] = nextFrame - quantized[-1]
+
+
+def getTrajectoryDataset(
+    trajGroup: h5py.Group,
+) -> "h5py.Dataset|QuantizedTrajectory":
+    """Returns the `Trajectory` dataset of a trajectory group, ready to be read
+
+    Args:
+        trajGroup (h5py.Group): the trajectory group
+
+    Returns:
+        h5py.Dataset|QuantizedTrajectory:
+            the dataset, wrapped in a :class:`QuantizedTrajectory` if the
+            coordinates are quantized
+    """
+    dataset = trajGroup["Trajectory"]
+    if "quantization" in dataset.attrs:
+        return QuantizedTrajectory(dataset)
+    return dataset
+
+
 def exportChunk2HDF5(
     trajFolder: h5py.Group,
     intervalStart: int,
     intervalEnd: int,
     boxes: "list[list[list[3*float]]]|ndarray",
     coordinates: "list|ndarray",
+    growGeometrically: bool = False,
 ):
     """Export a chunk of atom information in an h5py.Group
 
+    The datasets are resized only if they are shorter than `intervalEnd`: with
+    `growGeometrically` their lenght is at least doubled, so that appending
+    many chunks resizes them only a few times, and the caller should trim
+    them at the end with :func:`trimTrajectoryGroup`.
+
+    The time spent writing is sent to the instrumentation as the "write" stage
+    of the "hdf5er" pipeline, see :mod:`SOAPify.instrumentation`
+
     Args:
         trajFolder (h5py.Group):
             the group in the hdf5 file
@@ -51,20 +282,40 @@ def exportChunk2HDF5(
         coordinates (list):
             the list of the coordinates, frame per frame (for each frame a
             list that contains the coordinates of all atoms in that frame)
+        growGeometrically (bool, optional):
+            if True the datasets are resized to at least twice their lenght
+            when they need to grow. Defaults to False.
     """
 
-    # TODO: put an if and /or decide if this is an expansion or an ovewrite
-    trajFolder["Box"].resize((intervalEnd, 6))
-    trajFolder["Trajectory"].resize((intervalEnd, len(coordinates[0]), 3))
-    print(
-        f"[{intervalStart}:{intervalEnd}]",
-        len(coordinates),
-        len(trajFolder["Box"][intervalStart:intervalEnd]),
-        f"chunk of {getsizeof(coordinates)} B",
-    )
+    currentLenght = trajFolder["Trajectory"].shape[0]
+    if currentLenght < intervalEnd:
+        newLenght = (
+            max(intervalEnd, 2 * currentLenght) if growGeometrically else intervalEnd
+        )
+        trimTrajectoryGroup(trajFolder, newLenght)
+    with timedStage(
+        "hdf5er",
+        "write",
+        intervalStart,
+        intervalEnd,
+        numpy.asarray(boxes).nbytes + numpy.asarray(coordinates).nbytes,
+        group=trajFolder.name,
+    ):
+        trajFolder["Box"][intervalStart:intervalEnd] = boxes
+        getTrajectoryDataset(trajFolder)[intervalStart:intervalEnd] = coordinates
+
 
-    trajFolder["Box"][intervalStart:intervalEnd] = boxes
-    trajFolder["Trajectory"][intervalStart:intervalEnd] = coordinates
+def trimTrajectoryGroup(trajFolder: h5py.Group, nframes: int):
+    """Resizes the Box and the Trajectory datasets of a trajectory group
+
+    Args:
+        trajFolder (h5py.Group):
+            the group in the hdf5 file
+        nframes (int):
+            the new number of frames of the trajectory
+    """
+    trajFolder["Box"].resize(nframes, axis=0)
+    trajFolder["Trajectory"].resize(nframes, axis=0)
 
 
 def patchBoxFromTopology(hdf5TrajFile: str, topologyFile: str):  # pragma: no cover
@@ -81,6 +332,8 @@ def patchBoxFromTopology(hdf5TrajFile: str, topologyFile: str):  # pragma: no co
         topologyFile (str):
             The LAMMPS data file with the wnated box
     """
+    from MDAnalysis import Universe as mdaUniverse
+
     universe = mdaUniverse(topologyFile, atom_style="id type x y z")
     with h5py.File(hdf5TrajFile, "a") as workFile:
         for key in workFile["Trajectories"]:
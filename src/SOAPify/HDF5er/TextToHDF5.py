@@ -0,0 +1,728 @@
+"""This submodule contains the functions to import text trajectories in hdf5 files
+
+The supported formats are the (extended) xyz files and the LAMMPS dump files:
+the frames are read in blocks and each block is parsed at once with numpy, so
+that the importers can work on trajectories that do not fit in memory.
+
+The position in bytes of each frame is stored in a sidecar file next to the
+trajectory (see :func:`getFrameOffsets`): with it the blocks of frames can be
+parsed by different processes, each one starting directly from its first frame.
+"""
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor
+from itertools import islice
+import h5py
+import numpy
+from MDAnalysis.lib.mdamath import triclinic_box
+from .HDF5erUtils import exportChunk2HDF5, trimTrajectoryGroup
+from .ToHDF5 import _prepareTrajectoryGroup, _trajectoryChunkSize
+
+__all__ = [
+    "getOffsetsCacheName",
+    "getFrameOffsets",
+    "mapTextTrajectoryBlocks",
+    "readTextTrajectoryFrames",
+    "getTextTrajectoryBoxes",
+    "textTrajectory2HDF5",
+    "text2HDF5",
+]
+
+#: a generous estimate of the memory needed to parse the line of an atom
+_PARSEBYTESPERATOM = 512
+_LATTICE = re.compile(rb'Lattice="([^"]*)"')
+_FORMATS = {
+    "xyz": "xyz",
+    "extxyz": "xyz",
+    "dump": "lammpsdump",
+    "lammpstrj": "lammpsdump",
+    "lammpsdump": "lammpsdump",
+}
+
+
+def _guessFormat(filename: str, fileFormat: "str|None") -> str:
+    """returns the format of the file, from the extension if it is not given
+
+    Args:
+        filename (str): the name of the file
+        fileFormat (str|None): the format asked by the user
+
+    Raises:
+        ValueError: if the format is not known
+
+    Returns:
+        str: "xyz" or "lammpsdump"
+    """
+    if fileFormat is None:
+        fileFormat = str(filename).split(".")[-1]
+    fileFormat = fileFormat.lower()
+    if fileFormat not in _FORMATS:
+        raise ValueError(
+            f'the format "{fileFormat}" is not supported, use one of {list(_FORMATS)}'
+        )
+    return _FORMATS[fileFormat]
+
+
+def _skipLines(file, nlines: int) -> None:
+    """advances the file of `nlines` lines"""
+    for _ in islice(file, nlines):
+        pass
+
+
+def _parseAtomLines(lines: "list[bytes]", nframes: int) -> numpy.ndarray:
+    """parses the lines of the atoms of some frames at once
+
+    Args:
+        lines (list[bytes]): the lines of the atoms of all the frames
+        nframes (int): the number of frames
+
+    Raises:
+        ValueError: if the frames do not have the same number of atoms and columns
+
+    Returns:
+        numpy.ndarray: the tokens, with shape (nframes, nat, ncolumns)
+    """
+    tokens = numpy.array(b"".join(lines).split())
+    ncolumns = len(lines[0].split())
+    if len(tokens) % (nframes * ncolumns) != 0:
+        raise ValueError("all the frames must have the same atoms and columns")
+    return tokens.reshape(nframes, -1, ncolumns)
+
+
+def _readXYZFrames(file, nframes: int, offsets: "list|None" = None) -> tuple:
+    """reads and parses up to `nframes` frames of an xyz file
+
+    Args:
+        file (BinaryIO): the file, positioned at the start of a frame
+        nframes (int): the maximum number of frames to read
+        offsets (list|None, optional):
+            if given, the position of the end of each frame is appended to it.
+            Defaults to None.
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]:
+            the types of the atoms, the coordinates with shape (nframes, nat, 3)
+            and the boxes with shape (nframes, 6) (nan if the box is not in the
+            comment of the frame)
+    """
+    lines = []
+    boxes = []
+    for _ in range(nframes):
+        header = file.readline()
+        if not header.strip():
+            break
+        nat = int(header)
+        lattice = _LATTICE.search(file.readline())
+        if lattice is None:
+            boxes.append(numpy.full(6, numpy.nan))
+        else:
+            vectors = numpy.array(lattice.group(1).split(), dtype=float).reshape(3, 3)
+            boxes.append(triclinic_box(*vectors))
+        lines += islice(file, nat)
+        if offsets is not None:
+            offsets.append(file.tell())
+    if not boxes:
+        return numpy.empty(0, dtype=str), numpy.empty((0, 0, 3)), numpy.empty((0, 6))
+    tokens = _parseAtomLines(lines, len(boxes))
+    return (
+        tokens[0, :, 0].astype(str),
+        tokens[:, :, 1:4].astype(float),
+        numpy.array(boxes),
+    )
+
+
+def _lammpsBox(boundsLine: bytes, boundsLines: "list[bytes]") -> tuple:
+    """returns the box and the origin of a frame of a LAMMPS dump
+
+    Args:
+        boundsLine (bytes): the "ITEM: BOX BOUNDS" line
+        boundsLines (list[bytes]): the three lines with the bounds
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray]:
+            the box vectors as rows of a (3,3) matrix and the origin of the box
+    """
+    bounds = numpy.array(b" ".join(boundsLines).split(), dtype=float).reshape(3, -1)
+    lo = bounds[:, 0].copy()
+    hi = bounds[:, 1].copy()
+    xy, xz, yz = 0.0, 0.0, 0.0
+    if b"xy" in boundsLine:
+        xy, xz, yz = bounds[:, 2]
+        # from the bounding box to the parallelepiped
+        lo[0] -= min(0.0, xy, xz, xy + xz)
+        hi[0] -= max(0.0, xy, xz, xy + xz)
+        lo[1] -= min(0.0, yz)
+        hi[1] -= max(0.0, yz)
+    vectors = numpy.array(
+        [
+            [hi[0] - lo[0], 0.0, 0.0],
+            [xy, hi[1] - lo[1], 0.0],
+            [xz, yz, hi[2] - lo[2]],
+        ]
+    )
+    return vectors, lo
+
+
+def _readLAMMPSDumpFrames(file, nframes: int, offsets: "list|None" = None) -> tuple:
+    """reads and parses up to `nframes` frames of a LAMMPS dump file
+
+        the atoms are sorted by id, if the dump contains the ids; the types are
+        taken from the "element" column, or from the "type" column; the
+        coordinates from the "x y z", "xu yu zu" or the scaled "xs ys zs" columns
+
+    Args:
+        file (BinaryIO): the file, positioned at the start of a frame
+        nframes (int): the maximum number of frames to read
+        offsets (list|None, optional):
+            if given, the position of the end of each frame is appended to it.
+            Defaults to None.
+
+    Raises:
+        ValueError: if the dump does not contain the coordinates
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]:
+            the types of the atoms, the coordinates with shape (nframes, nat, 3)
+            and the boxes with shape (nframes, 6)
+    """
+    lines = []
+    vectors = []
+    origins = []
+    columns = None
+    for _ in range(nframes):
+        if not file.readline().strip():
+            break
+        # the timestep and the "ITEM: NUMBER OF ATOMS" line
+        _skipLines(file, 2)
+        nat = int(file.readline())
+        boundsLine = file.readline()
+        frameVectors, origin = _lammpsBox(boundsLine, list(islice(file, 3)))
+        vectors.append(frameVectors)
+        origins.append(origin)
+        columns = file.readline().split()[2:]
+        lines += islice(file, nat)
+        if offsets is not None:
+            offsets.append(file.tell())
+    if not vectors:
+        return numpy.empty(0, dtype=str), numpy.empty((0, 0, 3)), numpy.empty((0, 6))
+    tokens = _parseAtomLines(lines, len(vectors))
+    columns = [column.decode() for column in columns]
+    if "id" in columns:
+        order = numpy.argsort(tokens[:, :, columns.index("id")].astype(int), axis=1)
+        tokens = numpy.take_along_axis(tokens, order[:, :, numpy.newaxis], axis=1)
+    typeColumn = columns.index("element" if "element" in columns else "type")
+    vectors = numpy.array(vectors)
+    for coordNames in (["x", "y", "z"], ["xu", "yu", "zu"], ["xs", "ys", "zs"]):
+        if all(name in columns for name in coordNames):
+            coordinates = tokens[
+                :, :, [columns.index(name) for name in coordNames]
+            ].astype(float)
+            if coordNames[0] == "xs":
+                coordinates = numpy.array(origins)[:, numpy.newaxis] + numpy.einsum(
+                    "fai,fij->faj", coordinates, vectors
+                )
+            break
+    else:
+        raise ValueError(f"the dump does not contain the coordinates: {columns}")
+    return (
+        tokens[0, :, typeColumn].astype(str),
+        coordinates,
+        numpy.array([triclinic_box(*frameVectors) for frameVectors in vectors]),
+    )
+
+
+_READERS = {"xyz": _readXYZFrames, "lammpsdump": _readLAMMPSDumpFrames}
+
+
+def _skipXYZFrame(file) -> bool:
+    """skips a frame of an xyz file, returns False at the end of the file"""
+    header = file.readline()
+    if not header.strip():
+        return False
+    _skipLines(file, int(header) + 1)
+    return True
+
+
+def _skipLAMMPSDumpFrame(file) -> bool:
+    """skips a frame of a LAMMPS dump file, returns False at the end of the file"""
+    if not file.readline().strip():
+        return False
+    _skipLines(file, 2)
+    _skipLines(file, int(file.readline()) + 5)
+    return True
+
+
+_SKIPPERS = {"xyz": _skipXYZFrame, "lammpsdump": _skipLAMMPSDumpFrame}
+
+
+def getOffsetsCacheName(filename: str) -> str:
+    """Returns the name of the sidecar file with the frame offsets of `filename`
+
+    Args:
+        filename (str): the name of the trajectory file
+
+    Returns:
+        str: the name of the cache file
+    """
+    return f"{filename}.offsets.npz"
+
+
+def _loadCachedOffsets(filename: str) -> "numpy.ndarray|None":
+    """returns the cached offsets, or None if the cache is missing or stale
+
+    the cache is valid only if the size and the modification time of the
+    trajectory are the same of when it has been written
+    """
+    try:
+        stat = os.stat(filename)
+        with numpy.load(getOffsetsCacheName(filename)) as cache:
+            if cache["size"] == stat.st_size and cache["mtime"] == stat.st_mtime_ns:
+                return cache["offsets"]
+    except (OSError, KeyError, ValueError):
+        pass
+    return None
+
+
+def _saveCachedOffsets(filename: str, offsets: numpy.ndarray) -> None:
+    """stores the offsets in the sidecar file, if the folder is writable"""
+    stat = os.stat(filename)
+    try:
+        with open(getOffsetsCacheName(filename), "wb") as cacheFile:
+            numpy.savez(
+                cacheFile,
+                offsets=offsets,
+                size=stat.st_size,
+                mtime=stat.st_mtime_ns,
+            )
+    except OSError:
+        pass
+
+
+def getFrameOffsets(
+    filename: str, fileFormat: "str|None" = None, useCache: bool = True
+) -> numpy.ndarray:
+    """Returns the position in bytes of the start of each frame in the file
+
+        The file is scanned once, without parsing the atoms; the result is
+        cached in a sidecar file (see :func:`getOffsetsCacheName`) that is
+        used until the size or the modification time of the file change
+
+    Args:
+        filename (str):
+            the name of the file
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+        useCache (bool, optional):
+            if True reads and writes the offsets in the sidecar file.
+            Defaults to True.
+
+    Returns:
+        numpy.ndarray:
+            the offsets of the frames, the last element is the end of the
+            last frame: the file contains `len(offsets)-1` frames
+    """
+    skipFrame = _SKIPPERS[_guessFormat(filename, fileFormat)]
+    if useCache:
+        offsets = _loadCachedOffsets(filename)
+        if offsets is not None:
+            return offsets
+    offsets = [0]
+    with open(filename, "rb") as file:
+        while skipFrame(file):
+            offsets.append(file.tell())
+    offsets = numpy.array(offsets, dtype=numpy.int64)
+    if useCache:
+        _saveCachedOffsets(filename, offsets)
+    return offsets
+
+
+def _frameBlocks(offsets: numpy.ndarray, framesPerBlock: int) -> "list[tuple[int,int]]":
+    """Divides the frames of a text trajectory in blocks
+
+    Args:
+        offsets (numpy.ndarray): the offsets of the frames, from :func:`getFrameOffsets`
+        framesPerBlock (int): the maximum number of frames in each block
+
+    Returns:
+        list[tuple[int,int]]: the first and the frame after the last of each block
+    """
+    nframes = len(offsets) - 1
+    return [
+        (first, min(first + framesPerBlock, nframes))
+        for first in range(0, nframes, framesPerBlock)
+    ]
+
+
+def mapTextTrajectoryBlocks(
+    worker,
+    filename: str,
+    offsets: numpy.ndarray,
+    framesPerBlock: int,
+    fileFormat: "str|None" = None,
+    workerArgs: tuple = (),
+    n_jobs: int = -1,
+    executor: "Executor|None" = None,
+):
+    """Applies `worker` to the blocks of frames of a text trajectory, in parallel
+
+        `worker(first, types, coordinates, boxes, *workerArgs)` is called in
+        the worker processes on each block of frames parsed by
+        :func:`readTextTrajectoryFrames`, that seeks directly to the first frame
+        of the block; only a few blocks per process are kept in memory at the
+        same time. With `n_jobs=1` and no executor the blocks are processed in
+        this process
+
+    Args:
+        worker (callable): a picklable function
+        filename (str): the name of the file
+        offsets (numpy.ndarray): the offsets of the frames, from :func:`getFrameOffsets`
+        framesPerBlock (int): the maximum number of frames in each block
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+        workerArgs (tuple, optional):
+            the additional arguments for `worker`. Defaults to ().
+        n_jobs (int, optional):
+            the number of processes used if `executor` is None. If less than 1
+            uses all of the available cpus. Defaults to -1.
+        executor (concurrent.futures.Executor, optional):
+            the process executor that parses the blocks. Defaults to None.
+
+    Yields:
+        tuple[int,int,Any]:
+            in order, the first frame, the frame after the last and the result
+            of `worker` for each block
+    """
+    if n_jobs < 1:
+        n_jobs = os.cpu_count()
+    fileFormat = _guessFormat(filename, fileFormat)
+    blocks = deque(_frameBlocks(offsets, framesPerBlock))
+    if n_jobs == 1 and executor is None:
+        for first, last in blocks:
+            yield first, last, _blockWorker(
+                worker,
+                filename,
+                first,
+                offsets[first : last + 1],
+                fileFormat,
+                workerArgs,
+            )
+        return
+    running = deque()
+    workers = executor if executor is not None else ProcessPoolExecutor(n_jobs)
+    try:
+        while blocks or running:
+            while blocks and len(running) < 2 * n_jobs:
+                first, last = blocks.popleft()
+                future = workers.submit(
+                    _blockWorker,
+                    worker,
+                    filename,
+                    first,
+                    offsets[first : last + 1],
+                    fileFormat,
+                    workerArgs,
+                )
+                running.append((first, last, future))
+            first, last, future = running.popleft()
+            yield first, last, future.result()
+    finally:
+        for *_, future in running:
+            future.cancel()
+        if executor is None:
+            workers.shutdown()
+
+
+def _blockWorker(
+    worker,
+    filename: str,
+    first: int,
+    offsets: numpy.ndarray,
+    fileFormat: str,
+    workerArgs: tuple,
+):
+    """reads the block of frames delimited by `offsets` and passes it to `worker`"""
+    return worker(
+        first,
+        *readTextTrajectoryFrames(
+            filename, 0, len(offsets) - 1, offsets=offsets, fileFormat=fileFormat
+        ),
+        *workerArgs,
+    )
+
+
+def _returnFrames(first, types, coordinates, boxes):
+    """the worker that returns the parsed frames as they are"""
+    return types, coordinates, boxes
+
+
+def readTextTrajectoryFrames(
+    filename: str,
+    start: int = 0,
+    stop: "int|None" = None,
+    offsets: "numpy.ndarray|None" = None,
+    fileFormat: "str|None" = None,
+) -> tuple:
+    """Reads the frames in `range(start, stop)` of an xyz or of a LAMMPS dump file
+
+    Args:
+        filename (str):
+            the name of the file
+        start (int, optional):
+            the first frame to read. Defaults to 0.
+        stop (int|None, optional):
+            the frame after the last one to read, if None reads up to the end
+            of the file. Defaults to None.
+        offsets (numpy.ndarray|None, optional):
+            the offsets of the frames from :func:`getFrameOffsets`, if given
+            the file is read directly from the first asked frame.
+            Defaults to None.
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]:
+            the types of the atoms, the coordinates with shape (nframes, nat, 3)
+            and the boxes with shape (nframes, 6) (nan if not in the file)
+    """
+    fileFormat = _guessFormat(filename, fileFormat)
+    if stop is None:
+        stop = numpy.iinfo(numpy.int64).max
+    with open(filename, "rb") as file:
+        if offsets is not None:
+            file.seek(offsets[start])
+        else:
+            for _ in range(start):
+                _SKIPPERS[fileFormat](file)
+        return _READERS[fileFormat](file, max(0, stop - start))
+
+
+def textTrajectory2HDF5(
+    filename: str,
+    trajFolder: h5py.Group,
+    fileFormat: "str|None" = None,
+    trajChunkSize: "int|None" = None,
+    useType="float64",
+    quantization: "float|None" = None,
+    boxes: "numpy.ndarray|None" = None,
+    n_jobs: int = 1,
+    executor: "Executor|None" = None,
+) -> numpy.ndarray:
+    """Uploads an xyz or a LAMMPS dump file to a h5py.Group in an hdf5 file
+
+        The file is read in blocks of `trajChunkSize` frames, each block is
+        parsed at once and written in a single chunk.
+
+        With more than one job the frames are indexed with
+        :func:`getFrameOffsets` and the blocks are parsed in parallel by
+        :func:`mapTextTrajectoryBlocks`: this process is the only one that
+        writes in the hdf5 file
+
+    Args:
+        filename (str):
+            the name of the file
+        trajFolder (h5py.Group):
+            the group in which store the trajectory in the hdf5 file
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+        trajChunkSize (int|None, optional):
+            The desired dimension of the chunks of data that are stored in the
+            hdf5 file, if None is planned from the number of atoms and the
+            memory budget (see :mod:`SOAPify.chunking`). Defaults to None.
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+        quantization (float|None, optional):
+            the precision of the stored coordinates, see
+            :func:`SOAPify.HDF5er.universe2HDF5`. Defaults to None.
+        boxes (numpy.ndarray|None, optional):
+            the box of the frames, as [a, b, c, alpha, beta, gamma], with shape
+            (6) or (nframes, 6): needed for the xyz files without the `Lattice`
+            in the comment lines. Defaults to None.
+        n_jobs (int, optional):
+            the number of processes that parse the file, if `executor` is None.
+            If less than 1 uses all of the available cpus. Defaults to 1.
+        executor (concurrent.futures.Executor, optional):
+            the process executor that parses the file. Defaults to None.
+
+    Raises:
+        ValueError: if the box of a frame is not known
+
+    Returns:
+        numpy.ndarray: the offsets of the frames, see :func:`getFrameOffsets`
+    """
+    fileFormat = _guessFormat(filename, fileFormat)
+    if n_jobs == 1 and executor is None:
+        offsets = [0]
+        nframes = None
+    else:
+        offsets = getFrameOffsets(filename, fileFormat)
+        nframes = len(offsets) - 1
+    if trajChunkSize is None:
+        nat = len(
+            readTextTrajectoryFrames(
+                filename,
+                0,
+                1,
+                offsets=offsets if nframes is not None else None,
+                fileFormat=fileFormat,
+            )[0]
+        )
+        trajChunkSize = _trajectoryChunkSize(
+            None, nat, useType, nframes, extraBytesPerFrame=nat * _PARSEBYTESPERATOM
+        )
+    if nframes is None:
+        chunks = _readChunks(filename, fileFormat, trajChunkSize, offsets)
+    else:
+        chunks = mapTextTrajectoryBlocks(
+            _returnFrames,
+            filename,
+            offsets,
+            trajChunkSize,
+            fileFormat,
+            n_jobs=n_jobs,
+            executor=executor,
+        )
+    frameNum = 0
+    for first, frameNum, (types, coordinates, chunkBoxes) in chunks:
+        chunkBoxes = getTextTrajectoryBoxes(chunkBoxes, boxes, first)
+        if first == 0:
+            _prepareTrajectoryGroup(
+                trajFolder, types, trajChunkSize, useType, quantization
+            )
+        exportChunk2HDF5(
+            trajFolder,
+            first,
+            frameNum,
+            chunkBoxes,
+            coordinates,
+            growGeometrically=True,
+        )
+    if frameNum > 0:
+        trimTrajectoryGroup(trajFolder, frameNum)
+    return numpy.array(offsets, dtype=numpy.int64)
+
+
+def _readChunks(filename: str, fileFormat: str, trajChunkSize: int, offsets: list):
+    """reads sequentially the file in chunks of `trajChunkSize` frames
+
+    Yields:
+        tuple[int,int,tuple]:
+            the first frame, the frame after the last and the parsed frames
+    """
+    readFrames = _READERS[fileFormat]
+    frameNum = 0
+    with open(filename, "rb") as file:
+        while True:
+            frames = readFrames(file, trajChunkSize, offsets)
+            if len(frames[1]) == 0:
+                return
+            first = frameNum
+            frameNum += len(frames[1])
+            yield first, frameNum, frames
+
+
+def getTextTrajectoryBoxes(
+    chunkBoxes: numpy.ndarray, boxes: "numpy.ndarray|None", first: int
+) -> numpy.ndarray:
+    """Returns the boxes of a block of frames read from a text trajectory
+
+    Args:
+        chunkBoxes (numpy.ndarray): the boxes read from the file
+        boxes (numpy.ndarray|None):
+            the boxes given by the user, with shape (6) or (nframes, 6), that
+            replace the ones in the file
+        first (int): the first frame of the block
+
+    Raises:
+        ValueError: if the box of a frame is not known
+
+    Returns:
+        numpy.ndarray: the boxes of the frames of the block
+    """
+    nframes = len(chunkBoxes)
+    if boxes is not None:
+        boxes = numpy.asarray(boxes, dtype=float)
+        if boxes.ndim == 1:
+            chunkBoxes = numpy.broadcast_to(boxes, (nframes, 6))
+        else:
+            chunkBoxes = boxes[first : first + nframes]
+    if numpy.isnan(chunkBoxes).any():
+        raise ValueError(
+            "the box of the frames is not in the file, pass it with `boxes`"
+        )
+    return chunkBoxes
+
+
+def text2HDF5(
+    filename: str,
+    targetHDF5File: str,
+    groupName: str,
+    fileFormat: "str|None" = None,
+    trajChunkSize: "int|None" = None,
+    override: bool = False,
+    attrs: dict = None,
+    useType="float64",
+    quantization: "float|None" = None,
+    boxes: "numpy.ndarray|None" = None,
+    n_jobs: int = 1,
+    executor: "Executor|None" = None,
+):
+    """Creates an HDF5 trajectory group from an xyz or a LAMMPS dump file
+
+        **WARNING**: in the HDF5 file if the chosen group is already present it
+        will be overwritten by the new data
+
+    Args:
+        filename (str):
+            the name of the file
+        targetHDF5File (str):
+            the name of HDF5 file
+        groupName (str):
+            the name of the group in wich save the trajectory data within the
+            `targetHDF5File`
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+        trajChunkSize (int|None, optional):
+            The desired dimension of the chunks of data that are stored in the
+            hdf5 file, if None is planned from the number of atoms and the
+            memory budget (see :mod:`SOAPify.chunking`). Defaults to None.
+        override (bool, optional):
+            If true the hdf5 file will be completely overwritten.
+            Defaults to False.
+        attrs (dict, optional):
+            the attributes to store in the trajectory group. Defaults to None.
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+        quantization (float|None, optional):
+            the precision of the stored coordinates, see
+            :func:`SOAPify.HDF5er.universe2HDF5`. Defaults to None.
+        boxes (numpy.ndarray|None, optional):
+            the box of the frames, see :func:`textTrajectory2HDF5`.
+            Defaults to None.
+        n_jobs (int, optional):
+            the number of processes that parse the file, if `executor` is None.
+            If less than 1 uses all of the available cpus. Defaults to 1.
+        executor (concurrent.futures.Executor, optional):
+            the process executor that parses the file. Defaults to None.
+    """
+    with h5py.File(targetHDF5File, "w" if override else "a") as newTraj:
+        trajGroup = newTraj.require_group(f"Trajectories/{groupName}")
+        textTrajectory2HDF5(
+            filename,
+            trajGroup,
+            fileFormat=fileFormat,
+            trajChunkSize=trajChunkSize,
+            useType=useType,
+            quantization=quantization,
+            boxes=boxes,
+            n_jobs=n_jobs,
+            executor=executor,
+        )
+        if attrs:
+            for key in attrs.keys():
+                trajGroup.attrs.create(key, attrs[key])
@@ -1,43 +1,85 @@
 """This submodule contains some function to import date to the hdf5 files"""
 import warnings
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import Manager
+from queue import Empty, Full
 import h5py
 import numpy
 from MDAnalysis import Universe as mdaUniverse, AtomGroup as mdaAtomGroup
 from deprecated import deprecated
 from ase.io import iread as aseIRead
 from ase.io import read as aseRead
-from .HDF5erUtils import exportChunk2HDF5
+from .HDF5erUtils import exportChunk2HDF5, trimTrajectoryGroup
+from ..instrumentation import emitRecord
+from ..chunking import planChunks
 
 
-def universe2HDF5(
-    mdaTrajectory: "mdaUniverse | mdaAtomGroup",
+def _trajectoryChunkSize(
+    trajChunkSize: "int|None",
+    nat: int,
+    useType: "str|numpy.dtype",
+    nframes: "int|None" = None,
+    extraBytesPerFrame: int = 0,
+) -> int:
+    """returns `trajChunkSize` or, if it is None, the one planned from the memory budget
+
+        see :func:`SOAPify.chunking.planChunks`, the frames are stored in
+        chunks of the planned "write" size
+
+    Args:
+        trajChunkSize (int|None): the dimension of the chunks asked by the user
+        nat (int): the number of atoms
+        useType (str|numpy.dtype): the precision used to store the data
+        nframes (int|None, optional): the number of frames, if known.
+            Defaults to None.
+        extraBytesPerFrame (int, optional): the memory needed to read a frame,
+            besides its coordinates. Defaults to 0.
+
+    Returns:
+        int: the number of frames in each chunk
+    """
+    if trajChunkSize is not None:
+        return trajChunkSize
+    return planChunks(
+        nat, dtype=useType, nframes=nframes, extraBytesPerFrame=extraBytesPerFrame
+    ).write
+
+
+def _prepareTrajectoryGroup(
     trajFolder: h5py.Group,
-    trajChunkSize: int = 100,
-    trajslice: slice = slice(None),
-    useType="float64",
+    types: "list[str]",
+    trajChunkSize: int,
+    useType: "str|numpy.dtype",
+    quantization: "float|None" = None,
 ):
-    """Uploads an mda.Universe or an mda.AtomGroup to a h5py.Group in an hdf5 file
+    """Creates the datasets of a trajectory group, if they are not present
+
+        If `quantization` is given the coordinates are stored as integers, see
+        :class:`SOAPify.HDF5er.QuantizedTrajectory`
 
     Args:
-        MDAUniverseOrSelection (MDAnalysis.Universe or MDAnalysis.AtomGroup):
-            the container with the trajectory data
         trajFolder (h5py.Group):
             the group in which store the trajectory in the hdf5 file
-        trajChunkSize (int, optional):
+        types (list[str]):
+            the types of the atoms
+        trajChunkSize (int):
             The desired dimension of the chunks of data that are stored in the hdf5 file.
-            Defaults to 100.
-        useType (str,optional):
-            The precision used to store the data. Defaults to "float64".
+        useType (str|numpy.dtype):
+            The precision used to store the data.
+        quantization (float|None, optional):
+            the precision of the stored coordinates. Defaults to None.
     """
-
-    atoms = mdaTrajectory.atoms
-    universe = mdaTrajectory.universe
-    nat = len(atoms)
+    nat = len(types)
     useType = numpy.dtype(useType)
     if "Types" not in list(trajFolder.keys()):
-        trajFolder.create_dataset("Types", (nat), compression="gzip", data=atoms.types)
+        # the strings are stored with variable lenght, as the ones from MDA
+        trajFolder.create_dataset(
+            "Types", (nat), compression="gzip", data=numpy.asarray(types, dtype=object)
+        )
 
-    if "Trajectory" not in list(trajFolder.keys()):
+    if "Trajectory" not in list(trajFolder.keys()) and quantization is None:
         trajFolder.create_dataset(
             "Trajectory",
             (0, nat, 3),
@@ -46,6 +88,19 @@ def universe2HDF5(
             maxshape=(None, nat, 3),
             dtype=useType,
         )
+    elif "Trajectory" not in list(trajFolder.keys()):
+        trajectory = trajFolder.create_dataset(
+            "Trajectory",
+            (0, nat, 3),
+            compression="gzip",
+            shuffle=True,
+            chunks=(trajChunkSize, nat, 3),
+            maxshape=(None, nat, 3),
+            dtype=numpy.int32,
+        )
+        trajectory.attrs.create("quantization", quantization)
+        trajectory.attrs.create("keyframeInterval", trajChunkSize)
+        trajectory.attrs.create("decodedType", useType.str)
 
     if "Box" not in list(trajFolder.keys()):
         trajFolder.create_dataset(
@@ -57,35 +112,161 @@ def universe2HDF5(
             dtype=useType,
         )
 
+
+def _trajectoryLenght(
+    mdaTrajectory: "mdaUniverse | mdaAtomGroup", trajslice: slice
+) -> "int|None":
+    """Returns the number of frames that will be read, if the reader knows it
+
+    Args:
+        mdaTrajectory (MDAnalysis.Universe or MDAnalysis.AtomGroup):
+            the container with the trajectory data
+        trajslice (slice):
+            the frames to read
+
+    Returns:
+        int|None: the number of frames, None if it is not known
+    """
+    try:
+        return len(mdaTrajectory.universe.trajectory[trajslice])
+    except (TypeError, NotImplementedError):
+        return None
+
+
+def _trajectoryChunks(
+    mdaTrajectory: "mdaUniverse | mdaAtomGroup",
+    trajChunkSize: int,
+    trajslice: slice,
+    useType="float64",
+):
+    """Iterates over a trajectory in chunks of frames
+
+        The frames are copied in two buffers that are allocated once: the
+        yielded arrays are views of the buffers and are overwritten by the
+        next chunk
+
+    Args:
+        mdaTrajectory (MDAnalysis.Universe or MDAnalysis.AtomGroup):
+            the container with the trajectory data
+        trajChunkSize (int):
+            the number of frames in each chunk
+        trajslice (slice):
+            the frames to read
+        useType (str,optional):
+            The precision of the buffers. Defaults to "float64".
+
+    Yields:
+        tuple[int,int,numpy.ndarray,numpy.ndarray]:
+            the first and the last frame of the chunk, the boxes and the
+            coordinates of the frames of the chunk
+    """
+    atoms = mdaTrajectory.atoms
+    universe = mdaTrajectory.universe
+    useType = numpy.dtype(useType)
+    boxes = numpy.empty((trajChunkSize, 6), dtype=useType)
+    atomicframes = numpy.empty((trajChunkSize, len(atoms), 3), dtype=useType)
+    # a selection must be gathered, the whole universe can be copied directly
+    isWholeUniverse = len(atoms) == len(universe.atoms) and numpy.all(
+        atoms.ix == numpy.arange(len(atoms))
+    )
     frameNum = 0
     first = 0
-    boxes = []
-    atomicframes = []
-    for _ in universe.trajectory[trajslice]:
-        boxes.append(universe.dimensions.copy())
-        atomicframes.append(atoms.positions)
+    for ts in universe.trajectory[trajslice]:
+        index = frameNum - first
+        boxes[index] = ts.dimensions
+        if isWholeUniverse:
+            atomicframes[index] = ts.positions
+        else:
+            atomicframes[index] = ts.positions[atoms.ix]
         frameNum += 1
-        if frameNum % trajChunkSize == 0:
-            exportChunk2HDF5(trajFolder, first, frameNum, boxes, atomicframes)
-
+        if frameNum - first == trajChunkSize:
+            yield first, frameNum, boxes, atomicframes
             first = frameNum
-            boxes = []
-            atomicframes = []
 
     # in the case that there are some dangling frames
     if frameNum != first:
-        exportChunk2HDF5(trajFolder, first, frameNum, boxes, atomicframes)
+        yield first, frameNum, boxes[: frameNum - first], atomicframes[
+            : frameNum - first
+        ]
+
+
+def universe2HDF5(
+    mdaTrajectory: "mdaUniverse | mdaAtomGroup",
+    trajFolder: h5py.Group,
+    trajChunkSize: "int|None" = None,
+    trajslice: slice = slice(None),
+    useType="float64",
+    quantization: "float|None" = None,
+):
+    """Uploads an mda.Universe or an mda.AtomGroup to a h5py.Group in an hdf5 file
+
+        The datasets are resized once to the lenght of the trajectory, if the
+        reader knows it, otherwise they grow geometrically and are trimmed at
+        the end. The reading and the writing of each chunk are sent to the
+        instrumentation, see :mod:`SOAPify.instrumentation`
+
+    Args:
+        MDAUniverseOrSelection (MDAnalysis.Universe or MDAnalysis.AtomGroup):
+            the container with the trajectory data
+        trajFolder (h5py.Group):
+            the group in which store the trajectory in the hdf5 file
+        trajChunkSize (int|None, optional):
+            The desired dimension of the chunks of data that are stored in the
+            hdf5 file, if None is planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
+        trajslice (slice, optional):
+            the frames to export. Defaults to slice(None).
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+        quantization (float|None, optional):
+            if given, the coordinates are stored as integers with this precision
+            (for example 0.001 Å) with the difference between consecutive frames,
+            see :class:`SOAPify.HDF5er.QuantizedTrajectory`; the readers of
+            SOAPify.HDF5er decode them transparently. Defaults to None.
+    """
+
+    nframes = _trajectoryLenght(mdaTrajectory, trajslice)
+    trajChunkSize = _trajectoryChunkSize(
+        trajChunkSize, len(mdaTrajectory.atoms), useType, nframes
+    )
+    _prepareTrajectoryGroup(
+        trajFolder, mdaTrajectory.atoms.types, trajChunkSize, useType, quantization
+    )
+    if nframes is not None:
+        trimTrajectoryGroup(trajFolder, nframes)
+    frameNum = 0
+    chunks = _trajectoryChunks(mdaTrajectory, trajChunkSize, trajslice, useType)
+    while True:
+        tStart = time.perf_counter()
+        chunk = next(chunks, None)
+        if chunk is None:
+            break
+        first, frameNum, boxes, atomicframes = chunk
+        emitRecord(
+            "hdf5er",
+            "read",
+            first,
+            frameNum,
+            time.perf_counter() - tStart,
+            boxes.nbytes + atomicframes.nbytes,
+            group=trajFolder.name,
+        )
+        exportChunk2HDF5(
+            trajFolder, first, frameNum, boxes, atomicframes, growGeometrically=True
+        )
+    trimTrajectoryGroup(trajFolder, frameNum)
 
 
 def MDA2HDF5(
     mdaTrajectory: "mdaUniverse | mdaAtomGroup",
     targetHDF5File: str,
     groupName: str,
-    trajChunkSize: int = 100,
+    trajChunkSize: "int|None" = None,
     override: bool = False,
     attrs: dict = None,
     trajslice: slice = slice(None),
     useType="float64",
+    quantization: "float|None" = None,
 ):
     """Creates an HDF5 trajectory groupfrom an mda trajectory
 
@@ -104,14 +285,18 @@ def MDA2HDF5(
         groupName (str):
             the name of the group in wich save the trajectory data within the
             `targetHDF5File`
-        trajChunkSize (int, optional):
+        trajChunkSize (int|None, optional):
             The desired dimension of the chunks of data that are stored in the
-            hdf5 file. Defaults to 100.
+            hdf5 file, if None is planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
         override (bool, optional):
             If true the hdf5 file will be completely overwritten.
             Defaults to False.
         useType (str,optional):
             The precision used to store the data. Defaults to "float64".
+        quantization (float|None, optional):
+            the precision of the stored coordinates, see :func:`universe2HDF5`.
+            Defaults to None.
     """
     with h5py.File(targetHDF5File, "w" if override else "a") as newTraj:
         trajGroup = newTraj.require_group(f"Trajectories/{groupName}")
@@ -121,13 +306,269 @@ def MDA2HDF5(
             trajChunkSize=trajChunkSize,
             trajslice=trajslice,
             useType=useType,
+            quantization=quantization,
         )
         if attrs:
             for key in attrs.keys():
                 trajGroup.attrs.create(key, attrs[key])
 
 
-@deprecated('xyz2hdf5Converter is "legacy code" **not covered by unit tests**')
+def _setAtomTypes(universe: mdaUniverse, atomTypes: "list[str]"):
+    """Sets the types of the atoms of a universe repeating the given list
+
+    Args:
+        universe (MDAnalysis.Universe): the universe
+        atomTypes (list[str]): the list of the types to repeat
+
+    Raises:
+        ValueError: if the number of atoms is not a multiple of the number of types
+    """
+    ntypes = len(atomTypes)
+    if len(universe.atoms) % ntypes != 0:
+        raise ValueError(
+            f"The number of atom types is not compatible with the number"
+            f" of atoms:{len(universe.atoms)} % {ntypes} = {len(universe.atoms) % ntypes}"
+        )
+    universe.atoms.types = list(atomTypes) * (len(universe.atoms) // ntypes)
+
+
+#: seconds between the checks of the workers of :func:`multipleMDA2HDF5` while
+#: waiting on the queue
+_POLLINTERVAL = 0.5
+
+
+def _putUnlessCancelled(queue, cancel, message) -> bool:
+    """puts `message` in the bounded `queue`, unless `cancel` is set
+
+    Returns:
+        bool: False if the message has not been sent because of `cancel`
+    """
+    while not cancel.is_set():
+        try:
+            queue.put(message, timeout=_POLLINTERVAL)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _readTrajectoryWorker(
+    queue,
+    cancel,
+    groupName: str,
+    files: "list[str]",
+    universeOptions: dict,
+    atomTypes: "list[str]|None",
+    trajChunkSize: int,
+    trajslice: slice,
+    useType: str,
+):
+    """Reads a simulation and sends it in chunks to the process writing the file
+
+        this is an helper function for :func:`multipleMDA2HDF5`, the messages
+        are tuples that start with the kind of message and the name of the group:
+        ("start", groupName, (types, nframes, trajChunkSize)), ("chunk",
+        groupName, (first, last, boxes, coordinates)), ("end", groupName, None)
+        or ("error", groupName, exception). The worker stops as soon as
+        `cancel` is set
+
+    Args:
+        queue (multiprocessing.Queue): the queue where to put the messages
+        cancel (multiprocessing.Event): set by the writer to stop the worker
+        groupName (str): the name of the trajectory group
+        files (list[str]): the topology and the trajectory files
+        universeOptions (dict): the options to pass to the MDA universe
+        atomTypes (list[str]|None): the types of the atoms to set in the universe
+        trajChunkSize (int|None): the number of frames in each chunk, if
+            None is planned from the memory budget
+        trajslice (slice): the frames to read
+        useType (str): the precision used to store the data
+    """
+    try:
+        universe = mdaUniverse(*files, **universeOptions)
+        if atomTypes:
+            _setAtomTypes(universe, atomTypes)
+        nframes = _trajectoryLenght(universe, trajslice)
+        trajChunkSize = _trajectoryChunkSize(
+            trajChunkSize, len(universe.atoms), useType, nframes
+        )
+        if not _putUnlessCancelled(
+            queue,
+            cancel,
+            ("start", groupName, (universe.atoms.types, nframes, trajChunkSize)),
+        ):
+            return
+        for chunk in _trajectoryChunks(universe, trajChunkSize, trajslice, useType):
+            if not _putUnlessCancelled(queue, cancel, ("chunk", groupName, chunk)):
+                return
+        _putUnlessCancelled(queue, cancel, ("end", groupName, None))
+    except Exception as error:  # pylint: disable=broad-except
+        _putUnlessCancelled(queue, cancel, ("error", groupName, error))
+
+
+def _nextMessage(queue, futures: list) -> tuple:
+    """waits for the next message of the workers of :func:`multipleMDA2HDF5`
+
+    Raises:
+        Exception: the exception of a worker that ended without sending its
+            messages (a :class:`concurrent.futures.process.BrokenProcessPool`
+            if the process died)
+    """
+    while True:
+        try:
+            return queue.get(timeout=_POLLINTERVAL)
+        except Empty:
+            for future in futures:
+                if future.done() and future.exception() is not None:
+                    raise future.exception()
+
+
+def _cancelWorkers(queue, cancel, futures: list) -> None:
+    """stops the workers of :func:`multipleMDA2HDF5` and empties the queue"""
+    cancel.set()
+    for future in futures:
+        future.cancel()
+    while not all(future.done() for future in futures):
+        try:
+            queue.get(timeout=_POLLINTERVAL)
+        except Empty:
+            pass
+
+
+def multipleMDA2HDF5(
+    simulations: "dict[str, list[str]]",
+    targetHDF5File: str,
+    trajChunkSize: "int|None" = None,
+    override: bool = False,
+    attrs: dict = None,
+    trajslice: slice = slice(None),
+    useType="float64",
+    quantization: "float|None" = None,
+    universeOptions: dict = None,
+    atomTypes: "list[str]" = None,
+    n_jobs: int = -1,
+    executor: "Executor|None" = None,
+):
+    """Creates a trajectory group for each of the given simulations, in parallel
+
+        The simulations are read and decoded by MDAnalysis in worker processes,
+        that send the frames in chunks of `trajChunkSize` to this process, that
+        is the only one that writes in the hdf5 file.
+
+        **WARNING**: in the HDF5 file if a chosen group is already present it
+        will be overwritten by the new data
+
+    Args:
+        simulations (dict[str, list[str]]):
+            for each simulation the name of the group and the list of the files
+            to pass to the MDA universe: the topology and the trajectory file(s)
+        targetHDF5File (str):
+            the name of HDF5 file
+        trajChunkSize (int|None, optional):
+            The desired dimension of the chunks of data that are stored in the
+            hdf5 file, if None is planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
+        override (bool, optional):
+            If true the hdf5 file will be completely overwritten.
+            Defaults to False.
+        attrs (dict, optional):
+            the attributes to store in each trajectory group. Defaults to None.
+        trajslice (slice, optional):
+            the frames to read from each simulation. Defaults to slice(None).
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+        quantization (float|None, optional):
+            the precision of the stored coordinates, see :func:`universe2HDF5`.
+            Defaults to None.
+        universeOptions (dict, optional):
+            extra options to pass to the MDA universes. Defaults to None.
+        atomTypes (list[str], optional):
+            the list of the types of the atoms, repeated for all the atoms of
+            each simulation. Defaults to None.
+        n_jobs (int, optional):
+            the number of processes used if `executor` is None. If less than 1
+            uses all of the available cpus. Defaults to -1.
+        executor (concurrent.futures.Executor, optional):
+            the process executor that reads the simulations. Defaults to None.
+
+    Raises:
+        Exception: the first error raised while reading the simulations, after
+            that all the other simulations have been stored
+        concurrent.futures.process.BrokenProcessPool: if a worker died
+        Exception: the errors raised while writing, after stopping the workers
+    """
+    if n_jobs < 1:
+        n_jobs = os.cpu_count()
+    if universeOptions is None:
+        universeOptions = {}
+    errors = []
+    with Manager() as manager, h5py.File(
+        targetHDF5File, "w" if override else "a"
+    ) as newTraj:
+        # the bounded queue keeps a few chunks per worker in memory
+        queue = manager.Queue(maxsize=2 * n_jobs)
+        cancel = manager.Event()
+        workers = executor if executor is not None else ProcessPoolExecutor(n_jobs)
+        futures = []
+        try:
+            futures = [
+                workers.submit(
+                    _readTrajectoryWorker,
+                    queue,
+                    cancel,
+                    groupName,
+                    files,
+                    universeOptions,
+                    atomTypes,
+                    trajChunkSize,
+                    trajslice,
+                    useType,
+                )
+                for groupName, files in simulations.items()
+            ]
+            runningSimulations = len(futures)
+            storedFrames = {}
+            while runningSimulations > 0:
+                kind, groupName, data = _nextMessage(queue, futures)
+                if kind == "error":
+                    runningSimulations -= 1
+                    errors.append(data)
+                    continue
+                trajGroup = newTraj.require_group(f"Trajectories/{groupName}")
+                if kind == "start":
+                    types, nframes, chunkSize = data
+                    _prepareTrajectoryGroup(
+                        trajGroup, types, chunkSize, useType, quantization
+                    )
+                    if nframes is not None:
+                        trimTrajectoryGroup(trajGroup, nframes)
+                    storedFrames[groupName] = 0
+                elif kind == "chunk":
+                    exportChunk2HDF5(trajGroup, *data, growGeometrically=True)
+                    storedFrames[groupName] = data[1]
+                else:
+                    runningSimulations -= 1
+                    trimTrajectoryGroup(trajGroup, storedFrames[groupName])
+                    if attrs:
+                        for key in attrs.keys():
+                            trajGroup.attrs.create(key, attrs[key])
+            for future in futures:
+                future.result()
+        except BaseException:
+            # the workers may be blocked on the full queue
+            _cancelWorkers(queue, cancel, futures)
+            raise
+        finally:
+            if executor is None:
+                workers.shutdown()
+    if errors:
+        raise errors[0]
+
+
+@deprecated(
+    'xyz2hdf5Converter is "legacy code" **not covered by unit tests**,'
+    " use SOAPify.HDF5er.text2HDF5 or SOAPify.HDF5er.textTrajectory2HDF5"
+)
 def xyz2hdf5Converter(
     xyzName: str, boxfilename: str, group: h5py.Group
 ):  # pragma: no cover
@@ -1,5 +1,76 @@
-"""HDF5er is a submodule with a interface between mda and h5py to store trajectories"""
+"""HDF5er is a submodule with a interface between mda and h5py to store trajectories
 
-from .ToHDF5 import *
-from .HDF5To import *
-from .HDF5erUtils import isTrajectoryGroup
+The functions are imported from their submodules the first time they are used
+(see PEP 562), so that, for example, reading the SOAP datasets does not import
+MDAnalysis
+"""
+import importlib
+from typing import TYPE_CHECKING
+
+#: the submodule that defines each name exported by HDF5er
+_LAZYNAMES = {
+    # ToHDF5
+    "universe2HDF5": "ToHDF5",
+    "MDA2HDF5": "ToHDF5",
+    "multipleMDA2HDF5": "ToHDF5",
+    "xyz2hdf5Converter": "ToHDF5",
+    # HDF5To
+    "getXYZfromTrajGroup": "HDF5To",
+    "saveXYZfromTrajGroup": "HDF5To",
+    "saveXYZfromTrajGroupInParallel": "HDF5To",
+    "HDF52AseAtomsChunckedwithSymbols": "HDF5To",
+    "getXYZfromMDA": "HDF5To",
+    "createUniverseFromSlice": "HDF5To",
+    "TrajectoryGroupReader": "HDF5To",
+    # TextToHDF5
+    "getOffsetsCacheName": "TextToHDF5",
+    "getFrameOffsets": "TextToHDF5",
+    "mapTextTrajectoryBlocks": "TextToHDF5",
+    "readTextTrajectoryFrames": "TextToHDF5",
+    "getTextTrajectoryBoxes": "TextToHDF5",
+    "textTrajectory2HDF5": "TextToHDF5",
+    "text2HDF5": "TextToHDF5",
+    # HDF5erUtils
+    "isTrajectoryGroup": "HDF5erUtils",
+    "getAtomsSelection": "HDF5erUtils",
+    "getAtomsSelectionLength": "HDF5erUtils",
+    "getTrajectoryDataset": "HDF5erUtils",
+    "QuantizedTrajectory": "HDF5erUtils",
+    "exportChunk2HDF5": "HDF5erUtils",
+    "trimTrajectoryGroup": "HDF5erUtils",
+}
+
+_SUBMODULES = {"ToHDF5", "HDF5To", "TextToHDF5", "HDF5erUtils"}
+
+__all__ = list(_LAZYNAMES)
+
+
+def __getattr__(name: str):
+    if name in _LAZYNAMES:
+        module = importlib.import_module(f".{_LAZYNAMES[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | _SUBMODULES)
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .ToHDF5 import universe2HDF5, MDA2HDF5, multipleMDA2HDF5, xyz2hdf5Converter
+    from .HDF5To import *
+    from .TextToHDF5 import *
+    from .HDF5erUtils import (
+        isTrajectoryGroup,
+        getAtomsSelection,
+        getAtomsSelectionLength,
+        getTrajectoryDataset,
+        QuantizedTrajectory,
+        exportChunk2HDF5,
+        trimTrajectoryGroup,
+    )
@@ -2,15 +2,197 @@
 
 SOAPify contains submodules for a basic time analysis of a trajecory of classifications
 and for calculating the SOAP fingerprints using the soap engine from quippy or dscribe
+
+The submodules, and the functions exported by SOAPify, are imported the first
+time they are used (see PEP 562): `import SOAPify` does not import MDAnalysis,
+ase, scipy or the SOAP engines until they are needed
 """
+import importlib
+import warnings
+from typing import TYPE_CHECKING
 
+__version__ = "v0.1.1"
 
-from .classify import *
-from .distances import *
-from .saponify import *
-from .utils import *
-from .transitions import *
-from .engine import *
-from .analysis import *
+#: the submodule that defines each name exported by SOAPify
+_LAZYNAMES = {
+    # classify
+    "SOAPclassification": "classify",
+    "SOAPReferences": "classify",
+    "SOAPReferencesIndex": "classify",
+    "applyClassification": "classify",
+    "applyClassificationIndexed": "classify",
+    "createReferencesFromKMeans": "classify",
+    "createReferencesFromTrajectory": "classify",
+    "getDistanceBetween": "classify",
+    "getDistancesFromRef": "classify",
+    "getDistancesFromRefNormalized": "classify",
+    "getReferencesFromDataset": "classify",
+    "mergeReferences": "classify",
+    "saveReferences": "classify",
+    # distances
+    "SOAPdistance": "distances",
+    "SOAPdistanceNormalized": "distances",
+    "SOAPdistanceProjected": "distances",
+    "kernelSoap": "distances",
+    "simpleKernelSoap": "distances",
+    "simpleSOAPdistance": "distances",
+    # saponify
+    "saponifyFrames": "saponify",
+    "saponifyMultipleTrajectories": "saponify",
+    "saponifyTextTrajectory": "saponify",
+    "saponifyTrajectory": "saponify",
+    # utils
+    "fillAndNormalizeSOAPVectorFromdscribe": "utils",
+    "fillSOAPVectorFromdscribe": "utils",
+    "getAddressesQuippyLikeDscribe": "utils",
+    "getSOAPSettings": "utils",
+    "getSlicesFromAttrs": "utils",
+    "getdscribeSOAPMapping": "utils",
+    "getquippySOAPMapping": "utils",
+    "normalizeArray": "utils",
+    "orderByZ": "utils",
+    # transitions
+    "TRACK_CURSTATE": "transitions",
+    "TRACK_ENDSTATE": "transitions",
+    "TRACK_EVENTTIME": "transitions",
+    "TRACK_PREVSTATE": "transitions",
+    "HDF5StateTracker": "transitions",
+    "OnlineStateTracker": "transitions",
+    "StateTracker": "transitions",
+    "bootstrapTransitionMatrix": "transitions",
+    "calculateResidenceTimes": "transitions",
+    "calculateResidenceTimesFromClassification": "transitions",
+    "calculateTransitionMatrix": "transitions",
+    "getOnlineStateTrackerFromGroup": "transitions",
+    "getResidenceTimesFromStateTracker": "transitions",
+    "getStateTrackerFromGroup": "transitions",
+    "impliedTimescales": "transitions",
+    "normalizeMatrixByRow": "transitions",
+    "removeAtomIdentityFromEventTracker": "transitions",
+    "saveOnlineStateTracker": "transitions",
+    "saveStateTracker": "transitions",
+    "stationaryDistribution": "transitions",
+    "trackStates": "transitions",
+    "transitionMatrixBlocksFromSOAPClassification": "transitions",
+    "transitionMatrixFromSOAPClassification": "transitions",
+    "transitionMatrixFromSOAPClassificationNormalized": "transitions",
+    "transitionMatrixFromStateTracker": "transitions",
+    # engine
+    "HAVE_DSCRIBE": "engine",
+    "HAVE_QUIPPY": "engine",
+    "KNOWNSOAPENGINES": "engine",
+    "SOAPengineContainer": "engine",
+    "centerMaskCreator": "engine",
+    "dscribeSOAPengineContainer": "engine",
+    "getSoapEngine": "engine",
+    "quippySOAPengineContainer": "engine",
+    # analysis
+    "getTimeSOAPSimple": "analysis",
+    "listNeighboursAlongTrajectory": "analysis",
+    "neighbourChangeInTime": "analysis",
+    "timeSOAP": "analysis",
+    "timeSOAPsimple": "analysis",
+    # instrumentation
+    "addInstrumentationCallback": "instrumentation",
+    "emitRecord": "instrumentation",
+    "instrumentationCallback": "instrumentation",
+    "removeInstrumentationCallback": "instrumentation",
+    "timedStage": "instrumentation",
+    # chunking
+    "ChunkPlan": "chunking",
+    "getMemoryBudget": "chunking",
+    "parseMemorySize": "chunking",
+    "planChunks": "chunking",
+    "setMemoryBudget": "chunking",
+    # reduction
+    "SOAPProjection": "reduction",
+    "fitSOAPProjection": "reduction",
+    "getSOAPProjection": "reduction",
+    "isReducedSOAPDataset": "reduction",
+    "reduceSOAPDataset": "reduction",
+    # sharedmemory
+    "SharedSOAPBlock": "sharedmemory",
+    "SharedSOAPHandle": "sharedmemory",
+    "attachSharedSOAP": "sharedmemory",
+    # multianalysis
+    "AtomStatistics": "multianalysis",
+    "AtomStatisticsConsumer": "multianalysis",
+    "ClassificationConsumer": "multianalysis",
+    "ReferencesDistancesConsumer": "multianalysis",
+    "SOAPConsumer": "multianalysis",
+    "TimeSOAPConsumer": "multianalysis",
+    "multiAnalysisPass": "multianalysis",
+}
 
-__version__ = "v0.1.1"
+_SUBMODULES = {
+    "HDF5er",
+    "analysis",
+    "chunking",
+    "classify",
+    "cli",
+    "distances",
+    "engine",
+    "instrumentation",
+    "multianalysis",
+    "reduction",
+    "saponify",
+    "sharedmemory",
+    "transitions",
+    "utils",
+}
+
+#: the names that leaked from the star imports of the submodules, with the
+#: submodule and the attribute that define them (None for a submodule): they
+#: are still available, with a DeprecationWarning, but not in `__all__`, so
+#: that `from SOAPify import *` does not warn
+_DEPRECATEDNAMES = {
+    "HDF2ase": ("HDF5er", "HDF52AseAtomsChunckedwithSymbols"),
+    "isTrajectoryGroup": ("HDF5er", "isTrajectoryGroup"),
+    "tracker": ("transitions.tracker", None),
+}
+
+__all__ = list(_LAZYNAMES)
+
+
+def __getattr__(name: str):
+    if name in _LAZYNAMES:
+        module = importlib.import_module(f".{_LAZYNAMES[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _DEPRECATEDNAMES:
+        moduleName, attribute = _DEPRECATEDNAMES[name]
+        replacement = f"SOAPify.{moduleName}" + (f".{attribute}" if attribute else "")
+        warnings.warn(
+            f"SOAPify.{name} is deprecated, use {replacement}",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        value = importlib.import_module(f".{moduleName}", __name__)
+        if attribute is not None:
+            value = getattr(value, attribute)
+        # not cached: each access warns
+        return value
+    elif name in _SUBMODULES:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__) | set(_DEPRECATEDNAMES) | _SUBMODULES)
+
+
+if TYPE_CHECKING:  # pragma: no cover
+    from .classify import *
+    from .distances import *
+    from .saponify import *
+    from .utils import *
+    from .transitions import *
+    from .engine import *
+    from .analysis import *
+    from .instrumentation import *
+    from .chunking import *
+    from .sharedmemory import *
+    from .reduction import *
+    from .multianalysis import *
@@ -7,7 +7,15 @@ from MDAnalysis.lib.NeighborSearch import AtomNeighborSearch
 import h5py
 
 from .distances import simpleSOAPdistance
-from .utils import getSOAPSettings, normalizeArray, fillSOAPVectorFromdscribe
+from .utils import (
+    getSOAPSettings,
+    fillAndNormalizeSOAPVectorFromdscribe,
+    _filledSOAPLength,
+)
+from .HDF5er import getAtomsSelection, getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
+from .reduction import isReducedSOAPDataset
 
 
 def timeSOAP(
@@ -143,25 +151,39 @@ def timeSOAPsimple(
 
 
 def getTimeSOAPSimple(
-    soapDataset: h5py.Dataset,
+    soapDataset: "h5py.Dataset|numpy.ndarray",
     window: int = 1,
     stride: int = None,
     backward: bool = False,
+    atomsSelection: "None|slice|list[int]|numpy.ndarray" = None,
 ):
     """Shortcut to extract the timeSOAP from large datasets.
 
         This function is the equivalent to:
 
         - loading a chunk of the trajectory from a h5py.Dataset with a SOAP fingerprints trajectory
-        - filling the vector with :func:`SOAPify.utils.fillSOAPVectorFromdscribe`
-        - normalizing it with :func:`SOAPify.utils.normalizeArray`
+        - filling the vector and normalizing it in a reused buffer with
+          :func:`SOAPify.utils.fillAndNormalizeSOAPVectorFromdscribe`
         - calculating the timeSOAP with  :func:`timeSOAPsimple`
         and then returning timeSOAP and the derivative
 
+        The number of frames in each chunk is planned from the memory budget,
+        see :mod:`SOAPify.chunking`
+
+        If `soapDataset` is a numpy array (for example a view of a
+        :class:`SOAPify.sharedmemory.SharedSOAPBlock`) the fingerprints must be
+        already filled and normalized: the chunks are views of the array and
+        are not copied, unless the atoms are selected by index.
+
+        If `soapDataset` has been written by
+        :func:`SOAPify.reduction.reduceSOAPDataset` the fingerprints are used
+        as they are: the result is a lower bound of the timeSOAP, see
+        :meth:`SOAPify.reduction.SOAPProjection.distanceBounds`.
 
     Args:
-        soapDataset (h5py.Dataset):
-            the dataset with the SOAP fingerprints
+        soapDataset (h5py.Dataset|numpy.ndarray):
+            the dataset with the SOAP fingerprints, or the array with the
+            filled and normalized fingerprints
         window (int):
             the dimension of the windows between each state confrontations.
             See :func:`timeSOAPsimple`
@@ -173,31 +195,69 @@ def getTimeSOAPSimple(
         backward (bool):
             If true the soap distance is referred to the previous frame.
             See :func:`timeSOAPsimple` . Defaulst to True.
+        atomsSelection (None|slice|list[int]|numpy.ndarray):
+            the atoms to analyze, as indexes or as a boolean mask, see
+            :func:`SOAPify.HDF5er.getAtomsSelection`: only the fingerprints of
+            the selected atoms are read from the dataset.
+            Defaults to None (all the atoms).
 
     Returns:
         tuple[numpy.ndarray,numpy.ndarray]:
             - **timedSOAP** the timeSOAP values, shape(frames-1,natoms)
             - **deltaTimedSOAP** the derivatives of timeSOAP, shape(natoms, frames-2)
     """
-    fillSettings = getSOAPSettings(soapDataset)
-    timedSOAP = numpy.zeros((soapDataset.shape[0] - window, soapDataset.shape[1]))
+    isFilled = isinstance(soapDataset, numpy.ndarray) or isReducedSOAPDataset(
+        soapDataset
+    )
+    fillSettings = None if isFilled else getSOAPSettings(soapDataset)
+    atoms = getAtomsSelection(soapDataset.shape[1], atomsSelection)
+    nframes = soapDataset.shape[0]
+    nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+    timedSOAP = numpy.zeros((nframes - window, nat))
     # TODO: add a check to the window
+    chunks = getattr(soapDataset, "chunks", None)
+    chunkDim = planChunks(
+        nat,
+        soapDataset.shape[2] if isFilled else _filledSOAPLength(**fillSettings),
+        soapDataset.dtype,
+        nInputFeatures=soapDataset.shape[2],
+        nframes=nframes,
+        alignTo=chunks[0] if chunks is not None else None,
+    ).compute
+    # each chunk must contain more frames than the window
+    chunkDim = max(chunkDim, window + 1)
+    if not isFilled:
+        # the filled chunks are gathered and normalized in the same buffer
+        filledChunk = numpy.empty(
+            (min(chunkDim + 1, nframes), nat, _filledSOAPLength(**fillSettings)),
+            dtype=soapDataset.dtype,
+        )
 
     slide = 0
     # this looks a lot convoluted, but it is way faster than working one atom
     # at a time
-    for c in soapDataset.iter_chunks():
-        theSlice = slice(c[0].start - slide, c[0].stop, c[0].step)
-        outSlice = slice(c[0].start - slide, c[0].stop - 1, c[0].step)
-        timedSOAP[outSlice] = timeSOAPsimple(
-            normalizeArray(
-                fillSOAPVectorFromdscribe(soapDataset[theSlice], **fillSettings)
-            ),
-            window=window,
-            stride=stride,
-            backward=backward,
-            returnDiff=False,
-        )
+    for start in range(0, nframes, chunkDim):
+        stop = min(start + chunkDim, nframes)
+        theSlice = slice(start - slide, stop)
+        outSlice = slice(start - slide, stop - 1)
+        first, last = theSlice.start, stop
+        with timedStage("timeSOAP", "read", first, last) as stage:
+            frames = soapDataset[theSlice, atoms]
+            stage["bytes"] = frames.nbytes
+        if not isFilled:
+            with timedStage("timeSOAP", "fill", first, last) as stage:
+                frames = fillAndNormalizeSOAPVectorFromdscribe(
+                    frames, **fillSettings, out=filledChunk[: len(frames)]
+                )
+                stage["bytes"] = frames.nbytes
+        with timedStage("timeSOAP", "compute", first, last):
+            timedSOAP[outSlice] = timeSOAPsimple(
+                frames,
+                window=window,
+                stride=stride,
+                backward=backward,
+                returnDiff=False,
+            )
         slide = 1
 
     return timedSOAP, numpy.diff(timedSOAP.T, axis=-1)
@@ -0,0 +1,176 @@
+"""Submodule that plans the dimension of the chunks of frames from a memory budget
+
+The streaming routines of SOAPify (the SOAP calculations, the import and the
+export of the trajectories, the analyses of the SOAP datasets) work on chunks of
+frames: when the user does not impose the dimension of the chunks it is derived
+by :func:`planChunks` from the number of atoms, of features and of references,
+so that the arrays allocated for a chunk fit in the memory budget.
+
+The budget is 1 GiB by default, it can be changed with :func:`setMemoryBudget`
+or with the `SOAPIFY_MEMORY_BUDGET` environment variable (for example "4GiB").
+"""
+import os
+import re
+from dataclasses import dataclass
+import numpy
+
+__all__ = [
+    "ChunkPlan",
+    "parseMemorySize",
+    "setMemoryBudget",
+    "getMemoryBudget",
+    "planChunks",
+]
+
+#: the maximum dimension of the chunks in the hdf5 datasets
+MAXWRITECHUNKBYTES = 2**20
+
+_UNITS = {
+    "": 1,
+    "b": 1,
+    "kb": 10**3,
+    "mb": 10**6,
+    "gb": 10**9,
+    "tb": 10**12,
+    "kib": 2**10,
+    "mib": 2**20,
+    "gib": 2**30,
+    "tib": 2**40,
+}
+
+
+def parseMemorySize(size: "int|str") -> int:
+    """Converts a memory size like "512MB" or "4GiB" in bytes
+
+    Args:
+        size (int|str): the size, in bytes if it is a number
+
+    Raises:
+        ValueError: if the size cannot be parsed
+
+    Returns:
+        int: the size in bytes
+    """
+    if isinstance(size, (int, numpy.integer)):
+        return int(size)
+    match = re.fullmatch(r"\s*([0-9.]+)\s*([a-zA-Z]*)\s*", str(size))
+    if match is None or match.group(2).lower() not in _UNITS:
+        raise ValueError(f'"{size}" is not a valid memory size, use "512MB" or "4GiB"')
+    return int(float(match.group(1)) * _UNITS[match.group(2).lower()])
+
+
+_MEMORYBUDGET = parseMemorySize(os.environ.get("SOAPIFY_MEMORY_BUDGET", 2**30))
+
+
+def setMemoryBudget(budget: "int|str") -> None:
+    """Sets the default memory budget of the streaming routines
+
+    Args:
+        budget (int|str): the budget, in bytes or as "512MB", "4GiB"...
+    """
+    global _MEMORYBUDGET  # pylint: disable=global-statement
+    budget = parseMemorySize(budget)
+    if budget <= 0:
+        raise ValueError("the memory budget must be positive")
+    _MEMORYBUDGET = budget
+
+
+def getMemoryBudget() -> int:
+    """Returns the default memory budget of the streaming routines, in bytes"""
+    return _MEMORYBUDGET
+
+
+@dataclass
+class ChunkPlan:
+    """The number of frames in the chunks of a streaming routine"""
+
+    read: int  #: the frames read at once from the input
+    compute: int  #: the frames processed at once
+    write: int  #: the frames in each chunk of the output hdf5 dataset
+
+
+def planChunks(
+    nat: int,
+    nfeatures: int = 0,
+    dtype="float64",
+    nreferences: int = 0,
+    nInputFeatures: "int|None" = None,
+    nframes: "int|None" = None,
+    extraBytesPerFrame: int = 0,
+    alignTo: "int|None" = None,
+    memoryBudget: "int|str|None" = None,
+) -> ChunkPlan:
+    """Derives the dimension of the chunks of frames from the memory budget
+
+    For each frame the routines read the input (the coordinates of the atoms
+    and the box, or `nInputFeatures` stored SOAP features per atom), work on
+    `nfeatures` SOAP features per atom in double precision (the calculated or
+    the filled and normalized fingerprints) and produce `nreferences` distances
+    per atom, or `nfeatures` features per atom stored with `dtype`.
+
+    - **read**: the frames whose input fits in the budget
+    - **compute**: the frames whose input, working arrays and output fit in
+      the budget; it is a multiple of **write**, when possible
+    - **write**: the frames in a chunk of the output dataset, at most
+      :data:`MAXWRITECHUNKBYTES` and not more than **compute**
+
+    All of them are at least 1 and at most `nframes`, if given. If `alignTo`
+    is given (usually the chunks of the input dataset) **read** and
+    **compute** are rounded down to a multiple of it, when they are bigger.
+
+    Args:
+        nat (int): the number of atoms
+        nfeatures (int, optional):
+            the number of features per atom worked on. Defaults to 0.
+        dtype (str|numpy.dtype, optional):
+            the type of the input and of the output. Defaults to "float64".
+        nreferences (int, optional):
+            the number of references the atoms are compared to. Defaults to 0.
+        nInputFeatures (int|None, optional):
+            the number of features per atom read from the input, if None the
+            input are the coordinates. Defaults to None.
+        nframes (int|None, optional):
+            the number of frames to process, if known. Defaults to None.
+        extraBytesPerFrame (int, optional):
+            other memory needed for each frame. Defaults to 0.
+        alignTo (int|None, optional):
+            the frames in the chunks of the input. Defaults to None.
+        memoryBudget (int|str|None, optional):
+            the budget, if None uses :func:`getMemoryBudget`. Defaults to None.
+
+    Returns:
+        ChunkPlan: the number of frames in each chunk
+    """
+    budget = (
+        getMemoryBudget() if memoryBudget is None else parseMemorySize(memoryBudget)
+    )
+    itemsize = numpy.dtype(dtype).itemsize
+    doubleSize = numpy.dtype(numpy.float64).itemsize
+    if nInputFeatures is None:
+        inputBytes = (nat * 3 + 6) * itemsize
+    else:
+        inputBytes = nat * nInputFeatures * itemsize
+    # the features and the temporary array of the normalization/casting
+    workingBytes = 2 * nat * nfeatures * doubleSize + extraBytesPerFrame
+    if nreferences > 0:
+        outputBytes = nat * nreferences * doubleSize
+    elif nfeatures > 0:
+        outputBytes = nat * nfeatures * itemsize
+    else:
+        outputBytes = inputBytes
+
+    def limit(frames: int) -> int:
+        frames = max(1, frames)
+        return frames if nframes is None else max(1, min(frames, nframes))
+
+    read = limit(budget // inputBytes)
+    compute = limit(budget // (inputBytes + workingBytes + outputBytes))
+    write = min(compute, limit(MAXWRITECHUNKBYTES // outputBytes))
+    if compute > write:
+        compute -= compute % write
+    if alignTo is not None and alignTo > 0:
+        if read > alignTo:
+            read -= read % alignTo
+        if compute > alignTo:
+            compute -= compute % alignTo
+    return ChunkPlan(read=read, compute=compute, write=write)
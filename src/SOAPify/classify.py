@@ -3,15 +3,23 @@
     Contains the definition of the container for the :class:`SOAPclassification`
     and for the references container :class:`SOAPReferences`.
     Along with the definition of function to apply a classification to a given 
-    dataset.
+    dataset, also with a search index over many references
+    (:class:`SOAPReferencesIndex`), and of the function to find the references
+    with a k-means of a dataset (:func:`createReferencesFromKMeans`).
 """
 from typing import Callable
 from dataclasses import dataclass
+from itertools import chain
 import numpy as np
+from scipy.spatial import cKDTree
 import h5py
 
 from .distances import SOAPdistanceNormalized
-from .utils import fillSOAPVectorFromdscribe, normalizeArray
+from .utils import fillSOAPVectorFromdscribe, normalizeArray, getSOAPSettings
+from .utils import _filledSOAPChunks
+from .HDF5er import getAtomsSelection, getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
 
 
 @dataclass
@@ -89,10 +97,143 @@ def createReferencesFromTrajectory(
     if SOAPexpectedDim != SOAPDim:
         SOAPSpectra = fillSOAPVectorFromdscribe(SOAPSpectra, lmax, nmax)
     if doNormalize:
-        SOAPSpectra = normalizeArray(SOAPSpectra)
+        SOAPSpectra = normalizeArray(SOAPSpectra, out=SOAPSpectra)
     return SOAPReferences(names, SOAPSpectra, lmax, nmax)
 
 
+def _kMeansPlusPlus(
+    sample: np.ndarray, nReferences: int, rng: np.random.Generator
+) -> np.ndarray:
+    """chooses the initial centroids between the normalized `sample` with k-means++"""
+    centroids = np.empty((nReferences, sample.shape[-1]))
+    centroids[0] = sample[rng.integers(len(sample))]
+    # the squared euclidean distance between normalized vectors is 2-2cos
+    closest = np.maximum(2.0 - 2.0 * sample @ centroids[0], 0.0)
+    for i in range(1, nReferences):
+        total = closest.sum()
+        if total > 0:
+            chosen = rng.choice(len(sample), p=closest / total)
+        else:
+            chosen = rng.integers(len(sample))
+        centroids[i] = sample[chosen]
+        closest = np.minimum(
+            closest, np.maximum(2.0 - 2.0 * sample @ centroids[i], 0.0)
+        )
+    return centroids
+
+
+def createReferencesFromKMeans(
+    h5SOAPDataSet: h5py.Dataset,
+    nReferences: int,
+    batchSize: int = 1024,
+    nEpochs: int = 3,
+    nInitSamples: int = 10000,
+    seed: "int|None" = None,
+    atomsSelection: "None|slice|list[int]|np.ndarray" = None,
+    names: "list[str]|None" = None,
+) -> SOAPReferences:
+    """Finds the references with a mini-batch spherical k-means of a SOAP dataset
+
+        The dataset is streamed in chunks of frames planned from the memory
+        budget, filled and normalized: the atoms of each chunk are shuffled in
+        mini-batches and each mini-batch moves the centroids closest to its
+        fingerprints (with the SOAP distance, that is the cosine similarity),
+        with a learning rate that decreases with the number of fingerprints
+        already assigned to the centroid (Sculley, 2010). The centroids are
+        normalized after each update.
+
+        The initial centroids are chosen with k-means++ between about
+        `nInitSamples` fingerprints sampled uniformly from the dataset.
+
+        The returned references have the filled and normalized spectra, and
+        can be saved with :func:`saveReferences` and used in
+        :func:`applyClassification`.
+
+    Args:
+        h5SOAPDataSet (h5py.Dataset):
+            the dataset with the SOAP fingerprints
+        nReferences (int):
+            the number of references (the k of the k-means)
+        batchSize (int, optional):
+            the number of fingerprints in each mini-batch. Defaults to 1024.
+        nEpochs (int, optional):
+            the number of passes over the dataset. Defaults to 3.
+        nInitSamples (int, optional):
+            the number of fingerprints sampled for the k-means++
+            initialization. Defaults to 10000.
+        seed (int|None, optional):
+            the seed of the random choices. Defaults to None.
+        atomsSelection (None|slice|list[int]|np.ndarray, optional):
+            the atoms to use, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
+        names (list[str]|None, optional):
+            the names of the references. Defaults to None ("kmeans0",
+            "kmeans1", ...).
+
+    Raises:
+        ValueError: if there are less fingerprints than references
+        ValueError: if the number of names is not `nReferences`
+
+    Returns:
+        SOAPReferences: the references, ordered by the number of assigned
+        fingerprints in the last epoch
+    """
+    atoms = getAtomsSelection(h5SOAPDataSet.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(h5SOAPDataSet.shape[1], atoms)
+    if h5SOAPDataSet.shape[0] * nat < nReferences:
+        raise ValueError("there are less fingerprints than references")
+    if names is None:
+        names = [f"kmeans{i}" for i in range(nReferences)]
+    if len(names) != nReferences:
+        raise ValueError("there must be a name for each reference")
+    rng = np.random.default_rng(seed)
+    settings = getSOAPSettings(h5SOAPDataSet)
+
+    fraction = min(1.0, nInitSamples / (h5SOAPDataSet.shape[0] * nat))
+    samples = []
+    for _, _, frames in _filledSOAPChunks(h5SOAPDataSet, atoms, stageName="kmeans"):
+        rows = frames.reshape(-1, frames.shape[-1])
+        samples.append(rows[rng.random(len(rows)) < fraction].astype(np.float64))
+    sample = np.concatenate(samples)
+    if len(sample) < nReferences:
+        # the sampling may have been unlucky, the first chunk is enough
+        sample = next(_filledSOAPChunks(h5SOAPDataSet, atoms))[2]
+        sample = sample.reshape(-1, sample.shape[-1]).astype(np.float64)
+    centroids = _kMeansPlusPlus(sample, nReferences, rng)
+    del samples, sample
+
+    assigned = np.zeros(nReferences)
+    for _ in range(nEpochs):
+        lastEpoch = np.zeros(nReferences)
+        for start, stop, frames in _filledSOAPChunks(
+            h5SOAPDataSet, atoms, nOutputsPerAtom=1, stageName="kmeans"
+        ):
+            with timedStage("kmeans", "compute", start, stop):
+                rows = frames.reshape(-1, frames.shape[-1])
+                order = rng.permutation(len(rows))
+                for first in range(0, len(rows), batchSize):
+                    batch = rows[np.sort(order[first : first + batchSize])]
+                    closest = np.argmax(batch @ centroids.T, axis=-1)
+                    membership = closest == np.arange(nReferences)[:, np.newaxis]
+                    counts = membership.sum(axis=-1)
+                    sums = membership @ batch
+                    moved = counts > 0
+                    assigned[moved] += counts[moved]
+                    lastEpoch += counts
+                    # the per-centroid learning rate is counts/assigned
+                    centroids[moved] += (
+                        sums[moved] - counts[moved, np.newaxis] * centroids[moved]
+                    ) / assigned[moved, np.newaxis]
+                    centroids[moved] = normalizeArray(centroids[moved])
+    order = np.argsort(-lastEpoch, kind="stable") if nEpochs > 0 else slice(None)
+    return SOAPReferences(
+        names=list(names),
+        spectra=centroids[order],
+        lmax=settings["lMax"],
+        nmax=settings["nMax"],
+    )
+
+
 def getDistanceBetween(
     data: np.ndarray, spectra: np.ndarray, distanceCalculator: Callable
 ) -> np.ndarray:
@@ -117,51 +258,129 @@ def getDistanceBetween(
     return toret
 
 
+def _filledChunks(
+    SOAPTrajData: "h5py.Dataset|np.ndarray",
+    references: SOAPReferences,
+    doNormalize: bool,
+    atoms: "slice|np.ndarray",
+    nOutputsPerAtom: int,
+    stageName: str,
+):
+    """Yields the chunks of a SOAP trajectory, filled like the given references
+
+        The number of frames in the chunks is planned from the memory budget
+        and the filled chunks are gathered (and normalized) in the same buffer
+
+    Args:
+        SOAPTrajData (h5py.Dataset|np.ndarray):
+            the dataset (or the array) containing the SOAP trajectory
+        references (SOAPReferences): the contatiner of the references
+        doNormalize (bool): if True the fingerprints are normalized
+        atoms (slice|np.ndarray): the atoms to read, see :func:`getAtomsSelection`
+        nOutputsPerAtom (int): the number of results calculated for each atom
+        stageName (str): the name of the stage in the instrumentation records
+
+    Yields:
+        tuple[int,int,np.ndarray]: the first and the last frame of the chunk and
+        the fingerprints, with shape (frames, atoms, features)
+    """
+    nat = getAtomsSelectionLength(SOAPTrajData.shape[1], atoms)
+    # assuming shape is (nframes, natoms, nsoap)
+    chunks = getattr(SOAPTrajData, "chunks", None)
+    chunkDims = planChunks(
+        nat,
+        references.spectra.shape[-1],
+        SOAPTrajData.dtype,
+        nreferences=nOutputsPerAtom,
+        nInputFeatures=SOAPTrajData.shape[-1],
+        nframes=SOAPTrajData.shape[0],
+        alignTo=chunks[0] if chunks is not None else None,
+    ).compute
+    doconversion = SOAPTrajData.shape[-1] != references.spectra.shape[-1]
+    filledChunk = None
+    if doconversion:
+        filledChunk = np.empty(
+            (min(chunkDims, SOAPTrajData.shape[0]), nat, references.spectra.shape[-1]),
+            dtype=SOAPTrajData.dtype,
+        )
+    for currentFrame in range(0, SOAPTrajData.shape[0], chunkDims):
+        upperFrame = min(SOAPTrajData.shape[0], currentFrame + chunkDims)
+        with timedStage(stageName, "read", currentFrame, upperFrame) as stage:
+            frames = SOAPTrajData[currentFrame:upperFrame, atoms]
+            stage["bytes"] = frames.nbytes
+        if doconversion or doNormalize:
+            with timedStage(stageName, "fill", currentFrame, upperFrame) as stage:
+                if doconversion:
+                    frames = fillSOAPVectorFromdscribe(
+                        frames,
+                        references.lmax,
+                        references.nmax,
+                        out=filledChunk[: len(frames)],
+                    )
+                if doNormalize:
+                    # the views of an array given by the user are not modified
+                    frames = normalizeArray(
+                        frames,
+                        out=frames if frames.flags.owndata or doconversion else None,
+                    )
+                stage["bytes"] = frames.nbytes
+        yield currentFrame, upperFrame, frames
+
+
 def getDistancesFromRef(
-    SOAPTrajData: h5py.Dataset,
+    SOAPTrajData: "h5py.Dataset|np.ndarray",
     references: SOAPReferences,
     distanceCalculator: Callable,
     doNormalize: bool = False,
+    atomsSelection: "None|slice|list[int]|np.ndarray" = None,
 ) -> np.ndarray:
     """generates the distances between a SOAP-hdf5 trajectory and the given references
 
+        The trajectory is read in chunks of frames planned from the memory
+        budget, see :mod:`SOAPify.chunking`
+
+        `SOAPTrajData` can also be a numpy array, like the read-only views of a
+        :class:`SOAPify.sharedmemory.SharedSOAPBlock`: the chunks are views of
+        the array and, if the fingerprints are already filled and `doNormalize`
+        is False, they are not copied (unless the atoms are selected by index).
+
     Args:
-        SOAPTrajData (h5py.Dataset): the dataset containing the SOAP trajectory
+        SOAPTrajData (h5py.Dataset|np.ndarray):
+            the dataset (or the array) containing the SOAP trajectory
         references (SOAPReferences): the contatiner of the references
         distanceCalculator (Callable): the function to calculate the distances
         doNormalize (bool, optional):
             informs the function if the given data needs to be normalized before
             caclulating the distance. Defaults to False.
+        atomsSelection (None|slice|list[int]|np.ndarray, optional):
+            the atoms to analyze, as indexes or as a boolean mask, see
+            :func:`SOAPify.HDF5er.getAtomsSelection`: only the fingerprints of
+            the selected atoms are read from the dataset.
+            Defaults to None (all the atoms).
 
     Returns:
         np.ndarray: the "trajectory" of distance from the given references
     """
 
-    chunkDims = min(100, SOAPTrajData.chunks[0])
-    # assuming shape is (nframes, natoms, nsoap)
-    currentFrame = 0
-    doconversion = SOAPTrajData.shape[-1] != references.spectra.shape[-1]
-    distanceFromReference = np.zeros(
-        (SOAPTrajData.shape[0], SOAPTrajData.shape[1], len(references))
-    )
-    while SOAPTrajData.shape[0] > currentFrame:
-        upperFrame = min(SOAPTrajData.shape[0], currentFrame + chunkDims)
-        frames = SOAPTrajData[currentFrame:upperFrame]
-        if doconversion:
-            frames = fillSOAPVectorFromdscribe(frames, references.lmax, references.nmax)
-        if doNormalize:
-            frames = normalizeArray(frames)
-        for i, frame in enumerate(frames):
-            distanceFromReference[currentFrame + i] = getDistanceBetween(
-                frame, references.spectra, distanceCalculator
-            )
-        currentFrame += chunkDims
+    atoms = getAtomsSelection(SOAPTrajData.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(SOAPTrajData.shape[1], atoms)
+    distanceFromReference = np.zeros((SOAPTrajData.shape[0], nat, len(references)))
+    for currentFrame, upperFrame, frames in _filledChunks(
+        SOAPTrajData, references, doNormalize, atoms, len(references), "distances"
+    ):
+        with timedStage("distances", "compute", currentFrame, upperFrame):
+            for i, frame in enumerate(frames):
+                distanceFromReference[currentFrame + i] = getDistanceBetween(
+                    frame, references.spectra, distanceCalculator
+                )
 
     return distanceFromReference
 
 
 def getDistancesFromRefNormalized(
-    SOAPTrajData: h5py.Dataset, references: SOAPReferences
+    SOAPTrajData: "h5py.Dataset|np.ndarray",
+    references: SOAPReferences,
+    atomsSelection: "None|slice|list[int]|np.ndarray" = None,
 ):
     """shortcut for :func:`SOAPify.classify.getDistancesFromRef` forcing normalization
 
@@ -170,15 +389,21 @@ def getDistancesFromRefNormalized(
         doNormalize is set to True
 
     Args:
-        SOAPTrajData (h5py.Dataset):
-            the dataset containing the SOAP trajectory
+        SOAPTrajData (h5py.Dataset|np.ndarray):
+            the dataset (or the array) containing the SOAP trajectory
         references (SOAPReferences):
             the contatiner of the references
+        atomsSelection (None|slice|list[int]|np.ndarray, optional):
+            the atoms to analyze. Defaults to None (all the atoms).
     Returns:
         np.ndarray: the trajectory of distance from the given references
     """
     return getDistancesFromRef(
-        SOAPTrajData, references, SOAPdistanceNormalized, doNormalize=True
+        SOAPTrajData,
+        references,
+        SOAPdistanceNormalized,
+        doNormalize=True,
+        atomsSelection=atomsSelection,
     )
 
 
@@ -274,3 +499,161 @@ def applyClassification(
     minimumDistID = np.argmin(info, axis=-1)
     minimumDist = np.amin(info, axis=-1)
     return SOAPclassification(minimumDist, minimumDistID, references.names)
+
+
+#: the number of references compared exactly to bound the search in the index
+_INDEXCANDIDATES = 8
+
+
+class SOAPReferencesIndex:
+    """A search index over the spectra of a :class:`SOAPReferences`
+
+    Finds the reference closest to each fingerprint without calculating the
+    distances from all the references: the normalized spectra are stored in a
+    :class:`scipy.spatial.cKDTree`, so the cost per atom grows sublinearly with
+    the number of references.
+
+    The distance is the one of :func:`SOAPdistanceNormalized`: for normalized
+    spectra the closest reference is the closest one in euclidean distance.
+
+    With `nComponents` the tree is built on the first principal components of
+    the references, as the KD-trees are efficient only in few dimensions: the
+    projection does not increase the distances, so all the references that are
+    nearer, in the projected space, than the closest candidate are compared
+    with the full spectra and the result is exact.
+    """
+
+    def __init__(
+        self, references: SOAPReferences, nComponents: "int|None" = 32
+    ) -> None:
+        """Builds the index
+
+        Args:
+            references (SOAPReferences): the references
+            nComponents (int|None, optional):
+                the number of principal components used to build the tree, if
+                None the tree is built with the full spectra. Defaults to 32.
+        """
+        self.references = references
+        self._spectra = normalizeArray(references.spectra)
+        self._mean = None
+        self._components = None
+        if nComponents is not None and nComponents < self._spectra.shape[-1]:
+            self._mean = self._spectra.mean(axis=0)
+            _, _, components = np.linalg.svd(
+                self._spectra - self._mean, full_matrices=False
+            )
+            self._components = components[:nComponents]
+        self._tree = cKDTree(self._project(self._spectra))
+
+    def _project(self, data: np.ndarray) -> np.ndarray:
+        if self._components is None:
+            return data
+        return (data - self._mean) @ self._components.T
+
+    def _refine(self, data: np.ndarray, projected: np.ndarray) -> np.ndarray:
+        """returns the exact closest reference given the projected fingerprints"""
+        # the best of a few candidates gives a tighter radius for the search
+        _, candidates = self._tree.query(
+            projected, k=min(_INDEXCANDIDATES, len(self._spectra))
+        )
+        candidates = candidates.reshape(len(data), -1)
+        radii = np.full(len(data), np.inf)
+        for column in candidates.T:
+            radii = np.minimum(
+                radii, np.linalg.norm(data - self._spectra[column], axis=-1)
+            )
+        # the tolerance keeps the candidate in its own ball
+        neighbours = self._tree.query_ball_point(
+            projected, radii * (1.0 + 1e-9) + 1e-12, return_sorted=False
+        )
+        lengths = np.fromiter(map(len, neighbours), dtype=int, count=len(neighbours))
+        refIDs = np.fromiter(
+            chain.from_iterable(neighbours), dtype=int, count=lengths.sum()
+        )
+        pointIDs = np.repeat(np.arange(len(data)), lengths)
+        # for normalized references the closest has the biggest dot product
+        dots = np.empty(len(refIDs))
+        step = max(1, 2**22 // data.shape[-1])
+        for start in range(0, len(refIDs), step):
+            block = slice(start, start + step)
+            dots[block] = np.einsum(
+                "ij,ij->i", data[pointIDs[block]], self._spectra[refIDs[block]]
+            )
+        # on ties the reference with the lowest index wins, like in np.argmin
+        order = np.lexsort((refIDs, -dots, pointIDs))
+        firsts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+        return refIDs[order[firsts]]
+
+    def query(self, data: np.ndarray) -> "tuple[np.ndarray, np.ndarray]":
+        """Finds the closest reference of each fingerprint
+
+        Args:
+            data (np.ndarray):
+                the filled fingerprints, with shape (..., nfeatures)
+
+        Returns:
+            tuple[np.ndarray,np.ndarray]:
+                - **distances** the distance from the closest reference
+                - **references** the index of the closest reference
+                both with shape `data.shape[:-1]`
+        """
+        flat = data.reshape(-1, data.shape[-1])
+        if len(flat) == 0:
+            ids = np.zeros(0, dtype=int)
+        elif self._components is None:
+            _, ids = self._tree.query(flat)
+        else:
+            ids = self._refine(flat, self._project(flat))
+        dots = np.einsum("ij,ij->i", flat, self._spectra[ids])
+        distances = np.sqrt(np.abs(2.0 - 2.0 * dots))
+        return distances.reshape(data.shape[:-1]), ids.reshape(data.shape[:-1])
+
+
+def applyClassificationIndexed(
+    SOAPTrajData: "h5py.Dataset|np.ndarray",
+    references: "SOAPReferences|SOAPReferencesIndex",
+    doNormalize: bool = False,
+    atomsSelection: "None|slice|list[int]|np.ndarray" = None,
+) -> SOAPclassification:
+    """Applies the references to a dataset using a :class:`SOAPReferencesIndex`
+
+        gives the same result of :func:`applyClassification` with
+        :func:`SOAPdistanceNormalized`, without calculating the distances
+        from all the references: useful with many references, like the ones
+        merged with :func:`mergeReferences`
+
+    Args:
+        SOAPTrajData (h5py.Dataset|np.ndarray):
+            the dataset (or the array) containing the SOAP trajectory
+        references (SOAPReferences|SOAPReferencesIndex):
+            the references, or an index already built on them
+        doNormalize (bool, optional):
+            informs the function if the given data needs to be normalized
+            before caclulating the distance. Defaults to False.
+        atomsSelection (None|slice|list[int]|np.ndarray, optional):
+            the atoms to classify, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
+
+    Returns:
+        SOAPclassification: The result of the classification
+    """
+    index = (
+        references
+        if isinstance(references, SOAPReferencesIndex)
+        else SOAPReferencesIndex(references)
+    )
+    references = index.references
+    atoms = getAtomsSelection(SOAPTrajData.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(SOAPTrajData.shape[1], atoms)
+    minimumDist = np.zeros((SOAPTrajData.shape[0], nat))
+    minimumDistID = np.zeros((SOAPTrajData.shape[0], nat), dtype=int)
+    for currentFrame, upperFrame, frames in _filledChunks(
+        SOAPTrajData, references, doNormalize, atoms, 2, "classification"
+    ):
+        with timedStage("classification", "compute", currentFrame, upperFrame):
+            (
+                minimumDist[currentFrame:upperFrame],
+                minimumDistID[currentFrame:upperFrame],
+            ) = index.query(frames)
+    return SOAPclassification(minimumDist, minimumDistID, references.names)
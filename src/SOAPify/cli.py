@@ -25,10 +25,11 @@ def createTrajectory():
     if you are creating ahdf5 file from a data+dump from a soap simulation
     remember to add `-u atom_style "id type x y z"` to the arguments
 
-    defaults trajChunkSize=1000"""
+    the chunks of frames are planned from the memory budget"""
     from MDAnalysis import Universe as mdaUniverse
 
     from SOAPify.HDF5er import MDA2HDF5
+    from SOAPify.chunking import setMemoryBudget
     from os import path
 
     parser = ArgumentParser(description=createTrajectory.__doc__)
@@ -74,6 +75,13 @@ def createTrajectory():
         help="extra option to pass to the MDA universe, compatible only with string"
         " values, use the python script if you need to pass more other settings",
     )
+    parser.add_argument(
+        "-m",
+        "--memory-budget",
+        dest="memoryBudget",
+        help='the memory used to plan the chunks of frames, like "512MB" or "4GiB",'
+        " see SOAPify.chunking",
+    )
     parser.add_argument(
         "-d",
         "--dry-run",
@@ -81,6 +89,8 @@ def createTrajectory():
         help="just print the output without making any action",
     )
     args = parser.parse_args()
+    if args.memoryBudget is not None:
+        setMemoryBudget(args.memoryBudget)
     # print(args)
     # arguments
     trajectoryFiles = args.trajectory
@@ -119,7 +129,7 @@ def createTrajectory():
             )
         u.atoms.types = args.atomTypes * (len(u.atoms) // ntypes)
 
-    MDA2HDF5(u, filename, name, trajChunkSize=1000, attrs=extraAttrs)
+    MDA2HDF5(u, filename, name, attrs=extraAttrs)
     # TODO: implement this:
     # from MDAnalysis import transformations
     # ref = mdaUniverse(topo, atom_style="id type x y z")
@@ -127,6 +137,114 @@ def createTrajectory():
     # MDA2HDF5(u, name + "_fitted.hdf5", f"{name}_fitted", trajChunkSize=1000))
 
 
+def createTrajectories():
+    """Creates or updates an hdf5 file containing a trajectory group for each given simulation
+
+    The simulations are read in parallel, each one in its own trajectory group
+
+    if you are creating ahdf5 file from a data+dump from a soap simulation
+    remember to add `-u atom_style "id type x y z"` to the arguments
+
+    the chunks of frames are planned from the memory budget"""
+    from SOAPify.HDF5er import multipleMDA2HDF5
+    from SOAPify.chunking import setMemoryBudget
+
+    parser = ArgumentParser(description=createTrajectories.__doc__)
+    parser.add_argument("hdf5File", help="the file where to putput the trajectories")
+    parser.add_argument(
+        "-s",
+        "--simulation",
+        nargs="+",
+        action="append",
+        dest="simulations",
+        required=True,
+        metavar=("name", "topology"),
+        help="the name of the trajectory to save, the topology file and the"
+        " trajectory file(s), can be repeated for each simulation",
+    )
+    parser.add_argument(
+        "--types",
+        metavar="atomNames",
+        help="list of the atoms names",
+        nargs="+",
+        dest="atomTypes",
+    )
+    parser.add_argument(
+        "-a",
+        "--attribute",
+        nargs=2,
+        action="append",
+        dest="extraAttributes",
+        metavar=("name", "value"),
+        help="extra attributes to store in the trajectories, saved as strings",
+    )
+    parser.add_argument(
+        "-u",
+        "--universe-options",
+        nargs=2,
+        action="append",
+        dest="universeOPTs",
+        metavar=("name", "value"),
+        help="extra option to pass to the MDA universes, compatible only with string"
+        " values, use the python script if you need to pass more other settings",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=-1,
+        help="the number of processes that read the simulations,"
+        " defaults to all the cpus",
+    )
+    parser.add_argument(
+        "-m",
+        "--memory-budget",
+        dest="memoryBudget",
+        help='the memory used to plan the chunks of frames, like "512MB" or "4GiB",'
+        " see SOAPify.chunking",
+    )
+    parser.add_argument(
+        "-d",
+        "--dry-run",
+        action="store_true",
+        help="just print the output without making any action",
+    )
+    args = parser.parse_args()
+    if args.memoryBudget is not None:
+        setMemoryBudget(args.memoryBudget)
+    filename = args.hdf5File
+    simulations = {}
+    for simulation in args.simulations:
+        if len(simulation) < 2:
+            parser.error("each simulation needs a name and a topology file")
+        simulations[simulation[0]] = simulation[1:]
+        print(
+            f'from topology "{simulation[1]}"',
+            f'and trajectory "{simulation[2:]}":',
+            "creating a new trajectory in",
+            f'"{filename}/Trajectories/{simulation[0]}"',
+        )
+    extraAttrs = None
+    if args.extraAttributes:
+        extraAttrs = getDictFromList(args.extraAttributes)
+        print("extra attributes:", extraAttrs)
+    universeOptions = {}
+    if args.universeOPTs:
+        universeOptions = getDictFromList(args.universeOPTs)
+
+    if args.dry_run:
+        exit()
+
+    multipleMDA2HDF5(
+        simulations,
+        filename,
+        attrs=extraAttrs,
+        universeOptions=universeOptions,
+        atomTypes=args.atomTypes,
+        n_jobs=args.jobs,
+    )
+
+
 def traj2SOAP():
     """Given an hdf5 file containing trajectories calculates SOAP of the contained trajectories
 
@@ -134,6 +252,7 @@ def traj2SOAP():
     default SOAP engine is dscribe"""
 
     from SOAPify import saponifyTrajectory
+    from SOAPify.chunking import setMemoryBudget
     from SOAPify.HDF5er import isTrajectoryGroup
     import h5py
 
@@ -198,6 +317,13 @@ def traj2SOAP():
         default=1,
         help="the number of jobs to use, defaults to 1",
     )
+    parser.add_argument(
+        "-m",
+        "--memory-budget",
+        dest="memoryBudget",
+        help='the memory used to plan the chunks of frames, like "512MB" or "4GiB",'
+        " see SOAPify.chunking",
+    )
     parser.add_argument(
         "-d",
         "--dry-run",
@@ -205,6 +331,8 @@ def traj2SOAP():
         help="just print the output without making any action",
     )
     args = parser.parse_args()
+    if args.memoryBudget is not None:
+        setMemoryBudget(args.memoryBudget)
     # print(args)
 
     trajGroupLocation = args.trajectory
@@ -221,7 +349,6 @@ def traj2SOAP():
             saponifyTrajectory(
                 trajContainer=group,
                 SOAPoutContainer=soapFile.require_group(SOAPgroup),
-                SOAPOutputChunkDim=1000,
                 SOAPnJobs=args.jobs,
                 SOAPrcut=args.rCut,
                 SOAPnmax=args.nMax,
@@ -81,3 +81,20 @@ def SOAPdistanceNormalized(x: np.ndarray, y: np.ndarray) -> float:
     """
 
     return np.sqrt(np.abs(2.0 - 2.0 * x.dot(y)))
+
+
+def SOAPdistanceProjected(x: np.ndarray, y: np.ndarray) -> float:
+    """the distance between two normalized SOAP fingerprints projected on few components
+
+        for the fingerprints projected by :class:`SOAPify.reduction.SOAPProjection`
+        this is a lower bound of the SOAP distance, see
+        :meth:`SOAPify.reduction.SOAPProjection.distanceBounds`
+
+    Args:
+        x (np.ndarray): a projected SOAP fingerprint
+        y (np.ndarray): a projected SOAP fingerprint
+
+    Returns:
+        float: the euclidean distance between the two projected fingerprints
+    """
+    return la.norm(x - y)
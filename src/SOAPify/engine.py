@@ -1,6 +1,7 @@
 """This submodule contains the settings and the function to call the SOAP engines"""
 from typing import Iterable, Literal
 import abc
+import importlib
 import warnings
 from ase.data import atomic_numbers, chemical_symbols
 import ase
@@ -8,23 +9,48 @@ import numpy
 
 from .utils import orderByZ, getAddressesQuippyLikeDscribe
 
-try:
-    from dscribe.descriptors import SOAP as dscribeSOAP
-
-    HAVE_DSCRIBE = True
-except ImportError:  # pragma: no cover
-    HAVE_DSCRIBE = False
-try:
-    from quippy.descriptors import Descriptor
-
-    HAVE_QUIPPY = True
-except ImportError:  # pragma: no cover
-    HAVE_QUIPPY = False
-
 KNOWNSOAPENGINES = Literal[
     "dscribe", "quippy"
 ]  #:Literal type for the Known SOAP engine
 
+#: the module and the class of the descriptor of each SOAP engine
+_BACKENDS = {
+    "dscribe": ("dscribe.descriptors", "SOAP"),
+    "quippy": ("quippy.descriptors", "Descriptor"),
+}
+_LOADEDBACKENDS = {}
+
+
+def _getBackend(engine: KNOWNSOAPENGINES):
+    """Returns the class of the descriptor of a SOAP engine, importing it the first time
+
+        dscribe and quippy are slow to import, so they are imported only when
+        the first engine is set up; `HAVE_DSCRIBE` and `HAVE_QUIPPY` are
+        evaluated in the same way when they are read
+
+    Args:
+        engine (KNOWNSOAPENGINES): the name of the SOAP engine
+
+    Returns:
+        type|None: the class of the descriptor, None if the engine is not installed
+    """
+    if engine not in _LOADEDBACKENDS:
+        moduleName, className = _BACKENDS[engine]
+        try:
+            backend = getattr(importlib.import_module(moduleName), className)
+        except ImportError:  # pragma: no cover
+            backend = None
+        _LOADEDBACKENDS[engine] = backend
+    return _LOADEDBACKENDS[engine]
+
+
+def __getattr__(name: str):
+    if name == "HAVE_DSCRIBE":
+        return _getBackend("dscribe") is not None
+    if name == "HAVE_QUIPPY":
+        return _getBackend("quippy") is not None
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 def centerMaskCreator(
     SOAPatomMask: "list[str]",
@@ -380,7 +406,8 @@ def getSoapEngine(
     )
 
     if useSoapFrom == "dscribe":
-        if not HAVE_DSCRIBE:  # pragma: no cover
+        dscribeSOAP = _getBackend("dscribe")
+        if dscribeSOAP is None:  # pragma: no cover
             raise ImportError("dscribe is not installed in your current environment")
         SOAPkwargs.update(
             {
@@ -396,7 +423,8 @@ def getSoapEngine(
             warnings.warn("sparse output is not supported yet, forcing  dense output")
         return dscribeSOAPengineContainer(dscribeSOAP(**SOAPkwargs), useCentersMask)
     if useSoapFrom == "quippy":
-        if not HAVE_QUIPPY:  # pragma: no cover
+        Descriptor = _getBackend("quippy")
+        if Descriptor is None:  # pragma: no cover
             raise ImportError("quippy-ase is not installed in your current environment")
 
         if useCentersMask is not None and SOAPatomMask is None:
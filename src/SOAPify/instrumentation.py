@@ -0,0 +1,157 @@
+"""Submodule that contains the instrumentation of the SOAPify pipelines
+
+Each chunk of frames that flows through a pipeline (the SOAP calculation, the
+import of the trajectories in the hdf5 files, the analyses that read the SOAP
+datasets chunk by chunk) emits a record for each stage (for example "read",
+"compute", "fill" or "write") with its timing, the bytes moved and the frames
+per second. The records are plain dictionaries with the keys:
+
+    - **pipeline** the name of the pipeline, like "saponify"
+    - **stage** the name of the stage
+    - **first** and **last** the frames of the chunk, as in `range(first, last)`
+    - **frames** the number of frames in the chunk
+    - **seconds** the time spent in the stage
+    - **bytes** the bytes read or written by the stage
+    - **framesPerSecond** the throughput of the stage
+
+plus some pipeline specific keys. The records are sent to the callbacks added
+with :func:`addInstrumentationCallback` and are logged by the "SOAPify" logger
+with the record in the `soapify` attribute of the `logging.LogRecord`. The
+writes in the hdf5 files include the time spent by the compression filters.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+__all__ = [
+    "addInstrumentationCallback",
+    "removeInstrumentationCallback",
+    "instrumentationCallback",
+    "emitRecord",
+    "timedStage",
+]
+
+logger = logging.getLogger("SOAPify")
+
+_CALLBACKS = []
+
+
+def addInstrumentationCallback(callback: callable) -> None:
+    """Adds a function that will be called with each instrumentation record
+
+    Args:
+        callback (callable): a function that accepts the record (a dict)
+    """
+    _CALLBACKS.append(callback)
+
+
+def removeInstrumentationCallback(callback: callable) -> None:
+    """Removes a function added with :func:`addInstrumentationCallback`
+
+    Args:
+        callback (callable): the function to remove
+    """
+    _CALLBACKS.remove(callback)
+
+
+@contextmanager
+def instrumentationCallback(callback: callable):
+    """Adds `callback` to the instrumentation only within a `with` block
+
+    Args:
+        callback (callable): a function that accepts the record (a dict)
+    """
+    addInstrumentationCallback(callback)
+    try:
+        yield callback
+    finally:
+        removeInstrumentationCallback(callback)
+
+
+def emitRecord(
+    pipeline: str,
+    stage: str,
+    first: int,
+    last: int,
+    seconds: float,
+    nbytes: int = 0,
+    level: int = logging.DEBUG,
+    **extra,
+) -> dict:
+    """Sends a record to the callbacks and to the "SOAPify" logger
+
+    Args:
+        pipeline (str): the name of the pipeline
+        stage (str): the name of the stage
+        first (int): the first frame of the chunk
+        last (int): the frame after the last of the chunk
+        seconds (float): the time spent in the stage
+        nbytes (int, optional): the bytes moved by the stage. Defaults to 0.
+        level (int, optional): the logging level. Defaults to logging.DEBUG.
+        **extra: other keys to add to the record
+
+    Returns:
+        dict: the record
+    """
+    frames = last - first
+    record = dict(
+        pipeline=pipeline,
+        stage=stage,
+        first=first,
+        last=last,
+        frames=frames,
+        seconds=seconds,
+        bytes=nbytes,
+        framesPerSecond=frames / seconds if seconds > 0 else float("inf"),
+        **extra,
+    )
+    logger.log(
+        level,
+        "%s: %s [%d:%d] in %.4g s, %d B",
+        pipeline,
+        stage,
+        first,
+        last,
+        seconds,
+        nbytes,
+        extra={"soapify": record},
+    )
+    for callback in list(_CALLBACKS):
+        callback(record)
+    return record
+
+
+@contextmanager
+def timedStage(
+    pipeline: str,
+    stage: str,
+    first: int,
+    last: int,
+    nbytes: int = 0,
+    level: int = logging.DEBUG,
+    **extra,
+):
+    """Measures the time spent in a `with` block and emits its record
+
+    the record is emitted only if the block completes, the yielded dict can be
+    used to set the "bytes" (and other keys) within the block::
+
+        with timedStage("saponify", "compute", 0, 10) as stage:
+            soap = engine(frames)
+            stage["bytes"] = soap.nbytes
+
+    Args:
+        pipeline (str): the name of the pipeline
+        stage (str): the name of the stage
+        first (int): the first frame of the chunk
+        last (int): the frame after the last of the chunk
+        nbytes (int, optional): the bytes moved by the stage. Defaults to 0.
+        level (int, optional): the logging level. Defaults to logging.DEBUG.
+        **extra: other keys to add to the record
+    """
+    toUpdate = dict(bytes=nbytes, **extra)
+    tStart = time.perf_counter()
+    yield toUpdate
+    seconds = time.perf_counter() - tStart
+    nbytes = toUpdate.pop("bytes")
+    emitRecord(pipeline, stage, first, last, seconds, nbytes, level, **toUpdate)
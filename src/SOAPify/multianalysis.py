@@ -0,0 +1,348 @@
+"""Submodule that runs several analyses with a single read of a SOAP dataset
+
+Each analysis of a SOAP dataset (:func:`SOAPify.analysis.getTimeSOAPSimple`,
+:func:`SOAPify.classify.getDistancesFromRef`, :func:`SOAPify.classify.applyClassification`...)
+reads, fills and normalizes the whole dataset by itself. :func:`multiAnalysisPass`
+reads each chunk of frames once, fills and normalizes it once and gives it to a
+list of consumers, that accumulate their results::
+
+    timeSOAP, distances, statistics = multiAnalysisPass(
+        soapDataset,
+        [
+            TimeSOAPConsumer(),
+            ReferencesDistancesConsumer(references),
+            AtomStatisticsConsumer(),
+        ],
+    )
+
+A new analysis can be added by subclassing :class:`SOAPConsumer`.
+"""
+from dataclasses import dataclass
+import abc
+import numpy
+import h5py
+
+from .distances import SOAPdistanceNormalized
+from .classify import (
+    SOAPReferences,
+    SOAPReferencesIndex,
+    SOAPclassification,
+    getDistanceBetween,
+)
+from .utils import _filledSOAPChunks
+from .HDF5er import getAtomsSelection, getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
+
+__all__ = [
+    "SOAPConsumer",
+    "TimeSOAPConsumer",
+    "ReferencesDistancesConsumer",
+    "ClassificationConsumer",
+    "AtomStatistics",
+    "AtomStatisticsConsumer",
+    "multiAnalysisPass",
+]
+
+
+class SOAPConsumer(abc.ABC):
+    """The base class of the analyses run by :func:`multiAnalysisPass`
+
+    :meth:`start` is called before the first chunk, :meth:`consume` once for
+    each chunk of frames, in order, and :meth:`result` at the end.
+    """
+
+    #: the number of values per atom and per frame stored by the consumer,
+    #: used to plan the dimension of the chunks
+    outputsPerAtom: int = 0
+
+    def start(self, nframes: int, nat: int, nfeatures: int) -> None:
+        """Prepares the consumer for a new pass
+
+        Args:
+            nframes (int): the number of frames of the dataset
+            nat (int): the number of atoms analyzed
+            nfeatures (int): the number of features of the filled fingerprints
+        """
+
+    @abc.abstractmethod
+    def consume(self, start: int, frames: numpy.ndarray) -> None:
+        """Analyzes a chunk of frames
+
+        Args:
+            start (int): the index of the first frame of the chunk
+            frames (numpy.ndarray):
+                the read-only filled and normalized fingerprints, with shape
+                (frames, atoms, features); the array is reused for the next
+                chunk, copy what must be kept
+        """
+
+    @abc.abstractmethod
+    def result(self):
+        """Returns the result of the analysis"""
+
+
+class TimeSOAPConsumer(SOAPConsumer):
+    """Calculates the timeSOAP, like :func:`SOAPify.analysis.getTimeSOAPSimple`
+
+    The result is the tuple (timedSOAP, deltaTimedSOAP), with the SOAP distance
+    between the fingerprints of each atom at the frames `t` and `t-window`
+    (see :func:`SOAPify.analysis.timeSOAP`)
+    """
+
+    outputsPerAtom = 1
+
+    def __init__(self, window: int = 1) -> None:
+        """
+        Args:
+            window (int, optional):
+                the frames between the compared fingerprints. Defaults to 1.
+        """
+        if window < 1:
+            raise ValueError("the window must be at least 1")
+        self.window = window
+        self._timedSOAP = None
+        self._tail = None
+
+    def start(self, nframes: int, nat: int, nfeatures: int) -> None:
+        if self.window >= nframes:
+            raise ValueError("window must be smaller than simulation lenght")
+        self._timedSOAP = numpy.zeros((nframes - self.window, nat))
+        # the last `window` frames seen
+        self._tail = numpy.zeros((0, nat, nfeatures))
+
+    def consume(self, start: int, frames: numpy.ndarray) -> None:
+        window = self.window
+        for i, actual in enumerate(frames):
+            frame = start + i
+            if frame < window:
+                continue
+            if i >= window:
+                previous = frames[i - window]
+            else:
+                previous = self._tail[i - window]
+            # this is equivalent to distance of two normalized SOAP vector
+            self._timedSOAP[frame - window] = numpy.linalg.norm(
+                actual - previous, axis=-1
+            )
+        self._tail = numpy.concatenate([self._tail, frames])[-window:]
+
+    def result(self) -> "tuple[numpy.ndarray, numpy.ndarray]":
+        return self._timedSOAP, numpy.diff(self._timedSOAP.T, axis=-1)
+
+
+class ReferencesDistancesConsumer(SOAPConsumer):
+    """Calculates the distances from the references, like :func:`SOAPify.classify.getDistancesFromRef`
+
+    The result has shape (frames, atoms, references): the fingerprints are
+    normalized, as with `doNormalize=True`
+    """
+
+    def __init__(
+        self,
+        references: SOAPReferences,
+        distanceCalculator: callable = SOAPdistanceNormalized,
+    ) -> None:
+        """
+        Args:
+            references (SOAPReferences): the references, with the filled spectra
+            distanceCalculator (callable, optional):
+                the function to calculate the distances.
+                Defaults to :func:`SOAPify.distances.SOAPdistanceNormalized`.
+        """
+        self.references = references
+        self.distanceCalculator = distanceCalculator
+        self.outputsPerAtom = len(references)
+        self._distances = None
+
+    def start(self, nframes: int, nat: int, nfeatures: int) -> None:
+        if self.references.spectra.shape[-1] != nfeatures:
+            raise ValueError("the references must have the filled spectra")
+        self._distances = numpy.zeros((nframes, nat, len(self.references)))
+
+    def consume(self, start: int, frames: numpy.ndarray) -> None:
+        spectra = self.references.spectra
+        if self.distanceCalculator is SOAPdistanceNormalized:
+            # the same formula, for all the atoms at once
+            self._distances[start : start + len(frames)] = numpy.sqrt(
+                numpy.abs(2.0 - 2.0 * frames @ spectra.T)
+            )
+            return
+        for i, frame in enumerate(frames):
+            self._distances[start + i] = getDistanceBetween(
+                frame, spectra, self.distanceCalculator
+            )
+
+    def result(self) -> numpy.ndarray:
+        return self._distances
+
+
+class ClassificationConsumer(SOAPConsumer):
+    """Classifies the atoms, like :func:`SOAPify.classify.applyClassificationIndexed`
+
+    The result is a :class:`SOAPify.classify.SOAPclassification`
+    """
+
+    outputsPerAtom = 2
+
+    def __init__(self, references: "SOAPReferences|SOAPReferencesIndex") -> None:
+        """
+        Args:
+            references (SOAPReferences|SOAPReferencesIndex):
+                the references (with the filled spectra), or an index already
+                built on them
+        """
+        self.index = (
+            references
+            if isinstance(references, SOAPReferencesIndex)
+            else SOAPReferencesIndex(references)
+        )
+        self._distances = None
+        self._references = None
+
+    def start(self, nframes: int, nat: int, nfeatures: int) -> None:
+        self._distances = numpy.zeros((nframes, nat))
+        self._references = numpy.zeros((nframes, nat), dtype=int)
+
+    def consume(self, start: int, frames: numpy.ndarray) -> None:
+        stop = start + len(frames)
+        self._distances[start:stop], self._references[start:stop] = self.index.query(
+            frames
+        )
+
+    def result(self) -> SOAPclassification:
+        return SOAPclassification(
+            self._distances, self._references, self.index.references.names
+        )
+
+
+@dataclass
+class AtomStatistics:
+    """The per-atom statistics of the fingerprints along the trajectory"""
+
+    #: the mean of the normalized fingerprints, shape (atoms, features)
+    mean: "numpy.ndarray[float]"
+    #: the variance of the normalized fingerprints, shape (atoms, features)
+    variance: "numpy.ndarray[float]"
+    #: the number of frames
+    nframes: int
+
+
+class AtomStatisticsConsumer(SOAPConsumer):
+    """Calculates the mean and the variance of the fingerprints of each atom
+
+    The result is an :class:`AtomStatistics`; the statistics of the chunks are
+    merged with the formula of Chan et al., stable also for long trajectories
+    """
+
+    def __init__(self) -> None:
+        self._count = 0
+        self._mean = None
+        self._squares = None
+
+    def start(self, nframes: int, nat: int, nfeatures: int) -> None:
+        self._count = 0
+        self._mean = numpy.zeros((nat, nfeatures))
+        self._squares = numpy.zeros((nat, nfeatures))
+
+    def consume(self, start: int, frames: numpy.ndarray) -> None:
+        count = len(frames)
+        if count == 0:
+            return
+        mean = frames.mean(axis=0, dtype=numpy.float64)
+        squares = numpy.sum((frames - mean) ** 2, axis=0)
+        total = self._count + count
+        delta = mean - self._mean
+        self._mean += delta * (count / total)
+        self._squares += squares + delta**2 * (self._count * count / total)
+        self._count = total
+
+    def result(self) -> AtomStatistics:
+        return AtomStatistics(
+            mean=self._mean,
+            variance=self._squares / max(1, self._count),
+            nframes=self._count,
+        )
+
+
+def _arrayChunks(soapArray: numpy.ndarray, atoms, nOutputsPerAtom: int):
+    """yields the chunks of an array of fingerprints, as views"""
+    nframes = soapArray.shape[0]
+    nat = getAtomsSelectionLength(soapArray.shape[1], atoms)
+    chunkDim = planChunks(
+        nat,
+        soapArray.shape[2],
+        soapArray.dtype,
+        nreferences=nOutputsPerAtom,
+        nInputFeatures=soapArray.shape[2],
+        nframes=nframes,
+    ).compute
+    for start in range(0, nframes, chunkDim):
+        stop = min(start + chunkDim, nframes)
+        yield start, stop, soapArray[start:stop, atoms]
+
+
+def multiAnalysisPass(
+    soapDataset: "h5py.Dataset|numpy.ndarray",
+    consumers: "list[SOAPConsumer]",
+    atomsSelection: "None|slice|list[int]|numpy.ndarray" = None,
+) -> list:
+    """Runs several analyses with a single read of the SOAP dataset
+
+        The dataset is read in chunks of frames planned from the memory budget
+        (considering the outputs of all the consumers, see
+        :mod:`SOAPify.chunking`); each chunk is filled and normalized once and
+        given to all the consumers, in order.
+
+        If `soapDataset` is a numpy array (for example a view of a
+        :class:`SOAPify.sharedmemory.SharedSOAPBlock`) the fingerprints must be
+        already filled and normalized.
+
+    Args:
+        soapDataset (h5py.Dataset|numpy.ndarray):
+            the dataset with the SOAP fingerprints, or the array with the
+            filled and normalized fingerprints
+        consumers (list[SOAPConsumer]):
+            the analyses to run
+        atomsSelection (None|slice|list[int]|numpy.ndarray, optional):
+            the atoms to analyze, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
+
+    Returns:
+        list: the result of each consumer
+    """
+    atoms = getAtomsSelection(soapDataset.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+    nOutputsPerAtom = sum(consumer.outputsPerAtom for consumer in consumers)
+    if isinstance(soapDataset, numpy.ndarray):
+        nfeatures = soapDataset.shape[2]
+        chunks = _arrayChunks(soapDataset, atoms, nOutputsPerAtom)
+    else:
+        chunks = _filledSOAPChunks(
+            soapDataset,
+            atoms,
+            nOutputsPerAtom=nOutputsPerAtom,
+            stageName="multiAnalysis",
+        )
+        nfeatures = None
+    first = next(chunks, None)
+    if nfeatures is None:
+        nfeatures = 0 if first is None else first[2].shape[-1]
+    for consumer in consumers:
+        consumer.start(soapDataset.shape[0], nat, nfeatures)
+    while first is not None:
+        start, stop, frames = first
+        # the consumers cannot modify the chunk seen by the others
+        frames = frames.view()
+        frames.flags.writeable = False
+        for consumer in consumers:
+            with timedStage(
+                "multiAnalysis",
+                "compute",
+                start,
+                stop,
+                consumer=type(consumer).__name__,
+            ):
+                consumer.consume(start, frames)
+        first = next(chunks, None)
+    return [consumer.result() for consumer in consumers]
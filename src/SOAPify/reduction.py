@@ -0,0 +1,300 @@
+r"""Submodule that compresses the SOAP datasets on few components
+
+The SOAP fingerprints with several species have thousands of features per atom:
+:func:`fitSOAPProjection` finds, streaming the dataset, an orthonormal
+projection of the filled and normalized fingerprints on `k` components (the
+principal components of a sample of the atoms, or random directions) and
+:func:`reduceSOAPDataset` writes the `(frames, atoms, k)` projected dataset.
+
+The projection does not increase the distances between the fingerprints, and
+the part of each fingerprint that is lost is orthogonal to the components: for
+two fingerprints of the reduced dataset
+
+.. math::
+    \left\|P\vec{a}-P\vec{b}\right\| \leq d(\vec{a},\vec{b}) \leq
+    \sqrt{\left\|P\vec{a}-P\vec{b}\right\|^2 + 4 r^2}
+
+where :math:`r` is the biggest residual of the reduced fingerprints, measured
+while writing the dataset (see :meth:`SOAPProjection.distanceBounds`).
+
+:func:`SOAPify.analysis.getTimeSOAPSimple` works directly on the reduced
+datasets, and :func:`SOAPify.classify.getDistancesFromRef` works on them with
+the references projected by :meth:`SOAPProjection.projectReferences` and with
+:func:`SOAPify.distances.SOAPdistanceProjected`.
+"""
+from dataclasses import dataclass, replace
+import numpy
+import h5py
+
+from .utils import normalizeArray, getSOAPSettings, _filledSOAPLength
+from .utils import _filledSOAPChunks
+from .classify import SOAPReferences
+from .HDF5er import getAtomsSelection, getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
+
+__all__ = [
+    "SOAPProjection",
+    "fitSOAPProjection",
+    "reduceSOAPDataset",
+    "getSOAPProjection",
+    "isReducedSOAPDataset",
+]
+
+#: the kinds of projection known by :func:`fitSOAPProjection`
+KNOWNPROJECTIONS = ("pca", "random")
+
+
+@dataclass
+class SOAPProjection:
+    """An orthonormal projection of the filled and normalized SOAP fingerprints"""
+
+    #: the kind of projection, see :data:`KNOWNPROJECTIONS`
+    method: str
+    #: the orthonormal components, with shape (k, nfeatures)
+    components: "numpy.ndarray[float]"
+    #: the point subtracted before the projection, with shape (nfeatures,)
+    mean: "numpy.ndarray[float]"
+    #: the biggest norm of the part of a fingerprint lost by the projection,
+    #: measured by :func:`reduceSOAPDataset` (nan if not measured)
+    maxResidual: float = numpy.nan
+
+    @property
+    def nComponents(self) -> int:
+        """The number of components"""
+        return self.components.shape[0]
+
+    def project(self, fingerprints: numpy.ndarray) -> numpy.ndarray:
+        """Projects the filled and normalized fingerprints
+
+        Args:
+            fingerprints (numpy.ndarray): the fingerprints, with shape (..., nfeatures)
+
+        Returns:
+            numpy.ndarray: the projected fingerprints, with shape (..., k)
+        """
+        return (fingerprints - self.mean) @ self.components.T
+
+    def residuals(self, fingerprints: numpy.ndarray) -> numpy.ndarray:
+        """Returns the norm of the part of each fingerprint lost by the projection
+
+        Args:
+            fingerprints (numpy.ndarray): the fingerprints, with shape (..., nfeatures)
+
+        Returns:
+            numpy.ndarray: the residuals, with shape `fingerprints.shape[:-1]`
+        """
+        centered = fingerprints - self.mean
+        projected = centered @ self.components.T
+        # the components are orthonormal: the residual is orthogonal to them
+        squared = numpy.sum(centered**2, axis=-1) - numpy.sum(projected**2, axis=-1)
+        return numpy.sqrt(numpy.maximum(squared, 0.0))
+
+    def projectReferences(self, references: SOAPReferences) -> SOAPReferences:
+        """Projects the (normalized) spectra of the given references
+
+        Args:
+            references (SOAPReferences): the references, with the filled spectra
+
+        Returns:
+            SOAPReferences: the references, with the projected spectra
+        """
+        return SOAPReferences(
+            names=references.names,
+            spectra=self.project(normalizeArray(references.spectra)),
+            lmax=references.lmax,
+            nmax=references.nmax,
+        )
+
+    def distanceBounds(
+        self, projectedDistances: numpy.ndarray
+    ) -> "tuple[numpy.ndarray, numpy.ndarray]":
+        """Returns the bounds of the SOAP distances from the projected ones
+
+        The bounds are valid for the fingerprints of the dataset written by
+        :func:`reduceSOAPDataset`
+
+        Args:
+            projectedDistances (numpy.ndarray):
+                the distances between projected fingerprints
+
+        Returns:
+            tuple[numpy.ndarray,numpy.ndarray]:
+                the lower and the upper bound of the SOAP distances
+        """
+        projectedDistances = numpy.asarray(projectedDistances)
+        return projectedDistances, numpy.sqrt(
+            projectedDistances**2 + 4 * self.maxResidual**2
+        )
+
+
+def fitSOAPProjection(
+    soapDataset: h5py.Dataset,
+    nComponents: int,
+    method: str = "pca",
+    nSamples: int = 100000,
+    seed: "int|None" = None,
+    atomsSelection: "None|slice|list[int]|numpy.ndarray" = None,
+) -> SOAPProjection:
+    """Finds a projection of the fingerprints of a SOAP dataset on few components
+
+        With `method="pca"` the dataset is streamed in chunks of frames
+        planned from the memory budget, about `nSamples` filled and
+        normalized fingerprints are sampled uniformly and the projection is on
+        their `nComponents` principal components: only the covariance matrix
+        of the features is kept in memory.
+
+        With `method="random"` the components are random orthonormal
+        directions and the dataset is not read.
+
+    Args:
+        soapDataset (h5py.Dataset):
+            the dataset with the SOAP fingerprints
+        nComponents (int):
+            the number of components
+        method (str, optional):
+            "pca" or "random". Defaults to "pca".
+        nSamples (int, optional):
+            the number of fingerprints sampled for the PCA. Defaults to 100000.
+        seed (int|None, optional):
+            the seed of the random sampling. Defaults to None.
+        atomsSelection (None|slice|list[int]|numpy.ndarray, optional):
+            the atoms to sample, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
+
+    Raises:
+        ValueError: if the method is not known
+        ValueError: if there are more components than features
+        ValueError: if less than two fingerprints have been sampled
+
+    Returns:
+        SOAPProjection: the projection
+    """
+    if method not in KNOWNPROJECTIONS:
+        raise ValueError(f'"{method}" is not a known projection: {KNOWNPROJECTIONS}')
+    nfeatures = _filledSOAPLength(**getSOAPSettings(soapDataset))
+    if not 0 < nComponents <= nfeatures:
+        raise ValueError(f"nComponents must be between 1 and {nfeatures}")
+    rng = numpy.random.default_rng(seed)
+    if method == "random":
+        components, _ = numpy.linalg.qr(rng.normal(size=(nfeatures, nComponents)))
+        return SOAPProjection(method, components.T.copy(), numpy.zeros(nfeatures))
+
+    atoms = getAtomsSelection(soapDataset.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+    fraction = min(1.0, nSamples / max(1, soapDataset.shape[0] * nat))
+    sampled = 0
+    total = numpy.zeros(nfeatures)
+    crossProducts = numpy.zeros((nfeatures, nfeatures))
+    for start, stop, frames in _filledSOAPChunks(soapDataset, atoms, stageName="pca"):
+        with timedStage("pca", "compute", start, stop):
+            rows = frames.reshape(-1, nfeatures)
+            sample = rows[rng.random(len(rows)) < fraction].astype(numpy.float64)
+            sampled += len(sample)
+            total += sample.sum(axis=0)
+            crossProducts += sample.T @ sample
+    if sampled < 2:
+        raise ValueError("less than two fingerprints have been sampled")
+    mean = total / sampled
+    covariance = crossProducts / sampled - numpy.outer(mean, mean)
+    _, eigenvectors = numpy.linalg.eigh(covariance)
+    # eigh orders the eigenvalues from the smallest
+    components = eigenvectors[:, ::-1][:, :nComponents].T.copy()
+    return SOAPProjection(method, components, mean)
+
+
+def reduceSOAPDataset(
+    soapDataset: h5py.Dataset,
+    outputGroup: h5py.Group,
+    projection: SOAPProjection,
+    name: "str|None" = None,
+    atomsSelection: "None|slice|list[int]|numpy.ndarray" = None,
+) -> SOAPProjection:
+    """Writes the projected fingerprints of a SOAP dataset
+
+        The dataset is streamed in chunks of frames planned from the memory
+        budget and its filled and normalized fingerprints are projected in the
+        `(frames, atoms, k)` dataset `name` of `outputGroup`.
+
+        The kind of projection and the biggest residual are stored in the attrs
+        of the new dataset: the components and the mean are too big for the
+        attributes of a hdf5 object, they are stored in the group
+        `"{name}Projection"` of `outputGroup`, referenced by the
+        attribute "projection". Use :func:`getSOAPProjection` to read them.
+
+    Args:
+        soapDataset (h5py.Dataset):
+            the dataset with the SOAP fingerprints
+        outputGroup (h5py.Group):
+            the group where the reduced dataset is written
+        projection (SOAPProjection):
+            the projection, see :func:`fitSOAPProjection`
+        name (str|None, optional):
+            the name of the reduced dataset. Defaults to None (the name of
+            `soapDataset`).
+        atomsSelection (None|slice|list[int]|numpy.ndarray, optional):
+            the atoms to write, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to None (all the atoms).
+
+    Returns:
+        SOAPProjection: the projection, with the measured `maxResidual`
+    """
+    if name is None:
+        name = soapDataset.name.split("/")[-1]
+    atoms = getAtomsSelection(soapDataset.shape[1], atomsSelection)
+    nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+    nframes = soapDataset.shape[0]
+    k = projection.nComponents
+    writeChunk = planChunks(nat, k, numpy.float64, nframes=nframes).write
+    reduced = outputGroup.create_dataset(
+        name,
+        (nframes, nat, k),
+        compression="gzip",
+        compression_opts=9,
+        chunks=(writeChunk, max(1, nat), k),
+        dtype=numpy.float64,
+    )
+    maxResidual = 0.0
+    for start, stop, frames in _filledSOAPChunks(
+        soapDataset, atoms, nOutputsPerAtom=k, stageName="reduction"
+    ):
+        with timedStage("reduction", "compute", start, stop):
+            projected = projection.project(frames)
+            if frames.size > 0:
+                maxResidual = max(maxResidual, projection.residuals(frames).max())
+        with timedStage("reduction", "write", start, stop) as stage:
+            reduced[start:stop] = projected
+            stage["bytes"] = projected.nbytes
+    projection = replace(projection, maxResidual=float(maxResidual))
+
+    projectionGroup = outputGroup.create_group(f"{name}Projection")
+    projectionGroup.create_dataset("components", data=projection.components)
+    projectionGroup.create_dataset("mean", data=projection.mean)
+    reduced.attrs["projection"] = projectionGroup.ref
+    reduced.attrs["projection_method"] = projection.method
+    reduced.attrs["projection_maxResidual"] = projection.maxResidual
+    reduced.attrs["projection_source"] = soapDataset.name
+    return projection
+
+
+def isReducedSOAPDataset(dataset: "h5py.Dataset|numpy.ndarray") -> bool:
+    """Returns True if the dataset has been written by :func:`reduceSOAPDataset`"""
+    return "projection_method" in getattr(dataset, "attrs", {})
+
+
+def getSOAPProjection(reducedDataset: h5py.Dataset) -> SOAPProjection:
+    """Reads the projection of a dataset written by :func:`reduceSOAPDataset`
+
+    Args:
+        reducedDataset (h5py.Dataset): the reduced dataset
+
+    Returns:
+        SOAPProjection: the projection
+    """
+    projectionGroup = reducedDataset.file[reducedDataset.attrs["projection"]]
+    return SOAPProjection(
+        method=reducedDataset.attrs["projection_method"],
+        components=projectionGroup["components"][:],
+        mean=projectionGroup["mean"][:],
+        maxResidual=float(reducedDataset.attrs["projection_maxResidual"]),
+    )
@@ -1,46 +1,39 @@
 """Submodule that contains the workhorse routines to apply the SOAP calculations
 """
+import logging
+import os
 import time
+from concurrent.futures import Executor
+from itertools import chain, islice
 from typing import Iterable
 import h5py
 import numpy
+from ase import Atoms as aseAtoms
+from MDAnalysis import Universe as mdaUniverse, AtomGroup as mdaAtomGroup
 
 from .HDF5er import (
     HDF52AseAtomsChunckedwithSymbols as HDF2ase,
     isTrajectoryGroup,
+    getFrameOffsets,
+    getTextTrajectoryBoxes,
+    mapTextTrajectoryBlocks,
+    readTextTrajectoryFrames,
 )
+from .HDF5er.ToHDF5 import _trajectoryChunks, _trajectoryLenght
 from .engine import SOAPengineContainer, getSoapEngine, KNOWNSOAPENGINES
+from .instrumentation import logger, emitRecord, timedStage
+from .chunking import planChunks, getMemoryBudget
 
 
-def _saponifyWorker(
-    trajGroup: h5py.Group,
-    SOAPoutDataset: h5py.Dataset,
-    soapEngine: SOAPengineContainer,
-    SOAPOutputChunkDim: int = 100,
-    SOAPnJobs: int = 1,
-    verbose: bool = True,
-):
-    """Calculates the soap descriptor and store the result in the given dataset
+def _storeSOAPAttributes(
+    SOAPoutDataset: h5py.Dataset, soapEngine: SOAPengineContainer
+) -> None:
+    """stores the settings of the SOAP engine in the attributes of the dataset
 
     Args:
-        trajGroup (h5py.Group):
-            the group that contains the trajectory (must contain "Box",
-            "Trajectory" and "Types" datasets)
-        SOAPoutDataset (h5py.Dataset):
-            The preformed dataset for storing the SOAP results
-        soapEngine (SOAPengineContainer):
-            The soap engine already set up
-        SOAPOutputChunkDim (int, optional):
-            The dimension of the chunck of data in the SOAP results dataset.
-            Defaults to 100.
-        SOAPnJobs (int, optional):
-            the number of concurrent SOAP calculations (option passed to the
-            desired SOAP engine). Defaults to 1.
-        verbose (bool, optional):
-            regulates the verbosity of the step by step operations.
-            Defaults to True.
+        SOAPoutDataset (h5py.Dataset): the dataset with the SOAP results
+        soapEngine (SOAPengineContainer): the soap engine already set up
     """
-    symbols = trajGroup["Types"].asstr()[:]
     SOAPoutDataset.attrs["SOAPengine"] = soapEngine.SOAPenginekind
     SOAPoutDataset.attrs["l_max"] = soapEngine.lmax
     SOAPoutDataset.attrs["n_max"] = soapEngine.nmax
@@ -68,34 +61,200 @@ def _saponifyWorker(
                     f"species_location_{soapEngine.species[i]}-{soapEngine.species[j]}"
                 ] = (temp.start, temp.stop)
 
-    for chunkTraj in trajGroup["Trajectory"].iter_chunks():
-        chunkBox = (chunkTraj[0], slice(0, 6, 1))
-        if verbose:
-            print(f'working on trajectory chunk "{chunkTraj}"')
-            print(f'   and working on box chunk "{repr(chunkBox)}"')
+
+def _planSOAPChunks(
+    SOAPOutputChunkDim: "int|None",
+    nCenters: int,
+    nOfFeatures: int,
+    useType,
+    nframes: "int|None" = None,
+) -> "tuple[int,int]":
+    """returns the frames in each chunk of the SOAP dataset and the frames calculated at once
+
+        if `SOAPOutputChunkDim` is given it is used for both, otherwise they
+        are planned from the memory budget, see :func:`SOAPify.chunking.planChunks`
+
+    Args:
+        SOAPOutputChunkDim (int|None): the dimension asked by the user
+        nCenters (int): the number of SOAP centers
+        nOfFeatures (int): the number of features of the SOAP fingerprints
+        useType (str): The precision used to store the data
+        nframes (int|None, optional): the number of frames, if known.
+            Defaults to None.
+
+    Returns:
+        tuple[int,int]: the "write" and the "compute" dimension of the chunks
+    """
+    if SOAPOutputChunkDim is not None:
+        return SOAPOutputChunkDim, SOAPOutputChunkDim
+    plan = planChunks(nCenters, nOfFeatures, useType, nframes=nframes)
+    return plan.write, plan.compute
+
+
+def _prepareSOAPDataset(
+    SOAPoutContainer: h5py.Group,
+    key: str,
+    nframes: int,
+    nCenters: int,
+    nOfFeatures: int,
+    SOAPOutputChunkDim: int = 100,
+    doOverride: bool = False,
+    useType="float64",
+) -> h5py.Dataset:
+    """creates, or resizes, the dataset that will store the SOAP fingerprints
+
+    Args:
+        SOAPoutContainer (h5py.Group):
+            The group where the dataset with the  SOAP fingerprints will be saved
+        key (str):
+            the name of the dataset to be saved, if exist will be overidden
+        nframes (int): the number of frames of the trajectory
+        nCenters (int): the number of SOAP centers
+        nOfFeatures (int): the number of features of the SOAP fingerprints
+        SOAPOutputChunkDim (int, optional):
+            the size of the main chunck of data of a new SOAP dataset.
+            Defaults to 100.
+        doOverride (bool, optional):
+            if False will raise and exception if the user ask to override an
+            already existing DataSet. Defaults to False.
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+
+    Returns:
+        h5py.Dataset: the dataset, with shape (nframes, nCenters, nOfFeatures)
+    """
+    if key in SOAPoutContainer.keys():
+        if doOverride is False:
+            raise ValueError(
+                f"Are you sure that you want to override {SOAPoutContainer[key].name}?"
+            )
+        # doOverride is True and key in SOAPoutContainer.keys():
+        # check if deleting the dataset is necessary:
+        oldshape = SOAPoutContainer[key].shape
+        if oldshape[1] != nCenters or oldshape[2] != nOfFeatures:
+            del SOAPoutContainer[key]
+    if key not in SOAPoutContainer.keys():
+        SOAPoutContainer.create_dataset(
+            key,
+            (0, nCenters, nOfFeatures),
+            compression="gzip",
+            compression_opts=9,
+            chunks=(SOAPOutputChunkDim, nCenters, nOfFeatures),
+            maxshape=(None, nCenters, nOfFeatures),
+            dtype=numpy.dtype(useType),
+        )
+    SOAPout = SOAPoutContainer[key]
+    SOAPout.resize((nframes, nCenters, nOfFeatures))
+    return SOAPout
+
+
+def _saponifyWorker(
+    trajGroup: h5py.Group,
+    SOAPoutDataset: h5py.Dataset,
+    soapEngine: SOAPengineContainer,
+    SOAPOutputChunkDim: int = 100,
+    SOAPnJobs: int = 1,
+    verbose: bool = True,
+):
+    """Calculates the soap descriptor and store the result in the given dataset
+
+        The trajectory is read in blocks aligned to its chunks, each block
+        contains as many chunks as fit in `SOAPOutputChunkDim` frames (at
+        least one) and is calculated `SOAPOutputChunkDim` frames at a time
+
+    Args:
+        trajGroup (h5py.Group):
+            the group that contains the trajectory (must contain "Box",
+            "Trajectory" and "Types" datasets)
+        SOAPoutDataset (h5py.Dataset):
+            The preformed dataset for storing the SOAP results
+        soapEngine (SOAPengineContainer):
+            The soap engine already set up
+        SOAPOutputChunkDim (int, optional):
+            The number of frames calculated at once. Defaults to 100.
+        SOAPnJobs (int, optional):
+            the number of concurrent SOAP calculations (option passed to the
+            desired SOAP engine). Defaults to 1.
+        verbose (bool, optional):
+            if True the timings of the step by step operations are logged at
+            the INFO level, otherwise at the DEBUG level, see
+            :mod:`SOAPify.instrumentation`. Defaults to True.
+    """
+    symbols = trajGroup["Types"].asstr()[:]
+    _storeSOAPAttributes(SOAPoutDataset, soapEngine)
+    level = logging.INFO if verbose else logging.DEBUG
+    trajectory = trajGroup["Trajectory"]
+    nframes = len(trajectory)
+    readDim = SOAPOutputChunkDim
+    if trajectory.chunks is not None:
+        trajChunkDim = trajectory.chunks[0]
+        readDim = trajChunkDim * max(1, SOAPOutputChunkDim // trajChunkDim)
+
+    for readStart in range(0, nframes, readDim):
+        readEnd = min(readStart + readDim, nframes)
+        frames = slice(readStart, readEnd)
         # load in memory a chunk of data
-        atoms = HDF2ase(trajGroup, chunkTraj, chunkBox, symbols)
-        jobchunk = min(SOAPOutputChunkDim, len(atoms))
-        jobStart = 0
-        jobEnd = jobStart + jobchunk
-        while jobStart < len(atoms):
-            tStart = time.time()
-            frameStart = jobStart + chunkTraj[0].start
-            frameEnd = jobEnd + chunkTraj[0].start
-            if verbose:
-                print(f"working on frames: [{frameStart}:{frameEnd}]")
-            # TODO: dscribe1.2.1 return (nat,nsoap) instead of (1,nat,nsoap) with 1 frame input!
-            SOAPoutDataset[frameStart:frameEnd] = soapEngine(
-                atoms[jobStart:jobEnd],
-                positions=[soapEngine.centersMask] * jobchunk,
-                n_jobs=SOAPnJobs,
+        with timedStage(
+            "saponify",
+            "read",
+            readStart,
+            readEnd,
+            level=level,
+            dataset=SOAPoutDataset.name,
+        ) as stage:
+            atoms = HDF2ase(
+                trajGroup,
+                (frames, slice(None), slice(None)),
+                (frames, slice(0, 6, 1)),
+                symbols,
             )
-            tStop = time.time()
-            jobchunk = min(SOAPOutputChunkDim, len(atoms) - jobEnd)
-            jobStart = jobEnd
-            jobEnd = jobStart + jobchunk
-            if verbose:
-                print(f"delta create= {tStop-tStart}")
+            stage["bytes"] = sum(frame.positions.nbytes for frame in atoms)
+        for jobStart in range(0, len(atoms), SOAPOutputChunkDim):
+            _calculateAndStore(
+                SOAPoutDataset,
+                soapEngine,
+                atoms[jobStart : jobStart + SOAPOutputChunkDim],
+                readStart + jobStart,
+                SOAPnJobs,
+                level,
+            )
+
+
+def _calculateAndStore(
+    SOAPoutDataset: h5py.Dataset,
+    soapEngine: SOAPengineContainer,
+    atoms: "list[aseAtoms]",
+    frameStart: int,
+    SOAPnJobs: int,
+    level: int,
+) -> None:
+    """calculates the SOAP of the frames and writes them starting from `frameStart`
+
+    the "compute" and the "write" stages are sent to the instrumentation,
+    see :mod:`SOAPify.instrumentation`
+    """
+    frameEnd = frameStart + len(atoms)
+    name = SOAPoutDataset.name
+    with timedStage(
+        "saponify", "compute", frameStart, frameEnd, level=level, dataset=name
+    ) as stage:
+        # TODO: dscribe1.2.1 return (nat,nsoap) instead of (1,nat,nsoap) with 1 frame input!
+        fingerprints = soapEngine(
+            atoms,
+            positions=[soapEngine.centersMask] * len(atoms),
+            n_jobs=SOAPnJobs,
+        )
+        stage["bytes"] = fingerprints.nbytes
+    with timedStage(
+        "saponify",
+        "write",
+        frameStart,
+        frameEnd,
+        fingerprints.nbytes,
+        level=level,
+        dataset=name,
+    ):
+        SOAPoutDataset[frameStart:frameEnd] = fingerprints
 
 
 def _applySOAP(
@@ -103,7 +262,7 @@ def _applySOAP(
     SOAPoutContainer: h5py.Group,
     key: str,
     soapEngine: SOAPengineContainer,
-    SOAPOutputChunkDim: int = 100,
+    SOAPOutputChunkDim: "int|None" = None,
     SOAPnJobs: int = 1,
     doOverride: bool = False,
     verbose: bool = True,
@@ -121,55 +280,46 @@ def _applySOAP(
             the name of the dataset to be saved, if exist will be overidden
         soapEngine (SOAPengineContainer):
             the contained of the soap engine
-        SOAPOutputChunkDim (int, optional):
+        SOAPOutputChunkDim (int|None, optional):
             The chunk of trajectory that will be loaded in memory to be calculated,
             if key is a new dataset will also be the size of the main chunck of
-            data of the SOAP dataset . Defaults to 100.
+            data of the SOAP dataset, if None both are planned from the memory
+            budget (see :mod:`SOAPify.chunking`). Defaults to None.
         SOAPnJobs (int, optional):
             Number of concurrent SOAP calculations. Defaults to 1.
         doOverride (bool, optional):
             if False will raise and exception if the user ask to override an
             already existing DataSet. Defaults to False.
         verbose (bool, optional):
-            regulates the verbosity of the step by step operations.
-            Defaults to True.
+            if True the timings of the step by step operations are logged at
+            the INFO level, otherwise at the DEBUG level, see
+            :mod:`SOAPify.instrumentation`. Defaults to True.
         useType (str,optional):
             The precision used to store the data. Defaults to "float64".
     """
-    useType = numpy.dtype(useType)
-    nOfFeatures = soapEngine.features
     symbols = trajContainer["Types"].asstr()[:]
     nCenters = (
         len(symbols) if soapEngine.centersMask is None else len(soapEngine.centersMask)
     )
-
-    if key in SOAPoutContainer.keys():
-        if doOverride is False:
-            raise ValueError(
-                f"Are you sure that you want to override {SOAPoutContainer[key].name}?"
-            )
-        # doOverride is True and key in SOAPoutContainer.keys():
-        # check if deleting the dataset is necessary:
-        oldshape = SOAPoutContainer[key].shape
-        if oldshape[1] != nCenters or oldshape[2] != nOfFeatures:
-            del SOAPoutContainer[key]
-    if key not in SOAPoutContainer.keys():
-        SOAPoutContainer.create_dataset(
-            key,
-            (0, nCenters, nOfFeatures),
-            compression="gzip",
-            compression_opts=9,
-            chunks=(SOAPOutputChunkDim, nCenters, nOfFeatures),
-            maxshape=(None, nCenters, nOfFeatures),
-            dtype=useType,
-        )
-    SOAPout = SOAPoutContainer[key]
-    SOAPout.resize((len(trajContainer["Trajectory"]), nCenters, nOfFeatures))
+    nframes = len(trajContainer["Trajectory"])
+    writeChunkDim, computeChunkDim = _planSOAPChunks(
+        SOAPOutputChunkDim, nCenters, soapEngine.features, useType, nframes
+    )
+    SOAPout = _prepareSOAPDataset(
+        SOAPoutContainer,
+        key,
+        nframes,
+        nCenters,
+        soapEngine.features,
+        writeChunkDim,
+        doOverride,
+        useType,
+    )
     _saponifyWorker(
         trajContainer,
         SOAPout,
         soapEngine,
-        SOAPOutputChunkDim,
+        computeChunkDim,
         SOAPnJobs,
         verbose=verbose,
     )
@@ -181,7 +331,7 @@ def saponifyMultipleTrajectories(
     SOAPrcut: float,
     SOAPnmax: int,
     SOAPlmax: int,
-    SOAPOutputChunkDim: int = 100,
+    SOAPOutputChunkDim: "int|None" = None,
     SOAPnJobs: int = 1,
     SOAPatomMask: "list[str]" = None,
     centersMask: Iterable = None,
@@ -218,9 +368,10 @@ def saponifyMultipleTrajectories(
         SOAPlmax (int)
             The maximum degree of spherical harmonics (option passed to the
             desired SOAP engine). Defaults to 8.
-        SOAPOutputChunkDim (int, optional)
-            The dimension of the chunck of data in the SOAP results dataset.
-            Defaults to 100.
+        SOAPOutputChunkDim (int|None, optional)
+            The dimension of the chunck of data in the SOAP results dataset,
+            if None is planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
         SOAPnJobs (int, optional)
             the number of concurrent SOAP calculations (option passed to the
             desired SOAP engine). Defaults to 1.
@@ -243,8 +394,9 @@ def saponifyMultipleTrajectories(
             if False will raise and exception if the user ask to override an
             already existing DataSet. Defaults to False.
         verbose (bool, optional):
-            regulates the verbosity of the step by step operations.
-            Defaults to True.
+            if True the timings of the step by step operations are logged at
+            the INFO level, otherwise at the DEBUG level, see
+            :mod:`SOAPify.instrumentation`. Defaults to True.
         useType (str,optional):
             The precision used to store the data. Defaults to "float64".
     """
@@ -275,7 +427,7 @@ def saponifyTrajectory(
     SOAPrcut: float,
     SOAPnmax: int,
     SOAPlmax: int,
-    SOAPOutputChunkDim: int = 100,
+    SOAPOutputChunkDim: "int|None" = None,
     SOAPnJobs: int = 1,
     SOAPatomMask: str = None,
     centersMask: Iterable = None,
@@ -305,9 +457,10 @@ def saponifyTrajectory(
         exportDatasetName (str):
             the name of the dataset that will contain the SOAP results,
             it will be saved in the group called "SOAP"
-        SOAPOutputChunkDim (int, optional):
-            The dimension of the chunck of data in the SOAP results dataset.
-            Defaults to 100.
+        SOAPOutputChunkDim (int|None, optional):
+            The dimension of the chunck of data in the SOAP results dataset,
+            if None is planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
         SOAPnJobs (int, optional):
             the number of concurrent SOAP calculations (option passed to the
             desired SOAP engine). Defaults to 1.
@@ -336,14 +489,21 @@ def saponifyTrajectory(
             if False will raise and exception if the user ask to override an
             already existing DataSet. Defaults to False.
         verbose (bool, optional):
-            regulates the verbosity of the step by step operations.
-            Defaults to True.
+            if True the timings of the step by step operations are logged at
+            the INFO level, otherwise at the DEBUG level, see
+            :mod:`SOAPify.instrumentation`. Defaults to True.
         useType (str,optional):
             The precision used to store the data. Defaults to "float64".
     """
     if isTrajectoryGroup(trajContainer):
-        print(f'using "{useSoapFrom}" to calculate SOAP for "{trajContainer.name}"')
-        print("extra SOAP arguments:", SOAPkwargs)
+        logger.log(
+            logging.INFO if verbose else logging.DEBUG,
+            'using "%s" to calculate SOAP for "%s", extra SOAP arguments: %s',
+            useSoapFrom,
+            trajContainer.name,
+            SOAPkwargs,
+            extra={"soapify": dict(engine=useSoapFrom, SOAPkwargs=SOAPkwargs)},
+        )
         symbols = trajContainer["Types"].asstr()[:]
         soapEngine = getSoapEngine(
             atomNames=symbols,
@@ -370,3 +530,405 @@ def saponifyTrajectory(
         )
     else:
         raise ValueError("saponify: The input object is not a trajectory group.")
+
+
+def _textSOAPWorker(
+    first: int,
+    types: numpy.ndarray,
+    coordinates: numpy.ndarray,
+    boxes: numpy.ndarray,
+    userBoxes: "numpy.ndarray|None",
+    engineSettings: dict,
+    SOAPnJobs: int,
+    useType,
+) -> numpy.ndarray:
+    """calculates the SOAP fingerprints of a block of frames of a text trajectory
+
+        this is an helper function for :func:`saponifyTextTrajectory`
+
+    Returns:
+        numpy.ndarray: the fingerprints, with shape (nframes, nCenters, nfeatures)
+    """
+    types = types.tolist()
+    soapEngine = getSoapEngine(atomNames=types, **engineSettings)
+    boxes = getTextTrajectoryBoxes(boxes, userBoxes, first)
+    atoms = [
+        aseAtoms(symbols=types, positions=frame, cell=box, pbc=True)
+        for frame, box in zip(coordinates, boxes)
+    ]
+    return soapEngine(
+        atoms, positions=[soapEngine.centersMask] * len(atoms), n_jobs=SOAPnJobs
+    ).astype(useType, copy=False)
+
+
+def saponifyTextTrajectory(
+    filename: str,
+    SOAPoutContainer: "h5py.Group|h5py.File",
+    exportDatasetName: str,
+    SOAPrcut: float,
+    SOAPnmax: int,
+    SOAPlmax: int,
+    fileFormat: "str|None" = None,
+    boxes: "numpy.ndarray|None" = None,
+    SOAPOutputChunkDim: "int|None" = None,
+    SOAPnJobs: int = 1,
+    SOAPatomMask: str = None,
+    centersMask: Iterable = None,
+    SOAP_respectPBC: bool = True,
+    SOAPkwargs: dict = None,
+    useSoapFrom: KNOWNSOAPENGINES = "dscribe",
+    doOverride: bool = False,
+    useType="float64",
+    n_jobs: int = 1,
+    executor: "Executor|None" = None,
+):
+    """Calculates the SOAP fingerprints directly from an xyz or a LAMMPS dump file
+
+    The frames are indexed with :func:`SOAPify.HDF5er.getFrameOffsets` and the
+    blocks of `SOAPOutputChunkDim` frames are parsed and calculated in parallel
+    by `n_jobs` processes, each one reading directly its frames from the file;
+    this process is the only one that writes in the hdf5 file. The result is
+    the same of importing the trajectory with :func:`SOAPify.HDF5er.text2HDF5`
+    and calling :func:`saponifyTrajectory`
+
+    Args:
+        filename (str):
+            the name of the xyz or LAMMPS dump file
+        SOAPoutContainer (h5py.Group|h5py.File):
+            The file/group that will store the SOAP results
+        exportDatasetName (str):
+            the name of the dataset that will contain the SOAP results
+        SOAPrcut (float):
+            The cutoff for local region in angstroms. Should be bigger than 1
+            angstrom (option passed to the desired SOAP engine).
+        SOAPnmax (int):
+            The number of radial basis functions (option passed to the desired
+            SOAP engine).
+        SOAPlmax (int):
+            The maximum degree of spherical harmonics (option passed to the
+            desired SOAP engine).
+        fileFormat (str|None, optional):
+            "xyz" or "lammpsdump", if None is guessed from the extension.
+            Defaults to None.
+        boxes (numpy.ndarray|None, optional):
+            the box of the frames, see :func:`SOAPify.HDF5er.textTrajectory2HDF5`.
+            Defaults to None.
+        SOAPOutputChunkDim (int|None, optional):
+            The number of frames in each block, and the dimension of the chunck
+            of data in the SOAP results dataset; if None they are planned from
+            the memory budget shared by the blocks in flight (see
+            :mod:`SOAPify.chunking`). Defaults to None.
+        SOAPnJobs (int, optional):
+            the number of concurrent SOAP calculations in each process (option
+            passed to the desired SOAP engine). Defaults to 1.
+        SOAPatomMask (str, optional):
+            the symbols of the atoms whose SOAP fingerprint will be calculated
+            (option passed to getSoapEngine). Defaults to None.
+        centersMask (Iterable, optional):
+            the indexes of the atoms whose SOAP fingerprint will be calculated
+            (option passed getSoapEngine). Defaults to None.
+        SOAP_respectPBC (bool, optional):
+            Determines whether the system is considered to be periodic
+            (option passed to the desired SOAP engine). Defaults to True.
+        SOAPkwargs (dict, optional):
+            additional keyword arguments to be passed to the SOAP engine.
+            Defaults to {}.
+        useSoapFrom (KNOWNSOAPENGINES, optional):
+            This string determines the selected SOAP engine for the calculations.
+            Defaults to "dscribe".
+        doOverride (bool, optional):
+            if False will raise and exception if the user ask to override an
+            already existing DataSet. Defaults to False.
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+        n_jobs (int, optional):
+            the number of processes used if `executor` is None. If less than 1
+            uses all of the available cpus. Defaults to 1.
+        executor (concurrent.futures.Executor, optional):
+            the process executor that calculates the fingerprints.
+            Defaults to None.
+    """
+    offsets = getFrameOffsets(filename, fileFormat)
+    symbols = readTextTrajectoryFrames(
+        filename, 0, 1, offsets=offsets, fileFormat=fileFormat
+    )[0].tolist()
+    engineSettings = dict(
+        SOAPrcut=SOAPrcut,
+        SOAPnmax=SOAPnmax,
+        SOAPlmax=SOAPlmax,
+        SOAPatomMask=SOAPatomMask,
+        centersMask=centersMask,
+        SOAP_respectPBC=SOAP_respectPBC,
+        SOAPkwargs=SOAPkwargs,
+        useSoapFrom=useSoapFrom,
+    )
+    soapEngine = getSoapEngine(atomNames=symbols, **engineSettings)
+    nCenters = (
+        len(symbols) if soapEngine.centersMask is None else len(soapEngine.centersMask)
+    )
+    nframes = len(offsets) - 1
+    writeChunkDim = blockDim = SOAPOutputChunkDim
+    if SOAPOutputChunkDim is None:
+        # up to two blocks per process are in memory at the same time
+        blocksInFlight = 2 * (os.cpu_count() if n_jobs < 1 else n_jobs)
+        plan = planChunks(
+            nCenters,
+            soapEngine.features,
+            useType,
+            nframes=nframes,
+            memoryBudget=max(1, getMemoryBudget() // blocksInFlight),
+        )
+        writeChunkDim, blockDim = plan.write, plan.compute
+    SOAPout = _prepareSOAPDataset(
+        SOAPoutContainer,
+        exportDatasetName,
+        nframes,
+        nCenters,
+        soapEngine.features,
+        writeChunkDim,
+        doOverride,
+        useType,
+    )
+    _storeSOAPAttributes(SOAPout, soapEngine)
+    for first, last, fingerprints in mapTextTrajectoryBlocks(
+        _textSOAPWorker,
+        filename,
+        offsets,
+        blockDim,
+        fileFormat,
+        workerArgs=(boxes, engineSettings, SOAPnJobs, useType),
+        n_jobs=n_jobs,
+        executor=executor,
+    ):
+        SOAPout[first:last] = fingerprints
+
+
+def _framesChunks(
+    frames: "mdaUniverse|mdaAtomGroup|Iterable[aseAtoms]",
+    chunkDim: int,
+    trajslice: slice,
+):
+    """Iterates over the frames of a Universe or of an ase trajectory in chunks
+
+        this is an helper function for :func:`saponifyFrames`
+
+    Yields:
+        list[ase.Atoms]: the frames of the chunk
+    """
+    if isinstance(frames, (mdaUniverse, mdaAtomGroup)):
+        symbols = frames.atoms.types.tolist()
+        for _, _, boxes, coordinates in _trajectoryChunks(frames, chunkDim, trajslice):
+            yield [
+                aseAtoms(symbols=symbols, positions=frame, cell=box, pbc=True)
+                for frame, box in zip(coordinates, boxes)
+            ]
+        return
+    if hasattr(frames, "__len__") and hasattr(frames, "__getitem__"):
+        selected = (frames[i] for i in range(len(frames))[trajslice])
+    else:
+        selected = islice(frames, trajslice.start, trajslice.stop, trajslice.step)
+    while True:
+        chunk = list(islice(selected, chunkDim))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _timedChunks(chunks: "Iterable[list[aseAtoms]]", level: int, **extra):
+    """iterates over `chunks` sending the "read" stage to the instrumentation
+
+    Yields:
+        list[ase.Atoms]: the frames of the chunk
+    """
+    frameEnd = 0
+    while True:
+        tStart = time.perf_counter()
+        atoms = next(chunks, None)
+        if atoms is None:
+            return
+        frameStart = frameEnd
+        frameEnd = frameStart + len(atoms)
+        emitRecord(
+            "saponify",
+            "read",
+            frameStart,
+            frameEnd,
+            time.perf_counter() - tStart,
+            sum(frame.positions.nbytes for frame in atoms),
+            level,
+            **extra,
+        )
+        yield atoms
+
+
+def _firstFrameSymbols(
+    frames: "mdaUniverse|mdaAtomGroup|Iterable[aseAtoms]", trajslice: slice
+) -> "tuple[list[str],mdaUniverse|mdaAtomGroup|Iterable[aseAtoms],slice]":
+    """returns the chemical symbols of the first frame, without losing it
+
+        this is an helper function for :func:`saponifyFrames`, the iterators
+        of ase.Atoms are sliced and the first frame is put back in front of
+        them, so they are returned with `slice(None)`
+
+    Raises:
+        ValueError: if there are no frames
+
+    Returns:
+        tuple: the symbols, the frames and the slice of the frames to read
+    """
+    if isinstance(frames, (mdaUniverse, mdaAtomGroup)):
+        if _trajectoryLenght(frames, trajslice) == 0:
+            raise ValueError("saponify: there are no frames to calculate.")
+        return frames.atoms.types.tolist(), frames, trajslice
+    if hasattr(frames, "__len__") and hasattr(frames, "__getitem__"):
+        indexes = range(len(frames))[trajslice]
+        if len(indexes) == 0:
+            raise ValueError("saponify: there are no frames to calculate.")
+        return frames[indexes[0]].get_chemical_symbols(), frames, trajslice
+    frames = islice(frames, trajslice.start, trajslice.stop, trajslice.step)
+    firstFrame = next(frames, None)
+    if firstFrame is None:
+        raise ValueError("saponify: there are no frames to calculate.")
+    return firstFrame.get_chemical_symbols(), chain((firstFrame,), frames), slice(None)
+
+
+def _framesLenght(
+    frames: "mdaUniverse|mdaAtomGroup|Iterable[aseAtoms]", trajslice: slice
+) -> "int|None":
+    """returns the number of frames that will be read, if it is known"""
+    if isinstance(frames, (mdaUniverse, mdaAtomGroup)):
+        return _trajectoryLenght(frames, trajslice)
+    if hasattr(frames, "__len__") and hasattr(frames, "__getitem__"):
+        return len(range(len(frames))[trajslice])
+    return None
+
+
+def saponifyFrames(
+    frames: "mdaUniverse|mdaAtomGroup|Iterable[aseAtoms]",
+    SOAPoutContainer: "h5py.Group|h5py.File",
+    exportDatasetName: str,
+    SOAPrcut: float,
+    SOAPnmax: int,
+    SOAPlmax: int,
+    trajslice: slice = slice(None),
+    SOAPOutputChunkDim: "int|None" = None,
+    SOAPnJobs: int = 1,
+    SOAPatomMask: str = None,
+    centersMask: Iterable = None,
+    SOAP_respectPBC: bool = True,
+    SOAPkwargs: dict = None,
+    useSoapFrom: KNOWNSOAPENGINES = "dscribe",
+    doOverride: bool = False,
+    verbose: bool = True,
+    useType="float64",
+):
+    """Calculates the SOAP fingerprints of the frames of a Universe or of an ase trajectory
+
+    The frames are streamed in chunks of `SOAPOutputChunkDim` directly to the
+    SOAP engine, without storing the trajectory in an hdf5 file: the result is
+    the same of exporting the trajectory with
+    :func:`SOAPify.HDF5er.universe2HDF5` and calling :func:`saponifyTrajectory`.
+    If the number of frames is not known in advance the dataset grows while the
+    frames are calculated.
+
+    `SOAPatomMask` and `centersMask` are mutually exclusive (see
+    :func:`SOAPify.engine.getSoapEngine`)
+
+    Args:
+        frames (MDAnalysis.Universe|MDAnalysis.AtomGroup|Iterable[ase.Atoms]):
+            the source of the frames: an MDAnalysis container (the types of the
+            atoms are used as the chemical symbols) or a list or an iterator of
+            ase.Atoms, like the ones from `ase.io.iread`, with the same atoms
+        SOAPoutContainer (h5py.Group|h5py.File):
+            The file/group that will store the SOAP results
+        exportDatasetName (str):
+            the name of the dataset that will contain the SOAP results
+        SOAPrcut (float):
+            The cutoff for local region in angstroms. Should be bigger than 1
+            angstrom (option passed to the desired SOAP engine).
+        SOAPnmax (int):
+            The number of radial basis functions (option passed to the desired
+            SOAP engine).
+        SOAPlmax (int):
+            The maximum degree of spherical harmonics (option passed to the
+            desired SOAP engine).
+        trajslice (slice, optional):
+            the frames to calculate, the iterators of ase.Atoms do not support
+            negative values. Defaults to slice(None).
+        SOAPOutputChunkDim (int|None, optional):
+            The number of frames loaded in memory at the same time, and the
+            dimension of the chunck of data in the SOAP results dataset, if
+            None both are planned from the memory budget (see
+            :mod:`SOAPify.chunking`). Defaults to None.
+        SOAPnJobs (int, optional):
+            the number of concurrent SOAP calculations (option passed to the
+            desired SOAP engine). Defaults to 1.
+        SOAPatomMask (str, optional):
+            the symbols of the atoms whose SOAP fingerprint will be calculated
+            (option passed to getSoapEngine). Defaults to None.
+        centersMask (Iterable, optional):
+            the indexes of the atoms whose SOAP fingerprint will be calculated
+            (option passed getSoapEngine). Defaults to None.
+        SOAP_respectPBC (bool, optional):
+            Determines whether the system is considered to be periodic
+            (option passed to the desired SOAP engine). Defaults to True.
+        SOAPkwargs (dict, optional):
+            additional keyword arguments to be passed to the SOAP engine.
+            Defaults to {}.
+        useSoapFrom (KNOWNSOAPENGINES, optional):
+            This string determines the selected SOAP engine for the calculations.
+            Defaults to "dscribe".
+        doOverride (bool, optional):
+            if False will raise and exception if the user ask to override an
+            already existing DataSet. Defaults to False.
+        verbose (bool, optional):
+            if True the timings of the step by step operations are logged at
+            the INFO level, otherwise at the DEBUG level, see
+            :mod:`SOAPify.instrumentation`. Defaults to True.
+        useType (str,optional):
+            The precision used to store the data. Defaults to "float64".
+    """
+    level = logging.INFO if verbose else logging.DEBUG
+    symbols, frames, trajslice = _firstFrameSymbols(frames, trajslice)
+    soapEngine = getSoapEngine(
+        atomNames=symbols,
+        SOAPrcut=SOAPrcut,
+        SOAPnmax=SOAPnmax,
+        SOAPlmax=SOAPlmax,
+        SOAPatomMask=SOAPatomMask,
+        centersMask=centersMask,
+        SOAP_respectPBC=SOAP_respectPBC,
+        SOAPkwargs=SOAPkwargs,
+        useSoapFrom=useSoapFrom,
+    )
+    nCenters = (
+        len(symbols) if soapEngine.centersMask is None else len(soapEngine.centersMask)
+    )
+    nframes = _framesLenght(frames, trajslice)
+    writeChunkDim, computeChunkDim = _planSOAPChunks(
+        SOAPOutputChunkDim, nCenters, soapEngine.features, useType, nframes
+    )
+    SOAPout = _prepareSOAPDataset(
+        SOAPoutContainer,
+        exportDatasetName,
+        computeChunkDim if nframes is None else nframes,
+        nCenters,
+        soapEngine.features,
+        writeChunkDim,
+        doOverride,
+        useType,
+    )
+    chunks = _timedChunks(
+        _framesChunks(frames, computeChunkDim, trajslice),
+        level,
+        dataset=SOAPout.name,
+    )
+    _storeSOAPAttributes(SOAPout, soapEngine)
+    frameEnd = 0
+    for atoms in chunks:
+        frameStart = frameEnd
+        frameEnd = frameStart + len(atoms)
+        if frameEnd > len(SOAPout):
+            SOAPout.resize(max(frameEnd, 2 * len(SOAPout)), axis=0)
+        _calculateAndStore(SOAPout, soapEngine, atoms, frameStart, SOAPnJobs, level)
+    SOAPout.resize(frameEnd, axis=0)
@@ -0,0 +1,224 @@
+"""Submodule that shares a block of SOAP fingerprints between processes
+
+A :class:`SharedSOAPBlock` loads the filled (see
+:func:`SOAPify.utils.fillSOAPVectorFromdscribe`) and normalized SOAP
+fingerprints of a dataset in a :mod:`multiprocessing.shared_memory` block only
+once: the worker processes receive the picklable :attr:`SharedSOAPBlock.handle`
+and get a read-only view on the same memory with :func:`attachSharedSOAP`,
+without copying the fingerprints.
+
+The views can be passed directly to :func:`SOAPify.analysis.timeSOAPsimple`,
+:func:`SOAPify.analysis.getTimeSOAPSimple` and
+:func:`SOAPify.classify.getDistancesFromRef` (with `doNormalize=False`).
+
+The block is created with::
+
+    with SharedSOAPBlock.fromDataset(soapDataset) as block:
+        executor.submit(worker, block.handle, ...)
+
+and each worker attaches to it with::
+
+    def worker(handle, ...):
+        with attachSharedSOAP(handle) as soap:
+            return getTimeSOAPSimple(soap)
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+import numpy
+import h5py
+
+from .utils import getSOAPSettings, normalizeArray, fillSOAPVectorFromdscribe
+from .utils import _filledSOAPLength
+from .HDF5er import getAtomsSelection, getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
+
+__all__ = ["SharedSOAPHandle", "SharedSOAPBlock", "attachSharedSOAP"]
+
+
+@dataclass(frozen=True)
+class SharedSOAPHandle:
+    """The picklable information needed to attach to a :class:`SharedSOAPBlock`"""
+
+    name: str  #: the name of the shared memory block
+    shape: tuple  #: the shape of the fingerprints, (nframes, natoms, nfeatures)
+    dtype: str  #: the dtype of the fingerprints
+
+
+def _readOnlyView(handle: SharedSOAPHandle, buffer) -> numpy.ndarray:
+    view = numpy.ndarray(handle.shape, dtype=handle.dtype, buffer=buffer)
+    view.flags.writeable = False
+    return view
+
+
+class SharedSOAPBlock:
+    """A block of SOAP fingerprints stored in shared memory
+
+    The process that creates the block owns the shared memory: it must call
+    :meth:`close` (or use the block as a context manager) when the workers
+    have finished. The views obtained from :attr:`array` must not be used
+    after closing the block.
+    """
+
+    def __init__(self, shape: tuple, dtype="float64") -> None:
+        """Allocates an empty block, see :meth:`fromArray` and :meth:`fromDataset`
+
+        Args:
+            shape (tuple): the shape of the block, (nframes, natoms, nfeatures)
+            dtype (str|numpy.dtype, optional):
+                the dtype of the block. Defaults to "float64".
+        """
+        dtype = numpy.dtype(dtype)
+        shape = tuple(int(dim) for dim in shape)
+        nbytes = int(numpy.prod(shape, dtype=numpy.int64)) * dtype.itemsize
+        self._shm = shared_memory.SharedMemory(create=True, size=max(1, nbytes))
+        self._handle = SharedSOAPHandle(self._shm.name, shape, dtype.str)
+        # the only writeable view, used to fill the block
+        self._data = numpy.ndarray(shape, dtype=dtype, buffer=self._shm.buf)
+
+    @classmethod
+    def fromArray(cls, soap: numpy.ndarray) -> "SharedSOAPBlock":
+        """Copies the given array in a new shared block
+
+        Args:
+            soap (numpy.ndarray): the fingerprints, with shape (nframes, natoms, nfeatures)
+
+        Returns:
+            SharedSOAPBlock: the block
+        """
+        soap = numpy.asarray(soap)
+        block = cls(soap.shape, soap.dtype)
+        block._data[:] = soap
+        return block
+
+    @classmethod
+    def fromDataset(
+        cls,
+        soapDataset: h5py.Dataset,
+        frames: slice = slice(None),
+        atomsSelection: "None|slice|list[int]|numpy.ndarray" = None,
+        doNormalize: bool = True,
+    ) -> "SharedSOAPBlock":
+        """Loads the filled and normalized fingerprints of a dataset in a new block
+
+            The dataset is read, filled with
+            :func:`SOAPify.utils.fillSOAPVectorFromdscribe` and normalized with
+            :func:`SOAPify.utils.normalizeArray` in chunks of frames planned
+            from the memory budget (see :mod:`SOAPify.chunking`): only the
+            shared block has the size of the whole selection.
+
+        Args:
+            soapDataset (h5py.Dataset):
+                the dataset with the SOAP fingerprints
+            frames (slice, optional):
+                the frames to load, the step must be positive.
+                Defaults to slice(None).
+            atomsSelection (None|slice|list[int]|numpy.ndarray, optional):
+                the atoms to load, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+                Defaults to None (all the atoms).
+            doNormalize (bool, optional):
+                if False the fingerprints are only filled. Defaults to True.
+
+        Returns:
+            SharedSOAPBlock: the block, with shape (nframes, natoms, nfeatures)
+        """
+        fillSettings = getSOAPSettings(soapDataset)
+        framesIDs = range(*frames.indices(soapDataset.shape[0]))
+        if framesIDs.step < 0:
+            raise ValueError("the frames must be read with a positive step")
+        atoms = getAtomsSelection(soapDataset.shape[1], atomsSelection)
+        nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+        nfeatures = _filledSOAPLength(**fillSettings)
+        chunks = getattr(soapDataset, "chunks", None)
+        chunkDim = planChunks(
+            nat,
+            nfeatures,
+            soapDataset.dtype,
+            nInputFeatures=soapDataset.shape[2],
+            nframes=len(framesIDs),
+            alignTo=chunks[0] if chunks is not None and framesIDs.step == 1 else None,
+        ).compute
+
+        block = cls((len(framesIDs), nat, nfeatures), numpy.float64)
+        try:
+            for start in range(0, len(framesIDs), chunkDim):
+                chunkIDs = framesIDs[start : start + chunkDim]
+                first, last = chunkIDs[0], chunkIDs[-1] + 1
+                with timedStage("sharedSOAP", "read", first, last) as stage:
+                    data = soapDataset[
+                        slice(chunkIDs.start, last, chunkIDs.step), atoms
+                    ]
+                    stage["bytes"] = data.nbytes
+                with timedStage("sharedSOAP", "fill", first, last) as stage:
+                    # the chunk is filled and normalized directly in the block
+                    data = fillSOAPVectorFromdscribe(
+                        data,
+                        **fillSettings,
+                        out=block._data[start : start + len(chunkIDs)],
+                    )
+                    if doNormalize:
+                        normalizeArray(data, out=data)
+                    stage["bytes"] = data.nbytes
+        except BaseException:
+            block.close()
+            raise
+        return block
+
+    @property
+    def handle(self) -> SharedSOAPHandle:
+        """The picklable handle to pass to :func:`attachSharedSOAP`"""
+        return self._handle
+
+    @property
+    def shape(self) -> tuple:
+        """The shape of the block"""
+        return self._handle.shape
+
+    @property
+    def dtype(self) -> numpy.dtype:
+        """The dtype of the block"""
+        return numpy.dtype(self._handle.dtype)
+
+    @property
+    def array(self) -> numpy.ndarray:
+        """A read-only view of the block in this process"""
+        if self._data is None:
+            raise ValueError("the shared block has been closed")
+        return _readOnlyView(self._handle, self._shm.buf)
+
+    def close(self) -> None:
+        """Releases and destroys the shared memory"""
+        if self._data is None:
+            return
+        self._data = None
+        try:
+            self._shm.close()
+        finally:
+            self._shm.unlink()
+
+    def __enter__(self) -> "SharedSOAPBlock":
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+@contextmanager
+def attachSharedSOAP(handle: SharedSOAPHandle):
+    """Attaches to a :class:`SharedSOAPBlock` created by another process
+
+        The view must not be used after the end of the `with` block: copy the
+        results that must outlive it
+
+    Args:
+        handle (SharedSOAPHandle): the handle of the block
+
+    Yields:
+        numpy.ndarray: a read-only view of the fingerprints
+    """
+    shm = shared_memory.SharedMemory(name=handle.name)
+    try:
+        yield _readOnlyView(handle, shm.buf)
+    finally:
+        shm.close()
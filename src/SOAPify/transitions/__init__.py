@@ -1,14 +1,22 @@
 """Simple submodule for generating trasition matrices from SOAPclassification
 Author: Daniele Rapetti"""
+from concurrent.futures import Executor
 import numpy
+import scipy.sparse
+import scipy.sparse.linalg
 
 from ..classify import SOAPclassification
 from .tracker import *
+from .tracker import _countTransitions
+from .online import *
 
 
 def transitionMatrixFromSOAPClassification(
-    data: SOAPclassification, stride: int = 1, window: "int|None" = None
-) -> "numpy.ndarray[float]":
+    data: SOAPclassification,
+    stride: int = 1,
+    window: "int|None" = None,
+    sparse: bool = False,
+) -> "numpy.ndarray[float]|scipy.sparse.csr_matrix":
     """Generates the unnormalized matrix of the transitions
 
         see :func:`calculateTransitionMatrix` for a detailed description of an
@@ -25,8 +33,12 @@ def transitionMatrixFromSOAPClassification(
         window (int):
             the dimension of the windows between each state confrontations.
             Defaults to None.
+        sparse (bool, optional):
+            if True the matrix is returned as a `scipy.sparse.csr_matrix`, useful
+            when the classification has a lot of states. Defaults to False.
     Returns:
-        numpy.ndarray[float]: the unnormalized matrix of the transitions
+        numpy.ndarray[float]|scipy.sparse.csr_matrix:
+            the unnormalized matrix of the transitions
     """
     if window is None:
         window = stride
@@ -34,43 +46,266 @@ def transitionMatrixFromSOAPClassification(
         raise ValueError("the window must be bigger than the stride")
     if window > data.references.shape[0]:
         raise ValueError("stride and window must be smaller than simulation lenght")
-    nframes = len(data.references)
-    nat = len(data.references[0])
+    references = numpy.asarray(data.references)
+    nframes = len(references)
 
-    nclasses = len(data.legend)
-    transMat = numpy.zeros((nclasses, nclasses), dtype=numpy.float64)
+    transitionFrames = numpy.arange(window, nframes, stride)
+    return _countTransitions(
+        references[transitionFrames - window],
+        references[transitionFrames],
+        len(data.legend),
+        sparse=sparse,
+    )
 
-    for frameID in range(window, nframes, stride):
-        for atomID in range(0, nat):
-            classFrom = data.references[frameID - window][atomID]
-            classTo = data.references[frameID][atomID]
-            transMat[classFrom, classTo] += 1
-    return transMat
 
-
-def normalizeMatrixByRow(transMat: "numpy.ndarray[float]") -> "numpy.ndarray[float]":
+def normalizeMatrixByRow(
+    transMat: "numpy.ndarray[float]|scipy.sparse.spmatrix",
+) -> "numpy.ndarray[float]|scipy.sparse.csr_matrix":
     """Normalizes a transition matrix by row
 
         The matrix is normalized with the criterion that the sum of each
-        **row** is `1`
+        **row** is `1`.
+        If an array with more than two dimensions is passed, it is treated as a
+        stack of matrices and each of them is normalized by row.
+        A sparse matrix is normalized without converting it to a dense one
 
     Args:
-        numpy.ndarray[float]: the unnormalized matrix of the transitions
+        numpy.ndarray[float]|scipy.sparse.spmatrix:
+            the unnormalized matrix of the transitions
 
     Returns:
-        numpy.ndarray[float]: the normalized matrix of the transitions
+        numpy.ndarray[float]|scipy.sparse.csr_matrix:
+            the normalized matrix of the transitions
     """
-    toRet = transMat.copy()
-    for row in range(transMat.shape[0]):
-        rowSum = numpy.sum(toRet[row, :])
-        if rowSum != 0:
-            toRet[row, :] /= rowSum
-    return toRet
+    if scipy.sparse.issparse(transMat):
+        rowSums = numpy.asarray(transMat.sum(axis=1), dtype=numpy.float64).reshape(-1)
+        rowSums[rowSums == 0] = 1
+        return scipy.sparse.csr_matrix(scipy.sparse.diags(1.0 / rowSums) @ transMat)
+    rowSums = numpy.sum(transMat, axis=-1, keepdims=True)
+    rowSums[rowSums == 0] = 1
+    return transMat / rowSums
 
 
-def transitionMatrixFromSOAPClassificationNormalized(
-    data: SOAPclassification, stride: int = 1, window: "int|None" = None
+def _eigenSystem(
+    transMat: "numpy.ndarray[float]|scipy.sparse.spmatrix", nEigen: "int|None"
+) -> "tuple[numpy.ndarray, numpy.ndarray]":
+    """Calculates the eigenvalues and the left eigenvectors of a transition matrix
+
+        this is an helper function for :func:`stationaryDistribution` and
+        :func:`impliedTimescales`. Sparse matrices are solved with the ARPACK
+        solver if the asked number of eigenvalues allows it
+
+    Args:
+        transMat (numpy.ndarray[float]|scipy.sparse.spmatrix):
+            the normalized matrix of the transitions
+        nEigen (int|None):
+            the number of eigenvalues to calculate, if None calculates all of them
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray]:
+            the eigenvalues, sorted by decreasing modulus, and the left
+            eigenvectors, by column
+    """
+    nclasses = transMat.shape[0]
+    if nEigen is None:
+        nEigen = nclasses
+    if scipy.sparse.issparse(transMat) and nEigen < nclasses - 1:
+        eigenValues, eigenVectors = scipy.sparse.linalg.eigs(
+            transMat.T.astype(numpy.float64), k=nEigen, which="LM"
+        )
+    else:
+        if scipy.sparse.issparse(transMat):
+            transMat = transMat.toarray()
+        eigenValues, eigenVectors = numpy.linalg.eig(numpy.transpose(transMat))
+    order = numpy.argsort(-numpy.abs(eigenValues), kind="stable")[:nEigen]
+    return eigenValues[order], eigenVectors[:, order]
+
+
+def stationaryDistribution(
+    transMat: "numpy.ndarray[float]|scipy.sparse.spmatrix",
 ) -> "numpy.ndarray[float]":
+    """Calculates the stationary distribution of the given transition matrix
+
+        The stationary distribution is the left eigenvector of the row-normalized
+        transition matrix with eigenvalue `1`, normalized to sum to `1`.
+        The matrix can be dense or sparse and is normalized by row before the
+        calculation
+
+    Args:
+        transMat (numpy.ndarray[float]|scipy.sparse.spmatrix):
+            the matrix of the transitions
+
+    Returns:
+        numpy.ndarray[float]: the population of each state at equilibrium
+    """
+    _, eigenVectors = _eigenSystem(normalizeMatrixByRow(transMat), 1)
+    distribution = numpy.abs(numpy.real(eigenVectors[:, 0]))
+    return distribution / numpy.sum(distribution)
+
+
+def impliedTimescales(
+    transMat: "numpy.ndarray[float]|scipy.sparse.spmatrix",
+    lagTime: float = 1.0,
+    nTimescales: "int|None" = None,
+) -> "numpy.ndarray[float]":
+    r"""Calculates the implied timescales of the given transition matrix
+
+        The implied timescales are :math:`t_i = -\tau / \ln\left|\lambda_i\right|`,
+        where :math:`\tau` is the lag time of the matrix and :math:`\lambda_i`
+        are its eigenvalues, sorted by decreasing modulus, skipping the
+        stationary one.
+        The matrix can be dense or sparse and is normalized by row before the
+        calculation
+
+    Args:
+        transMat (numpy.ndarray[float]|scipy.sparse.spmatrix):
+            the matrix of the transitions
+        lagTime (float, optional):
+            the lag time used to calculate the matrix, usually the window.
+            Defaults to 1.0.
+        nTimescales (int|None, optional):
+            the number of timescales to calculate, if None calculates all of
+            them. Defaults to None.
+
+    Returns:
+        numpy.ndarray[float]: the implied timescales, from the slowest
+    """
+    nEigen = None if nTimescales is None else nTimescales + 1
+    eigenValues, _ = _eigenSystem(normalizeMatrixByRow(transMat), nEigen)
+    with numpy.errstate(divide="ignore"):
+        return -lagTime / numpy.log(numpy.abs(eigenValues[1:]))
+
+
+def transitionMatrixBlocksFromSOAPClassification(
+    data: SOAPclassification,
+    nTimeBlocks: int = 1,
+    nAtomBlocks: int = 1,
+    stride: int = 1,
+    window: "int|None" = None,
+) -> "numpy.ndarray[float]":
+    """Generates the unnormalized matrices of the transitions of blocks of the
+    classification
+
+        The transitions counted by :func:`transitionMatrixFromSOAPClassification`
+        are split in `nTimeBlocks` consecutive blocks of transitions and in
+        `nAtomBlocks` blocks of consecutive atoms, and the count matrix of each
+        block is calculated in a single pass over the classification.
+        The sum of the matrices of all the blocks is the unnormalized matrix of
+        the transitions of the whole classification
+
+    Args:
+        data (SOAPclassification):
+            the results of the soapClassification from :func:`classify`
+        nTimeBlocks (int, optional):
+            the number of blocks in which the transitions are split in time.
+            Defaults to 1.
+        nAtomBlocks (int, optional):
+            the number of blocks in which the atoms are split. Defaults to 1.
+        stride (int):
+            the stride in frames between each state confrontation. Defaults to 1.
+        window (int):
+            the dimension of the windows between each state confrontations.
+            Defaults to None.
+    Returns:
+        numpy.ndarray[float]:
+            the unnormalized matrices of the transitions, with shape
+            (nTimeBlocks, nAtomBlocks, nclasses, nclasses)
+    """
+    if window is None:
+        window = stride
+    if window < stride:
+        raise ValueError("the window must be bigger than the stride")
+    if window > data.references.shape[0]:
+        raise ValueError("stride and window must be smaller than simulation lenght")
+    references = numpy.asarray(data.references)
+    nframes, nat = references.shape
+    transitionFrames = numpy.arange(window, nframes, stride)
+    if nTimeBlocks < 1 or nTimeBlocks > max(1, len(transitionFrames)):
+        raise ValueError("nTimeBlocks must be between 1 and the number of transitions")
+    if nAtomBlocks < 1 or nAtomBlocks > nat:
+        raise ValueError("nAtomBlocks must be between 1 and the number of atoms")
+
+    nclasses = len(data.legend)
+    timeBlock = (numpy.arange(len(transitionFrames)) * nTimeBlocks) // max(
+        1, len(transitionFrames)
+    )
+    atomBlock = (numpy.arange(nat) * nAtomBlocks) // nat
+    blockID = timeBlock.reshape(-1, 1) * nAtomBlocks + atomBlock.reshape(1, -1)
+    # the modulo emulates the indexing of the error class `-1` as the last class
+    classFrom = references[transitionFrames - window] % nclasses
+    classTo = references[transitionFrames] % nclasses
+    flatIndexes = (blockID * nclasses + classFrom) * nclasses + classTo
+    counts = numpy.bincount(
+        flatIndexes.reshape(-1),
+        minlength=nTimeBlocks * nAtomBlocks * nclasses * nclasses,
+    )
+    return counts.reshape(nTimeBlocks, nAtomBlocks, nclasses, nclasses).astype(
+        numpy.float64
+    )
+
+
+def bootstrapTransitionMatrix(
+    blockMatrices: "numpy.ndarray[float]",
+    nResamples: int = 1000,
+    confidence: float = 0.95,
+    normalize: bool = True,
+    seed: "int|numpy.random.Generator|None" = None,
+) -> "tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray]":
+    """Calculates the confidence interval of a transition matrix by bootstrapping
+    the given blocks
+
+        Each resample draws with replacement as many blocks as the given ones
+        and sums their count matrices: all the resamples are computed at once
+        as a product between the matrix of the draws and the matrix of the blocks
+
+    Args:
+        blockMatrices (numpy.ndarray[float]):
+            the unnormalized matrices of the transitions of each block, like the
+            output of :func:`transitionMatrixBlocksFromSOAPClassification`: all
+            the axes but the last two are treated as block axes
+        nResamples (int, optional):
+            the number of bootstrap resamples. Defaults to 1000.
+        confidence (float, optional):
+            the confidence level of the interval. Defaults to 0.95.
+        normalize (bool, optional):
+            if True the resampled matrices are normalized by row before
+            calculating the interval. Defaults to True.
+        seed (int|numpy.random.Generator|None, optional):
+            the seed or the generator used for drawing the resamples.
+            Defaults to None.
+
+    Returns:
+        tuple[numpy.ndarray,numpy.ndarray,numpy.ndarray]:
+            - **matrix** the (normalized) transition matrix of all the blocks
+            - **lower** the lower limit of the confidence interval
+            - **upper** the upper limit of the confidence interval
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("confidence must be between 0 and 1")
+    nclasses = blockMatrices.shape[-1]
+    blocks = numpy.reshape(blockMatrices, (-1, nclasses * nclasses))
+    nBlocks = blocks.shape[0]
+    rng = numpy.random.default_rng(seed)
+    draws = rng.integers(0, nBlocks, size=(nResamples, nBlocks))
+    # weights[i,j] is how many times the block j is drawn in the resample i
+    weights = numpy.zeros((nResamples, nBlocks))
+    numpy.add.at(weights, (numpy.arange(nResamples).reshape(-1, 1), draws), 1)
+    resamples = (weights @ blocks).reshape(nResamples, nclasses, nclasses)
+    matrix = numpy.sum(blocks, axis=0).reshape(nclasses, nclasses)
+    if normalize:
+        resamples = normalizeMatrixByRow(resamples)
+        matrix = normalizeMatrixByRow(matrix)
+    alpha = (1.0 - confidence) / 2.0
+    lower, upper = numpy.quantile(resamples, [alpha, 1.0 - alpha], axis=0)
+    return matrix, lower, upper
+
+
+def transitionMatrixFromSOAPClassificationNormalized(
+    data: SOAPclassification,
+    stride: int = 1,
+    window: "int|None" = None,
+    sparse: bool = False,
+) -> "numpy.ndarray[float]|scipy.sparse.csr_matrix":
     """Generates the normalized transition matrix from a :func:`classify`
 
         The matrix is organized in the following way:
@@ -89,10 +324,14 @@ def transitionMatrixFromSOAPClassificationNormalized(
         window (int):
             the dimension of the windows between each state confrontations.
             Defaults to None.
+        sparse (bool, optional):
+            if True the matrix is returned as a `scipy.sparse.csr_matrix`.
+            Defaults to False.
     Returns:
-        numpy.ndarray[float]: the normalized matrix of the transitions
+        numpy.ndarray[float]|scipy.sparse.csr_matrix:
+            the normalized matrix of the transitions
     """
-    transMat = transitionMatrixFromSOAPClassification(data, stride, window)
+    transMat = transitionMatrixFromSOAPClassification(data, stride, window, sparse)
     return normalizeMatrixByRow(transMat)
 
 
@@ -168,7 +407,11 @@ def calculateResidenceTimesFromClassification(
 
 
 def calculateResidenceTimes(
-    data: SOAPclassification, statesTracker: list = None, **algokwargs
+    data: SOAPclassification,
+    statesTracker: list = None,
+    n_jobs: int = 1,
+    executor: "Executor|None" = None,
+    **algokwargs,
 ) -> "list[numpy.ndarray]":
     """Given a classification (and the state tracker) generates a ordered list
     of residence times per state
@@ -177,6 +420,10 @@ def calculateResidenceTimes(
         :func:`calculateResidenceTimesFromClassification`
         or :func:`tracker.getResidenceTimesFromStateTracker`
 
+    If no `statesTracker` is given and `n_jobs` is not 1 or an `executor` is
+    given, the state tracker is calculated in parallel with :func:`trackStates`
+    and then the residence times are extracted from it
+
     Args:
         data (SOAPclassification):
 
@@ -188,13 +435,22 @@ def calculateResidenceTimes(
             a list of list of state trackers, organized by atoms, or a list of
 
             state trackers. Defaults to None.
+        n_jobs (int, optional):
+            the number of processes used to track the states, see
+            :func:`trackStates`. Defaults to 1.
+        executor (concurrent.futures.Executor, optional):
+            the executor used to track the states, see :func:`trackStates`.
+            Defaults to None.
         algokwargs:
             arguments passed to the called functions
     Returns:
         list[numpy.ndarray]:
         an ordered list of the residence times for each state
     """
-
+    if not statesTracker and (n_jobs != 1 or executor is not None):
+        statesTracker = trackStates(
+            data, n_jobs=n_jobs, executor=executor, **algokwargs
+        )
     if not statesTracker:
         return calculateResidenceTimesFromClassification(data, **algokwargs)
     else:
@@ -235,4 +491,6 @@ def calculateTransitionMatrix(
     if not statesTracker:
         return transitionMatrixFromSOAPClassification(data, **algokwargs)
     else:
-        return transitionMatrixFromStateTracker(statesTracker, data.legend)
+        return transitionMatrixFromStateTracker(
+            statesTracker, data.legend, sparse=algokwargs.get("sparse", False)
+        )
@@ -0,0 +1,284 @@
+"""
+This submodule contains the tools to accumulate the transition statistics of a
+classification that grows in time, like the one of a simulation that is still
+running.
+
+The :class:`OnlineStateTracker` keeps the open events of each atom, the last
+`window` classified frames and the running transition counts: each new block of
+classified frames is processed in a time that depends only on the lenght of the
+block, and the state of the accumulator can be stored in an hdf5 file between
+two analysis sessions.
+"""
+import numpy
+import h5py
+
+from ..classify import SOAPclassification
+from .tracker import (
+    StateTracker,
+    TRACK_PREVSTATE,
+    TRACK_CURSTATE,
+    TRACK_ENDSTATE,
+    TRACK_EVENTTIME,
+)
+
+# the columns of the stored events: the atom, the window lane and the event
+_EVENT_ATOM = 0
+_EVENT_LANE = 1
+_EVENT_DATA = slice(2, 6)
+
+
+class OnlineStateTracker:
+    """Accumulates the transitions and the events of a growing classification
+
+    The results are the same that :func:`SOAPify.transitions.trackStates` and
+    :func:`SOAPify.transitions.transitionMatrixFromSOAPClassification` would
+    give on the whole classification seen up to now.
+    """
+
+    legend: "list[str]"
+    window_: int
+    stride_: int
+    nframes_: int
+
+    def __init__(
+        self, nat: int, legend: "list[str]", window: int = 1, stride: "int|None" = None
+    ) -> None:
+        """Initializes an empty accumulator
+
+        Args:
+            nat (int): the number of atoms in the classification
+            legend (list[str]): the list of the names of the states
+            window (int, optional):
+                the dimension of the windows between each state confrontations.
+                Defaults to 1.
+            stride (int, optional):
+                the stride in frames between each window. Defaults to None
+                (equal to the window).
+        """
+        if stride is None:
+            stride = window
+        if stride > window:
+            raise ValueError("the window must be bigger than the stride")
+        self.legend = list(legend)
+        self.window_ = window
+        self.stride_ = stride
+        self.nframes_ = 0
+        nclasses = len(self.legend)
+        self.transitionCounts_ = numpy.zeros((nclasses, nclasses), dtype=numpy.float64)
+        # the frame `f` is stored in the row `f % window`
+        self.lastFrames_ = numpy.zeros((window, nat), dtype=int)
+        # one open event per atom for each of the `range(0, window, stride)` lanes
+        self.openEvents_ = numpy.zeros(
+            (len(range(0, window, stride)), nat, 4), dtype=int
+        )
+        # the closed events, in columns: atom, lane, prev, cur, end, time
+        self.closedEvents_ = [numpy.empty((0, 6), dtype=int)]
+
+    @property
+    def window(self) -> int:
+        """the dimension of the windows between each state confrontations"""
+        return self.window_
+
+    @property
+    def stride(self) -> int:
+        """the stride in frames between each window"""
+        return self.stride_
+
+    @property
+    def nat(self) -> int:
+        """the number of atoms in the classification"""
+        return self.lastFrames_.shape[1]
+
+    @property
+    def nframes(self) -> int:
+        """the number of frames accumulated up to now"""
+        return self.nframes_
+
+    @property
+    def transitionMatrix(self) -> "numpy.ndarray[float]":
+        """the unnormalized matrix of the transitions of the frames seen up to now
+
+        see :func:`SOAPify.transitions.transitionMatrixFromSOAPClassification`
+        """
+        return self.transitionCounts_.copy()
+
+    def update(self, classification: "SOAPclassification|numpy.ndarray") -> None:
+        """Accumulates a new block of classified frames
+
+        Args:
+            classification (SOAPclassification|numpy.ndarray):
+                the classification of the new frames, or directly the array of
+                the references, with shape (nframes, natoms)
+        """
+        if isinstance(classification, SOAPclassification):
+            classification = classification.references
+        references = numpy.asarray(classification, dtype=int)
+        if references.ndim != 2 or references.shape[1] != self.nat:
+            raise ValueError(
+                f"the new frames must have shape (nframes, {self.nat}),"
+                f" got {references.shape}"
+            )
+        window = self.window_
+        stride = self.stride_
+        atomIDs = numpy.arange(self.nat)
+        classesFrom = []
+        classesTo = []
+        newEvents = []
+        for frameData in references:
+            frame = self.nframes_
+            offset = frame % window
+            # the transitions are calculated like in
+            # transitionMatrixFromSOAPClassification: range(window, nframes, stride)
+            if frame >= window and (frame - window) % stride == 0:
+                classesFrom.append(self.lastFrames_[offset].copy())
+                classesTo.append(frameData)
+            # the events are tracked like in trackStates
+            if offset % stride == 0:
+                openEvents = self.openEvents_[offset // stride]
+                if frame < window:
+                    openEvents[:, TRACK_PREVSTATE] = frameData
+                    openEvents[:, TRACK_CURSTATE] = frameData
+                    openEvents[:, TRACK_ENDSTATE] = frameData
+                    openEvents[:, TRACK_EVENTTIME] = 0
+                else:
+                    openEvents[:, TRACK_EVENTTIME] += window
+                    changed = frameData != openEvents[:, TRACK_CURSTATE]
+                    if numpy.any(changed):
+                        closed = numpy.empty(
+                            (numpy.count_nonzero(changed), 6), dtype=int
+                        )
+                        closed[:, _EVENT_ATOM] = atomIDs[changed]
+                        closed[:, _EVENT_LANE] = offset // stride
+                        closed[:, _EVENT_DATA] = openEvents[changed]
+                        closed[:, 2 + TRACK_ENDSTATE] = frameData[changed]
+                        newEvents.append(closed)
+                        openEvents[changed, TRACK_PREVSTATE] = openEvents[
+                            changed, TRACK_CURSTATE
+                        ]
+                        openEvents[changed, TRACK_CURSTATE] = frameData[changed]
+                        openEvents[changed, TRACK_ENDSTATE] = frameData[changed]
+                        openEvents[changed, TRACK_EVENTTIME] = 0
+            self.lastFrames_[offset] = frameData
+            self.nframes_ += 1
+        if classesFrom:
+            numpy.add.at(
+                self.transitionCounts_,
+                (numpy.concatenate(classesFrom), numpy.concatenate(classesTo)),
+                1,
+            )
+        self.closedEvents_ += newEvents
+
+    def _getEvents(self) -> numpy.ndarray:
+        """returns all of the events, ordered by atom and by window lane
+
+        The open events are closed like in :func:`trackStates` at the end of the
+        classification
+
+        Returns:
+            numpy.ndarray: the events, in columns: atom, lane, prev, cur, end, time
+        """
+        self.closedEvents_ = [numpy.concatenate(self.closedEvents_)]
+        startedLanes = min(self.openEvents_.shape[0], -(-self.nframes_ // self.stride_))
+        openEvents = numpy.empty((startedLanes, self.nat, 6), dtype=int)
+        openEvents[:, :, _EVENT_ATOM] = numpy.arange(self.nat)
+        openEvents[:, :, _EVENT_LANE] = numpy.arange(startedLanes).reshape(-1, 1)
+        openEvents[:, :, _EVENT_DATA] = self.openEvents_[:startedLanes]
+        openEvents[:, :, 2 + TRACK_EVENTTIME] += self.window_
+        events = numpy.concatenate(
+            [self.closedEvents_[0], openEvents.reshape(-1, 6)], axis=0
+        )
+        # lexsort is stable: the events of each lane stay in chronological order
+        return events[numpy.lexsort((events[:, _EVENT_LANE], events[:, _EVENT_ATOM]))]
+
+    def getStateTracker(self) -> StateTracker:
+        """Returns the events of the frames seen up to now
+
+        see :func:`SOAPify.transitions.trackStates`
+
+        Returns:
+            StateTracker: ordered list of events for each atom
+        """
+        events = self._getEvents()
+        limits = numpy.searchsorted(events[:, _EVENT_ATOM], numpy.arange(self.nat + 1))
+        tracker = StateTracker(self.nat, self.window_, self.stride_)
+        for atomID in range(self.nat):
+            tracker[atomID] = list(
+                events[limits[atomID] : limits[atomID + 1], _EVENT_DATA]
+            )
+        return tracker
+
+    def getResidenceTimes(self) -> "list[numpy.ndarray]":
+        """Returns the residence times of the frames seen up to now
+
+        see :func:`SOAPify.transitions.getResidenceTimesFromStateTracker`
+
+        Returns:
+            list[numpy.ndarray]:
+            an ordered list of the residence times for each state
+        """
+        events = self._getEvents()[:, _EVENT_DATA]
+        isComplete = (events[:, TRACK_ENDSTATE] != events[:, TRACK_CURSTATE]) & (
+            events[:, TRACK_PREVSTATE] != events[:, TRACK_CURSTATE]
+        )
+        times = numpy.where(
+            isComplete, events[:, TRACK_EVENTTIME], -events[:, TRACK_EVENTTIME]
+        )
+        # the negative states (errors) are stored as in a list: -1 is the last
+        states = events[:, TRACK_CURSTATE] % len(self.legend)
+        return [numpy.sort(times[states == i]) for i in range(len(self.legend))]
+
+
+def saveOnlineStateTracker(
+    h5position: "h5py.Group|h5py.File",
+    targetGroupName: str,
+    tracker: OnlineStateTracker,
+):
+    """Export the state of the given accumulator in the indicated group/hdf5 file
+
+    if the target group already exists its content is overwritten
+
+    Args:
+        h5position (h5py.Group|h5py.File):
+            The file object of the group where to save the accumulator
+        targetGroupName (str): the name of the group that will store the accumulator
+        tracker (OnlineStateTracker): the accumulator to be exported
+    """
+    whereToSave = h5position.require_group(targetGroupName)
+    toSave = {
+        "transitionCounts": tracker.transitionCounts_,
+        "lastFrames": tracker.lastFrames_,
+        "openEvents": tracker.openEvents_,
+        "closedEvents": numpy.concatenate(tracker.closedEvents_),
+    }
+    for key, data in toSave.items():
+        if key in whereToSave:
+            del whereToSave[key]
+        whereToSave.create_dataset(key, data=data, compression="gzip")
+    whereToSave.attrs.create("window", tracker.window)
+    whereToSave.attrs.create("stride", tracker.stride)
+    whereToSave.attrs.create("nframes", tracker.nframes)
+    whereToSave.attrs.create("legend", tracker.legend)
+
+
+def getOnlineStateTrackerFromGroup(group: h5py.Group) -> OnlineStateTracker:
+    """Given a `h5py.Group` returns the :class:`OnlineStateTracker` stored in it
+
+    Args:
+        group (h5py.Group): the group exported with :func:`saveOnlineStateTracker`
+
+    Returns:
+        OnlineStateTracker: the accumulator, ready to be updated with new frames
+    """
+    lastFrames = group["lastFrames"][:]
+    tracker = OnlineStateTracker(
+        nat=lastFrames.shape[1],
+        legend=group.attrs["legend"].tolist(),
+        window=int(group.attrs["window"]),
+        stride=int(group.attrs["stride"]),
+    )
+    tracker.nframes_ = int(group.attrs["nframes"])
+    tracker.transitionCounts_ = group["transitionCounts"][:]
+    tracker.lastFrames_ = lastFrames
+    tracker.openEvents_ = group["openEvents"][:]
+    tracker.closedEvents_ = [group["closedEvents"][:]]
+    return tracker
@@ -8,8 +8,18 @@ In the module there is some logic to help to the user to understand if the event
 is a '*first one*' or a '*last one*' (aka the first/las seen in the simulation for
 each atom): a *first one* will have `previous state ID = current state ID` and 
 a *last one* will have `next state ID = current state ID`
+
+A :class:`StateTracker` can be stored in an hdf5 file with :func:`saveStateTracker`
+and reopened with :func:`getStateTrackerFromGroup`: the reopened tracker reads
+from the file only the events of the asked atoms.
 """
+import os
+from itertools import chain
+from concurrent.futures import Executor, ProcessPoolExecutor
+from multiprocessing import shared_memory
 import numpy
+import scipy.sparse
+import h5py
 
 from ..classify import SOAPclassification
 
@@ -23,6 +33,9 @@ TRACK_ENDSTATE = 2
 #: the index of the component of the statetracker with the duration of the state, in frames
 TRACK_EVENTTIME = 3
 
+# the names of the datasets that store the components of the events in the hdf5 file
+_TRACK_DATASETS = ("prevState", "curState", "endState", "eventTime")
+
 
 class StateTracker:
     """A contained for the state trackers"""
@@ -90,6 +103,102 @@ class StateTracker:
         return iter(self.stateHistory)
 
 
+class HDF5StateTracker(StateTracker):
+    """A read-only :class:`StateTracker` that reads the events from an hdf5 group
+
+    The events are loaded atom by atom when asked, so opening the tracker
+    costs only the reading of the atom-offset index.
+    The hdf5 file must stay open while the tracker is in use.
+    """
+
+    def __init__(self, group: h5py.Group) -> None:
+        """Opens the tracker stored in the given group
+
+        Args:
+            group (h5py.Group): the group exported with :func:`saveStateTracker`
+        """
+        # pylint: disable=super-init-not-called
+        self.group_ = group
+        self.atomOffsets_ = group["atomOffsets"][:]
+        self.window_ = int(group.attrs["window"])
+        self.stride_ = int(group.attrs["stride"])
+
+    @property
+    def stateHistory(self) -> list:
+        """the events of all of the atoms, loaded in memory
+
+        Returns:
+            list: the list of the events of each atom
+        """
+        return list(self)
+
+    def __len__(self) -> int:
+        """returns the number of atoms in the tracker
+
+        Returns:
+            int: the number of atoms
+        """
+        return len(self.atomOffsets_) - 1
+
+    def _readEvents(self, start: int, stop: int) -> numpy.ndarray:
+        """reads the events between the given offsets
+
+        Args:
+            start (int): the offset of the first event to read
+            stop (int): the offset after the last event to read
+
+        Returns:
+            numpy.ndarray: the events, with shape (stop-start, 4)
+        """
+        events = numpy.empty((stop - start, 4), dtype=int)
+        for component, datasetName in enumerate(_TRACK_DATASETS):
+            events[:, component] = self.group_[datasetName][start:stop]
+        return events
+
+    def __getitem__(self, key):
+        """returns the events of the asked atom, reading them from the file
+
+        Args:
+            key (int|slice): the addres of the list of the asked atom
+        """
+        if isinstance(key, slice):
+            return [self[atomID] for atomID in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if key < 0 or key >= len(self):
+            raise IndexError("StateTracker index out of range")
+        return list(
+            self._readEvents(self.atomOffsets_[key], self.atomOffsets_[key + 1])
+        )
+
+    def __setitem__(self, key, data):
+        """the tracker stored in the hdf5 file is read-only"""
+        raise TypeError("the StateTracker stored in a hdf5 file is read-only")
+
+    def __iter__(self):
+        """iterate thought the stored list of events, reading them in blocks"""
+        blockSize = max(1, self.group_["eventTime"].chunks[0])
+        nat = len(self)
+        atomID = 0
+        while atomID < nat:
+            start = self.atomOffsets_[atomID]
+            # the block contains all of the atoms that starts before start+blockSize
+            lastAtom = max(
+                atomID + 1,
+                numpy.searchsorted(self.atomOffsets_, start + blockSize, side="right")
+                - 1,
+            )
+            lastAtom = min(lastAtom, nat)
+            events = self._readEvents(start, self.atomOffsets_[lastAtom])
+            for i in range(atomID, lastAtom):
+                yield list(
+                    events[
+                        self.atomOffsets_[i] - start : self.atomOffsets_[i + 1] - start
+                    ]
+                )
+            atomID = lastAtom
+
+
 def _createEvent(
     prevState: int, curState: int, endState: int, eventTime: int = 0
 ) -> numpy.ndarray:
@@ -108,8 +217,168 @@ def _createEvent(
     return numpy.array([prevState, curState, endState, eventTime], dtype=int)
 
 
+def _trackStatesForAtoms(
+    references: "numpy.ndarray[int]", window: int, stride: int
+) -> "list[list[numpy.ndarray]]":
+    """Creates the list of events for each atom in the given classification array
+
+        this is an helper function for :func:`trackStates`
+
+    Args:
+        references (numpy.ndarray[int]):
+            the classification with shape (nframes, natoms)
+        window (int):
+            the dimension of the windows between each state confrontations.
+        stride (int):
+            the stride in frames between each window.
+
+    Returns:
+        list[list[numpy.ndarray]]: the events of each atom, ordered by atom
+    """
+    nofFrames = references.shape[0]
+    eventsPerAtom = []
+    for atomID in range(references.shape[1]):
+        statesPerAtom = []
+        atomTraj = references[:, atomID]
+        for iframe in range(0, window, stride):
+            # the array is [start state, state, end state,time]
+            # if PREVSTATE == CURSTATE the event is the first event for the atom
+            # if ENDSTATE == CURSTATE the event is the last event for the atom
+            stateTracker = _createEvent(
+                prevState=atomTraj[iframe],
+                curState=atomTraj[iframe],
+                endState=atomTraj[iframe],
+                eventTime=0,
+            )
+            for frame in range(window + iframe, nofFrames, window):
+                stateTracker[TRACK_EVENTTIME] += window
+                if atomTraj[frame] != stateTracker[TRACK_CURSTATE]:
+                    stateTracker[TRACK_ENDSTATE] = atomTraj[frame]
+                    statesPerAtom.append(stateTracker)
+                    stateTracker = _createEvent(
+                        prevState=stateTracker[TRACK_CURSTATE],
+                        curState=atomTraj[frame],
+                        endState=atomTraj[frame],
+                    )
+
+            # append the last event
+            stateTracker[TRACK_EVENTTIME] += window
+            statesPerAtom.append(stateTracker)
+        eventsPerAtom.append(statesPerAtom)
+    return eventsPerAtom
+
+
+def _trackStatesWorker(
+    shmName: str,
+    shape: tuple,
+    dtype: str,
+    atomSlice: slice,
+    window: int,
+    stride: int,
+) -> "list[list[numpy.ndarray]]":
+    """Tracks the states of a slice of atoms of a classification in shared memory
+
+        this is the function executed by the workers of :func:`trackStates`:
+        the classification is read from the shared memory block, so it is never
+        pickled
+
+    Args:
+        shmName (str):
+            the name of the shared memory block with the classification
+        shape (tuple):
+            the shape of the classification
+        dtype (str):
+            the dtype of the classification
+        atomSlice (slice):
+            the atoms assigned to this worker
+        window (int):
+            the dimension of the windows between each state confrontations.
+        stride (int):
+            the stride in frames between each window.
+
+    Returns:
+        list[list[numpy.ndarray]]: the events of each atom in the slice
+    """
+    shm = shared_memory.SharedMemory(name=shmName)
+    try:
+        references = numpy.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        events = _trackStatesForAtoms(references[:, atomSlice], window, stride)
+        # the view must be released before closing the shared memory
+        del references
+    finally:
+        shm.close()
+    return events
+
+
+def _trackStatesInParallel(
+    references: "numpy.ndarray[int]",
+    window: int,
+    stride: int,
+    n_jobs: int,
+    executor: "Executor|None",
+) -> "list[list[numpy.ndarray]]":
+    """Shards the atoms of the classification between different processes
+
+        this is an helper function for :func:`trackStates`
+
+    Args:
+        references (numpy.ndarray[int]):
+            the classification with shape (nframes, natoms)
+        window (int):
+            the dimension of the windows between each state confrontations.
+        stride (int):
+            the stride in frames between each window.
+        n_jobs (int):
+            the number of shards (and of processes, if `executor` is None)
+        executor (Executor|None):
+            the executor that will run the shards
+
+    Returns:
+        list[list[numpy.ndarray]]: the events of each atom, ordered by atom
+    """
+    nofAtoms = references.shape[1]
+    nShards = max(1, min(nofAtoms, n_jobs))
+    shardLimits = numpy.linspace(0, nofAtoms, nShards + 1, dtype=int)
+    shm = shared_memory.SharedMemory(create=True, size=max(1, references.nbytes))
+    try:
+        sharedReferences = numpy.ndarray(
+            references.shape, dtype=references.dtype, buffer=shm.buf
+        )
+        sharedReferences[:] = references
+        del sharedReferences
+        workers = executor if executor is not None else ProcessPoolExecutor(n_jobs)
+        try:
+            futures = [
+                workers.submit(
+                    _trackStatesWorker,
+                    shm.name,
+                    references.shape,
+                    references.dtype.str,
+                    slice(start, stop),
+                    window,
+                    stride,
+                )
+                for start, stop in zip(shardLimits[:-1], shardLimits[1:])
+            ]
+            eventsPerAtom = []
+            # the shards are merged in order, so the atom identity is preserved
+            for future in futures:
+                eventsPerAtom += future.result()
+        finally:
+            if executor is None:
+                workers.shutdown()
+    finally:
+        shm.close()
+        shm.unlink()
+    return eventsPerAtom
+
+
 def trackStates(
-    classification: SOAPclassification, window: int = 1, stride: "int|None" = None
+    classification: SOAPclassification,
+    window: int = 1,
+    stride: "int|None" = None,
+    n_jobs: int = 1,
+    executor: "Executor|None" = None,
 ) -> StateTracker:
     """Creates an ordered list of events for each atom in the classified trajectory
 
@@ -119,11 +388,28 @@ def trackStates(
         - if `PREVSTATE == CURSTATE` is the first event for the atom
         - if `ENDSTATE == CURSTATE` is the last event for the atom
 
+    The events of each atom are independent from the other atoms: if `n_jobs`
+    is not 1 or an `executor` is given the atoms are split in shards that are
+    tracked in different processes. The classification is passed to the
+    workers through a shared memory block.
+
     Args:
         classification (SOAPclassification):
             the classified trajectory
+        window (int):
+            the dimension of the windows between each state confrontations.
+            Defaults to 1.
         stride (int):
-            the stride in frames between each window. Defaults to 1.
+            the stride in frames between each window. Defaults to None.
+        n_jobs (int, optional):
+            the number of shards in which the atoms are split, and the number of
+            processes used if `executor` is None. If less than 1 uses all of the
+            available cpus. Defaults to 1.
+        executor (concurrent.futures.Executor, optional):
+            the executor that will run the shards, must be able to attach to a
+            shared memory block (like a `ProcessPoolExecutor`). If given and
+            `n_jobs` is 1 the atoms are split in `os.cpu_count()` shards.
+            Defaults to None.
     Returns:
         StateTracker: ordered list of events for each atom in the classified trajectory
     """
@@ -139,39 +425,19 @@ def trackStates(
     ):
         raise ValueError("stride and window must be smaller than simulation lenght")
 
-    nofFrames = classification.references.shape[0]
     nofAtoms = classification.references.shape[1]
 
     stateHistory = StateTracker(nofAtoms, window, stride)
-    # TODO: this can be made concurrent per atom
-    for atomID in range(nofAtoms):
-        statesPerAtom = []
-        atomTraj = classification.references[:, atomID]
-        for iframe in range(0, window, stride):
-            # the array is [start state, state, end state,time]
-            # if PREVSTATE == CURSTATE the event is the first event for the atom
-            # if ENDSTATE == CURSTATE the event is the last event for the atom
-            stateTracker = _createEvent(
-                prevState=atomTraj[iframe],
-                curState=atomTraj[iframe],
-                endState=atomTraj[iframe],
-                eventTime=0,
-            )
-            for frame in range(window + iframe, nofFrames, window):
-                stateTracker[TRACK_EVENTTIME] += window
-                if atomTraj[frame] != stateTracker[TRACK_CURSTATE]:
-                    stateTracker[TRACK_ENDSTATE] = atomTraj[frame]
-                    statesPerAtom.append(stateTracker)
-                    stateTracker = _createEvent(
-                        prevState=stateTracker[TRACK_CURSTATE],
-                        curState=atomTraj[frame],
-                        endState=atomTraj[frame],
-                    )
-
-            # append the last event
-            stateTracker[TRACK_EVENTTIME] += window
-            statesPerAtom.append(stateTracker)
-        stateHistory[atomID] = statesPerAtom
+    if n_jobs < 1 or (n_jobs == 1 and executor is not None):
+        n_jobs = os.cpu_count() or 1
+    if n_jobs == 1:
+        stateHistory.stateHistory = _trackStatesForAtoms(
+            classification.references, window, stride
+        )
+    else:
+        stateHistory.stateHistory = _trackStatesInParallel(
+            numpy.asarray(classification.references), window, stride, n_jobs, executor
+        )
     return stateHistory
 
 
@@ -193,7 +459,7 @@ def removeAtomIdentityFromEventTracker(statesTracker: StateTracker) -> StateTrac
             1, window=statesTracker.window, stride=statesTracker.stride
         )
         newST.stateHistory[0] = []
-        for tracks in statesTracker.stateHistory:
+        for tracks in statesTracker:
             newST.stateHistory[0] += tracks
         return newST
     return statesTracker
@@ -239,9 +505,54 @@ def getResidenceTimesFromStateTracker(
     return residenceTimes
 
 
+def _countTransitions(
+    classFrom: numpy.ndarray,
+    classTo: numpy.ndarray,
+    nclasses: int,
+    weights: "numpy.ndarray|None" = None,
+    sparse: bool = False,
+) -> "numpy.ndarray[float]|scipy.sparse.csr_matrix":
+    """Accumulates the given transitions in a unnormalized transition matrix
+
+        The negative states (like the `-1` of the errors) are counted as the
+        python indexing would do: `-1` is the last class
+
+    Args:
+        classFrom (numpy.ndarray): the starting states of the transitions
+        classTo (numpy.ndarray): the arrival states of the transitions
+        nclasses (int): the number of states
+        weights (numpy.ndarray, optional):
+            the weight of each transition, if None each transition counts 1.
+            Defaults to None.
+        sparse (bool, optional):
+            if True the matrix is returned as a `scipy.sparse.csr_matrix`.
+            Defaults to False.
+
+    Returns:
+        numpy.ndarray[float]|scipy.sparse.csr_matrix:
+            the unnormalized matrix of the transitions
+    """
+    classFrom = numpy.asarray(classFrom).reshape(-1) % nclasses
+    classTo = numpy.asarray(classTo).reshape(-1) % nclasses
+    if weights is None:
+        weights = numpy.ones(classFrom.shape, dtype=numpy.float64)
+    if sparse:
+        # the duplicated entries are summed in the conversion to csr
+        return scipy.sparse.coo_matrix(
+            (numpy.asarray(weights, dtype=numpy.float64), (classFrom, classTo)),
+            shape=(nclasses, nclasses),
+        ).tocsr()
+    transMat = numpy.bincount(
+        classFrom * nclasses + classTo,
+        weights=weights,
+        minlength=nclasses * nclasses,
+    )
+    return transMat.reshape(nclasses, nclasses).astype(numpy.float64)
+
+
 def transitionMatrixFromStateTracker(
-    statesTracker: StateTracker, legend: list
-) -> numpy.ndarray:
+    statesTracker: StateTracker, legend: list, sparse: bool = False
+) -> "numpy.ndarray|scipy.sparse.csr_matrix":
     """Generates the unnormalized matrix of the transitions
 
     see :func:`calculateTransitionMatrix` for a detailed description of an
@@ -252,23 +563,88 @@ def transitionMatrixFromStateTracker(
             a StateTracker
         legend (list):
             the list of the name of the states
+        sparse (bool, optional):
+            if True the matrix is returned as a `scipy.sparse.csr_matrix`.
+            Defaults to False.
 
     Returns:
-        numpy.ndarray[float]: the unnormalized matrix of the transitions
+        numpy.ndarray[float]|scipy.sparse.csr_matrix:
+            the unnormalized matrix of the transitions
     """
-    states = removeAtomIdentityFromEventTracker(statesTracker)
-
-    nclasses = len(legend)
-    transMat = numpy.zeros((nclasses, nclasses), dtype=numpy.float64)
+    events = numpy.array(list(chain.from_iterable(statesTracker)), dtype=int)
+    events = events.reshape(-1, 4)
     window = statesTracker.window
-    # using states[0] because we have removed the atom identities
-    for event in states[0]:
-        transMat[event[TRACK_CURSTATE], event[TRACK_CURSTATE]] += (
-            event[TRACK_EVENTTIME] // window - 1
+    prevStates = events[:, TRACK_PREVSTATE]
+    curStates = events[:, TRACK_CURSTATE]
+    # the transition matrix is genetated with:
+    #   classFrom = data.references[frameID - stride][atomID]
+    #   classTo = data.references[frameID][atomID]
+    # each event contributes with its time/window-1 permanences in its state
+    # and, if it is not a first event, with a transition from the previous state
+    isTransition = prevStates != curStates
+    return _countTransitions(
+        numpy.concatenate([curStates, prevStates[isTransition]]),
+        numpy.concatenate([curStates, curStates[isTransition]]),
+        len(legend),
+        weights=numpy.concatenate(
+            [
+                events[:, TRACK_EVENTTIME] // window - 1,
+                numpy.ones(numpy.count_nonzero(isTransition), dtype=int),
+            ]
+        ),
+        sparse=sparse,
+    )
+
+
+def saveStateTracker(
+    h5position: "h5py.Group|h5py.File", targetGroupName: str, tracker: StateTracker
+):
+    """Export the given state tracker in the indicated group/hdf5 file
+
+    The events are stored in columns, one dataset per component of the event,
+    and the `atomOffsets` dataset stores where the events of each atom start:
+    the events of the atom `i` are in `[atomOffsets[i]:atomOffsets[i+1]]`.
+    If the target group already exists its content is overwritten
+
+    Args:
+        h5position (h5py.Group|h5py.File):
+            The file object of the group where to save the tracker
+        targetGroupName (str): the name of the group that will store the tracker
+        tracker (StateTracker): the `StateTracker` object to be exported
+    """
+    eventsPerAtom = numpy.array([len(events) for events in tracker], dtype=int)
+    atomOffsets = numpy.zeros(len(eventsPerAtom) + 1, dtype=int)
+    numpy.cumsum(eventsPerAtom, out=atomOffsets[1:])
+    events = numpy.array(list(chain.from_iterable(tracker)), dtype=int).reshape(-1, 4)
+
+    whereToSave = h5position.require_group(targetGroupName)
+    toSave = {"atomOffsets": atomOffsets}
+    for component, datasetName in enumerate(_TRACK_DATASETS):
+        toSave[datasetName] = events[:, component]
+    for key, data in toSave.items():
+        if key in whereToSave:
+            del whereToSave[key]
+        whereToSave.create_dataset(
+            key,
+            data=data,
+            compression="gzip",
+            chunks=(min(len(data), 2**16) or 1,),
+            maxshape=(None,),
         )
-        # the transition matrix is genetated with:
-        #   classFrom = data.references[frameID - stride][atomID]
-        #   classTo = data.references[frameID][atomID]
-        if event[TRACK_PREVSTATE] != event[TRACK_CURSTATE]:
-            transMat[event[TRACK_PREVSTATE], event[TRACK_CURSTATE]] += 1
-    return transMat
+    whereToSave.attrs.create("window", tracker.window)
+    whereToSave.attrs.create("stride", tracker.stride)
+
+
+def getStateTrackerFromGroup(group: h5py.Group) -> HDF5StateTracker:
+    """Given a `h5py.Group` returns the :class:`StateTracker` stored in it
+
+        The events are not loaded in memory: `tracker[atomID]` reads from the
+        file only the events of the asked atom
+
+    Args:
+        group (h5py.Group): the group exported with :func:`saveStateTracker`
+
+    Returns:
+        HDF5StateTracker: the read-only tracker
+    """
+    return HDF5StateTracker(group)
@@ -5,6 +5,10 @@ import numpy
 from ase.data import atomic_numbers
 import h5py
 
+from .HDF5er import getAtomsSelectionLength
+from .instrumentation import timedStage
+from .chunking import planChunks
+
 
 def _SOAPpstr(l, Z, n, Zp, np) -> str:
     if atomic_numbers[Z] < atomic_numbers[Zp]:
@@ -137,20 +141,24 @@ def getAddressesQuippyLikeDscribe(
     return addresses
 
 
-def normalizeArray(x: numpy.ndarray) -> numpy.ndarray:
+def normalizeArray(x: numpy.ndarray, out: "numpy.ndarray|None" = None) -> numpy.ndarray:
     """Normalizes the futher axis of the given array
 
     (eg. in an array of shape (100,50,3) normalizes all the  5000 3D vectors)
 
     Args:
         x (numpy.ndarray): the array to be normalized
+        out (numpy.ndarray|None, optional):
+            the array where the result is stored, with the same shape of `x`;
+            can be `x` itself, to normalize it in place.
+            Defaults to None (a new array is returned).
 
     Returns:
-        numpy.ndarray: the normalized array
+        numpy.ndarray: the normalized array (`out`, if given)
     """
     norm = numpy.linalg.norm(x, axis=-1, keepdims=True)
     norm[norm == 0] = 1
-    return x / norm
+    return numpy.divide(x, norm, out=out)
 
 
 def getSlicesFromAttrs(attrs: dict) -> "tuple(list,dict)":
@@ -268,12 +276,32 @@ def _getIndexesForFillSOAPVectorFromdscribe(
     return completeData
 
 
+def _filledSOAPLength(
+    lMax: int, nMax: int, atomTypes: list = None, atomicSlices: dict = None
+) -> int:
+    """returns the number of features of the vectors filled by :func:`fillSOAPVectorFromdscribe`
+
+    Args:
+        lMax (int): the l_max specified in the calculation.
+        nMax (int): the n_max specified in the calculation.
+        atomTypes (list[str]): the list of atomic species. Defaults to None.
+        atomicSlices (dict): unused, accepted to take the output of
+            :func:`getSOAPSettings`. Defaults to None.
+
+    Returns:
+        int: the number of features of the filled vectors
+    """
+    nspecies = 1 if atomTypes is None else len(atomTypes)
+    return (lMax + 1) * nMax * nMax * nspecies * (nspecies + 1) // 2
+
+
 def fillSOAPVectorFromdscribe(
     soapFromdscribe: numpy.ndarray,
     lMax: int,
     nMax: int,
     atomTypes: list = None,
     atomicSlices: dict = None,
+    out: "numpy.ndarray|None" = None,
 ) -> numpy.ndarray:
     """Given the result of a SOAP calculation from dscribe returns the SOAP power spectrum
         with also the symmetric part explicitly stored, see the note in
@@ -288,10 +316,20 @@ def fillSOAPVectorFromdscribe(
             the l_max specified in the calculation.
         nMax (int):
             the n_max specified in the calculation.
+        atomTypes (list[str]):
+            the list of atomic species. Defaults to None.
+        atomicSlices (dict):
+            the slices of the SOAP vector relative to che atomic species
+            combinations. Defaults to None.
+        out (numpy.ndarray|None, optional):
+            a preallocated array where the full spectrum is gathered, see
+            :func:`_filledSOAPLength` for the length of its last axis.
+            Defaults to None (a new array is returned).
 
     Returns:
         numpy.ndarray:
             The full soap spectrum, with the symmetric part sored explicitly
+            (`out`, if given)
     """
     if atomTypes is None:
         atomTypes = [None]
@@ -312,16 +350,61 @@ def fillSOAPVectorFromdscribe(
     indexes = _getIndexesForFillSOAPVectorFromdscribe(
         lMax, nMax, atomTypes, atomicSlices
     )
+    if len(soapFromdscribe.shape) > 3:
+        raise ValueError(
+            "fillSOAPVectorFromdscribe: cannot convert array with len(shape) >=3"
+        )
+    if out is None:
+        return soapFromdscribe[..., indexes]
+    if out.dtype == soapFromdscribe.dtype:
+        # the indexes are valid: "clip" avoids the buffering of "raise"
+        return numpy.take(soapFromdscribe, indexes, axis=-1, out=out, mode="clip")
+    # numpy.take does not cast: the temporary arrays are limited to a frame
     if len(soapFromdscribe.shape) == 1:
-        return soapFromdscribe[indexes]
-    if len(soapFromdscribe.shape) == 2:
-        return soapFromdscribe[:, indexes]
-    if len(soapFromdscribe.shape) == 3:
-        return soapFromdscribe[:, :, indexes]
-
-    raise ValueError(
-        "fillSOAPVectorFromdscribe: cannot convert array with len(shape) >=3"
+        out[:] = soapFromdscribe[indexes]
+        return out
+    for source, destination in zip(soapFromdscribe, out):
+        destination[:] = source[..., indexes]
+    return out
+
+
+def fillAndNormalizeSOAPVectorFromdscribe(
+    soapFromdscribe: numpy.ndarray,
+    lMax: int,
+    nMax: int,
+    atomTypes: list = None,
+    atomicSlices: dict = None,
+    out: "numpy.ndarray|None" = None,
+) -> numpy.ndarray:
+    """Fills the SOAP vectors from dscribe and normalizes them in place
+
+        Equivalent to ``normalizeArray(fillSOAPVectorFromdscribe(...))``, but
+        the full spectrum is gathered in a single array (`out`, if given) and
+        then normalized in place, without allocating a second copy
+
+    Args:
+        soapFromdscribe (numpy.ndarray):
+            the result of the SOAP calculation from the dscribe utility
+        lMax (int):
+            the l_max specified in the calculation.
+        nMax (int):
+            the n_max specified in the calculation.
+        atomTypes (list[str]):
+            the list of atomic species. Defaults to None.
+        atomicSlices (dict):
+            the slices of the SOAP vector relative to che atomic species
+            combinations. Defaults to None.
+        out (numpy.ndarray|None, optional):
+            a preallocated array where the result is stored.
+            Defaults to None (a new array is returned).
+
+    Returns:
+        numpy.ndarray: the normalized full soap spectrum (`out`, if given)
+    """
+    filled = fillSOAPVectorFromdscribe(
+        soapFromdscribe, lMax, nMax, atomTypes, atomicSlices, out=out
     )
+    return normalizeArray(filled, out=filled)
 
 
 def getSOAPSettings(fitsetData: h5py.Dataset) -> dict:
@@ -351,3 +434,68 @@ def getSOAPSettings(fitsetData: h5py.Dataset) -> dict:
         "atomTypes": symbols,
         "atomicSlices": atomicSlices,
     }
+
+
+def _filledSOAPChunks(
+    soapDataset: h5py.Dataset,
+    atoms: "slice|numpy.ndarray" = slice(None),
+    doNormalize: bool = True,
+    nOutputsPerAtom: int = 0,
+    stageName: str = "fill",
+):
+    """Yields the chunks of a SOAP dataset, filled and normalized
+
+        The number of frames in the chunks is planned from the memory budget
+        (see :mod:`SOAPify.chunking`) and the chunks are filled with
+        :func:`fillAndNormalizeSOAPVectorFromdscribe` in the same buffer:
+        the yielded array is overwritten by the next chunk
+
+    Args:
+        soapDataset (h5py.Dataset): the dataset with the SOAP fingerprints
+        atoms (slice|numpy.ndarray, optional):
+            the atoms to read, see :func:`SOAPify.HDF5er.getAtomsSelection`.
+            Defaults to slice(None).
+        doNormalize (bool, optional):
+            if False the fingerprints are only filled. Defaults to True.
+        nOutputsPerAtom (int, optional):
+            the number of results calculated for each atom. Defaults to 0.
+        stageName (str, optional):
+            the name of the stage in the instrumentation records.
+            Defaults to "fill".
+
+    Yields:
+        tuple[int,int,numpy.ndarray]: the first and the last frame of the chunk
+        and the fingerprints, with shape (frames, atoms, features)
+    """
+    fillSettings = getSOAPSettings(soapDataset)
+    nframes = soapDataset.shape[0]
+    nat = getAtomsSelectionLength(soapDataset.shape[1], atoms)
+    nfeatures = _filledSOAPLength(**fillSettings)
+    chunks = getattr(soapDataset, "chunks", None)
+    chunkDim = planChunks(
+        nat,
+        nfeatures,
+        soapDataset.dtype,
+        nreferences=nOutputsPerAtom,
+        nInputFeatures=soapDataset.shape[2],
+        nframes=nframes,
+        alignTo=chunks[0] if chunks is not None else None,
+    ).compute
+    filledChunk = numpy.empty(
+        (min(chunkDim, nframes), nat, nfeatures), dtype=soapDataset.dtype
+    )
+    for start in range(0, nframes, chunkDim):
+        stop = min(start + chunkDim, nframes)
+        with timedStage(stageName, "read", start, stop) as stage:
+            frames = soapDataset[start:stop, atoms]
+            stage["bytes"] = frames.nbytes
+        with timedStage(stageName, "fill", start, stop) as stage:
+            out = filledChunk[: stop - start]
+            if doNormalize:
+                frames = fillAndNormalizeSOAPVectorFromdscribe(
+                    frames, **fillSettings, out=out
+                )
+            else:
+                frames = fillSOAPVectorFromdscribe(frames, **fillSettings, out=out)
+            stage["bytes"] = frames.nbytes
+        yield start, stop, frames
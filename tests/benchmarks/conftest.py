@@ -0,0 +1,142 @@
+"""Fixtures and synthetic trajectory generators for the benchmarks
+
+The benchmarks run only with `pytest --runbenchmarks tests/benchmarks` and
+report the throughput of each hot path in atom-frames per second
+"""
+import time
+import pytest
+import numpy
+import h5py
+import MDAnalysis
+import SOAPify
+import SOAPify.HDF5er as HDF5er
+
+SPECIES = ["Cu", "Ag", "Au", "Pt"]
+
+_RESULTS = []
+
+
+def syntheticUniverse(
+    nat: int, nframes: int, nspecies: int = 1, seed: int = 12345
+) -> MDAnalysis.Universe:
+    """a universe of `nat` atoms at liquid-like density that move randomly"""
+    rng = numpy.random.default_rng(seed)
+    # about 0.06 atoms per cubic Å, like a metal
+    side = (nat / 0.06) ** (1 / 3)
+    traj = numpy.empty((nframes, nat, 3), dtype=numpy.float32)
+    traj[0] = rng.uniform(0, side, size=(nat, 3))
+    for frame in range(1, nframes):
+        traj[frame] = traj[frame - 1] + rng.normal(0, 0.1, size=(nat, 3))
+    universe = MDAnalysis.Universe.empty(
+        nat, trajectory=True, atom_resindex=[0] * nat, residue_segindex=[0]
+    )
+    universe.add_TopologyAttr("type", [SPECIES[i % nspecies] for i in range(nat)])
+    universe.trajectory = MDAnalysis.coordinates.memory.MemoryReader(
+        traj % side,
+        order="fac",
+        dimensions=numpy.array([[side, side, side, 90.0, 90.0, 90.0]] * nframes),
+    )
+    return universe
+
+
+def syntheticTrajectoryGroup(
+    h5file: h5py.File, nat: int, nframes: int, nspecies: int = 1
+) -> h5py.Group:
+    """stores a :func:`syntheticUniverse` in the trajectory group "synthetic" """
+    trajGroup = h5file.require_group("Trajectories/synthetic")
+    HDF5er.universe2HDF5(syntheticUniverse(nat, nframes, nspecies), trajGroup)
+    return trajGroup
+
+
+def syntheticSOAPDataset(
+    h5file: h5py.File,
+    nat: int,
+    nframes: int,
+    nspecies: int = 1,
+    nmax: int = 4,
+    lmax: int = 4,
+    seed: int = 12345,
+) -> h5py.Dataset:
+    """a SOAP dataset, with the attributes of a real calculation, filled with noise
+
+    the attributes are calculated on the first frame of a synthetic universe,
+    then the dataset is resized and filled with random positive numbers
+    """
+    rng = numpy.random.default_rng(seed)
+    soapGroup = h5file.require_group("SOAP")
+    SOAPify.saponifyFrames(
+        syntheticUniverse(nat, 1, nspecies),
+        soapGroup,
+        "synthetic",
+        SOAPrcut=4.0,
+        SOAPnmax=nmax,
+        SOAPlmax=lmax,
+        verbose=False,
+    )
+    dataset = soapGroup["synthetic"]
+    dataset.resize(nframes, axis=0)
+    for first in range(0, nframes, 100):
+        last = min(first + 100, nframes)
+        dataset[first:last] = rng.random((last - first,) + dataset.shape[1:])
+    return dataset
+
+
+def syntheticClassification(
+    nat: int, nframes: int, nstates: int = 4, pChange: float = 0.05, seed: int = 12345
+) -> SOAPify.SOAPclassification:
+    """a classification where each atom changes state with probability `pChange`"""
+    rng = numpy.random.default_rng(seed)
+    changes = rng.random((nframes, nat)) < pChange
+    jumps = rng.integers(1, nstates, size=(nframes, nat)) * changes
+    references = numpy.cumsum(jumps, axis=0) % nstates
+    return SOAPify.SOAPclassification(
+        [], references, [f"state{i}" for i in range(nstates)]
+    )
+
+
+class Throughput:
+    """Times a callable and records its throughput in atom-frames per second"""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __call__(
+        self,
+        function,
+        *args,
+        atomFrames: int,
+        repeat: int = 3,
+        label: str = "",
+        **kwargs,
+    ):
+        """calls `function(*args, **kwargs)` `repeat` times and keeps the best time
+
+            `label` distinguishes the measures taken in the same benchmark
+
+        Returns:
+            the result of the last call
+        """
+        best = float("inf")
+        for _ in range(repeat):
+            tStart = time.perf_counter()
+            result = function(*args, **kwargs)
+            best = min(best, time.perf_counter() - tStart)
+        _RESULTS.append((self.name + label, best, atomFrames / best))
+        return result
+
+
+@pytest.fixture
+def throughput(request):
+    return Throughput(request.node.name)
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _RESULTS:
+        return
+    terminalreporter.section("SOAPify benchmarks")
+    width = max(len(name) for name, *_ in _RESULTS)
+    terminalreporter.write_line(
+        f"{'benchmark':<{width}} {'best time [s]':>14} {'atom-frames/s':>14}"
+    )
+    for name, best, rate in _RESULTS:
+        terminalreporter.write_line(f"{name:<{width}} {best:>14.4g} {rate:>14.4g}")
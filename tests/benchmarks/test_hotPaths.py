@@ -0,0 +1,215 @@
+"""Throughput of the SOAPify hot paths, run with `pytest --runbenchmarks`"""
+import io
+import os
+import sys
+import subprocess
+import pytest
+import numpy
+import h5py
+import SOAPify
+import SOAPify.HDF5er as HDF5er
+import SOAPify.analysis as analysis
+from SOAPify.transitions import trackStates, transitionMatrixFromSOAPClassification
+from .conftest import (
+    syntheticUniverse,
+    syntheticTrajectoryGroup,
+    syntheticSOAPDataset,
+    syntheticClassification,
+)
+
+pytestmark = pytest.mark.benchmark
+
+
+@pytest.fixture(params=[(100, 100), (1000, 20)], ids=lambda p: f"{p[0]}at{p[1]}fr")
+def systemSize(request):
+    """the number of atoms and of frames"""
+    return request.param
+
+
+@pytest.fixture(params=[1, 2], ids=lambda p: f"{p}species")
+def nspecies(request):
+    return request.param
+
+
+@pytest.fixture(params=[(4, 4), (8, 8)], ids=lambda p: f"n{p[0]}l{p[1]}")
+def nmaxlmax(request):
+    return request.param
+
+
+@pytest.fixture
+def soapDataset(tmp_path, systemSize, nspecies, nmaxlmax):
+    nat, nframes = systemSize
+    nmax, lmax = nmaxlmax
+    with h5py.File(tmp_path / "soap.hdf5", "w") as h5file:
+        yield syntheticSOAPDataset(h5file, nat, nframes, nspecies, nmax, lmax)
+
+
+def test_saponifyTrajectory(tmp_path, throughput, systemSize, nspecies, nmaxlmax):
+    nat, nframes = systemSize
+    nmax, lmax = nmaxlmax
+    nframes = min(nframes, 10)
+    with h5py.File(tmp_path / "traj.hdf5", "w") as h5file:
+        trajGroup = syntheticTrajectoryGroup(h5file, nat, nframes, nspecies)
+        soapGroup = h5file.require_group("SOAP")
+        throughput(
+            SOAPify.saponifyTrajectory,
+            trajGroup,
+            soapGroup,
+            SOAPrcut=4.0,
+            SOAPnmax=nmax,
+            SOAPlmax=lmax,
+            doOverride=True,
+            verbose=False,
+            atomFrames=nat * nframes,
+            repeat=1,
+        )
+
+
+def test_fillSOAPVectorFromdscribe(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    settings = SOAPify.getSOAPSettings(soapDataset)
+    data = soapDataset[:]
+    throughput(
+        SOAPify.fillSOAPVectorFromdscribe, data, **settings, atomFrames=nat * nframes
+    )
+
+
+def test_normalizeArray(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    data = soapDataset[:]
+    throughput(SOAPify.normalizeArray, data, atomFrames=nat * nframes)
+
+
+def test_timeSOAPsimple(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    settings = SOAPify.getSOAPSettings(soapDataset)
+    data = SOAPify.normalizeArray(
+        SOAPify.fillSOAPVectorFromdscribe(soapDataset[:], **settings)
+    )
+    throughput(analysis.timeSOAPsimple, data, atomFrames=nat * nframes)
+
+
+def test_timeSOAP(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    # the generic timeSOAP calls the distance atom by atom
+    nframes = min(nframes, 5)
+    settings = SOAPify.getSOAPSettings(soapDataset)
+    data = SOAPify.normalizeArray(
+        SOAPify.fillSOAPVectorFromdscribe(soapDataset[:nframes], **settings)
+    )
+    throughput(analysis.timeSOAP, data, atomFrames=nat * nframes, repeat=1)
+
+
+def test_getTimeSOAPSimple(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    throughput(analysis.getTimeSOAPSimple, soapDataset, atomFrames=nat * nframes)
+
+
+def test_getDistancesFromRef(throughput, soapDataset):
+    nframes, nat = soapDataset.shape[:2]
+    settings = SOAPify.getSOAPSettings(soapDataset)
+    # the references have the same format of the dataset: no conversion
+    spectra = SOAPify.normalizeArray(soapDataset[0, :8])
+    references = SOAPify.SOAPReferences(
+        [f"ref{i}" for i in range(len(spectra))],
+        spectra,
+        settings["lMax"],
+        settings["nMax"],
+    )
+    throughput(
+        SOAPify.getDistancesFromRef,
+        soapDataset,
+        references,
+        SOAPify.SOAPdistanceNormalized,
+        doNormalize=True,
+        atomFrames=nat * nframes,
+    )
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_trackStates(throughput, systemSize, n_jobs):
+    nat, nframes = systemSize
+    classification = syntheticClassification(nat, nframes * 10)
+    throughput(
+        trackStates, classification, n_jobs=n_jobs, atomFrames=nat * nframes * 10
+    )
+
+
+@pytest.mark.parametrize("sparse", [False, True])
+def test_transitionMatrix(throughput, systemSize, sparse):
+    nat, nframes = systemSize
+    classification = syntheticClassification(nat, nframes * 10)
+    throughput(
+        transitionMatrixFromSOAPClassification,
+        classification,
+        sparse=sparse,
+        atomFrames=nat * nframes * 10,
+    )
+
+
+def test_LENS(throughput, systemSize):
+    nat, nframes = systemSize
+    nframes = min(nframes, 10)
+    universe = syntheticUniverse(nat, nframes)
+    neighbours = throughput(
+        analysis.listNeighboursAlongTrajectory,
+        universe,
+        cutOff=3.0,
+        atomFrames=nat * nframes,
+        repeat=1,
+        label=":neighbours",
+    )
+    throughput(
+        analysis.neighbourChangeInTime,
+        neighbours,
+        atomFrames=nat * nframes,
+        label=":changes",
+    )
+
+
+def test_getXYZfromTrajGroup(tmp_path, throughput, systemSize):
+    nat, nframes = systemSize
+    with h5py.File(tmp_path / "traj.hdf5", "w") as h5file:
+        trajGroup = syntheticTrajectoryGroup(h5file, nat, nframes)
+        throughput(
+            HDF5er.getXYZfromTrajGroup,
+            io.StringIO(),
+            trajGroup,
+            OneD=numpy.zeros((nframes, nat)),
+            atomFrames=nat * nframes,
+        )
+
+
+def test_saveXYZfromTrajGroupInParallel(tmp_path, throughput, systemSize):
+    nat, nframes = systemSize
+    with h5py.File(tmp_path / "traj.hdf5", "w") as h5file:
+        trajGroup = syntheticTrajectoryGroup(h5file, nat, nframes)
+    with h5py.File(tmp_path / "traj.hdf5", "r") as h5file:
+        throughput(
+            HDF5er.saveXYZfromTrajGroupInParallel,
+            tmp_path / "traj.xyz",
+            h5file["Trajectories/synthetic"],
+            n_jobs=2,
+            atomFrames=nat * nframes,
+        )
+
+
+@pytest.mark.parametrize(
+    "statement",
+    [
+        "import SOAPify",
+        "from SOAPify import getDistancesFromRef",
+        "from SOAPify import saponifyTrajectory",
+    ],
+)
+def test_importTime(throughput, statement):
+    """the time of a fresh interpreter that runs `statement`, in runs per second"""
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    throughput(
+        subprocess.run,
+        [sys.executable, "-c", statement],
+        check=True,
+        env=env,
+        atomFrames=1,
+        repeat=5,
+    )
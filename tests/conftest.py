@@ -13,6 +13,30 @@ from .testSupport import (
 )
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--runbenchmarks",
+        action="store_true",
+        default=False,
+        help="run the benchmarks in tests/benchmarks",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "benchmark: measures the throughput of a hot path"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--runbenchmarks"):
+        return
+    skipBenchmark = pytest.mark.skip(reason="needs --runbenchmarks to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skipBenchmark)
+
+
 def __alph(k):
     "helper function to not overlap ref names in randomSOAPReferences"
     from string import ascii_lowercase as alph
@@ -355,3 +379,23 @@ def referencesTrajectorySOAP(referencesTrajectory):
         )
 
     return confFile, groupName
+
+
+@pytest.fixture(scope="module")
+def soapDatasetAndReferences(referencesTrajectorySOAP):
+    """The SOAP dataset of referencesTrajectorySOAP, open in read mode, and three
+    references: the filled and normalized fingerprints of its first three atoms
+    in the first frame"""
+    confFile, groupName = referencesTrajectorySOAP
+    with h5py.File(confFile, "r") as f:
+        dataset = f[f"SOAP/{groupName}"]
+        settings = SOAPify.getSOAPSettings(dataset)
+        references = SOAPify.SOAPReferences(
+            ["a", "b", "c"],
+            SOAPify.normalizeArray(
+                SOAPify.fillSOAPVectorFromdscribe(dataset[0, :3], **settings)
+            ),
+            settings["lMax"],
+            settings["nMax"],
+        )
+        yield dataset, references
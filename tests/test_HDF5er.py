@@ -1,8 +1,13 @@
 """Test for HDF5er"""
+import os
+import threading
+from concurrent.futures.process import BrokenProcessPool
 import SOAPify.HDF5er as HDF5er
 import h5py
 import numpy
-from numpy.testing import assert_array_almost_equal
+import pytest
+import MDAnalysis
+from numpy.testing import assert_array_almost_equal, assert_array_equal
 
 
 def test_istTrajectoryGroupCheck(tmp_path):
@@ -115,3 +120,249 @@ def test_MDA2HDF5Box(input_universe, tmp_path):
                     fourAtomsFiveFrames.dimensions, group["Box"][i]
                 ):
                     assert (original - float(control)) < 1e-7
+
+
+def test_multipleMDA2HDF5(input_universe, tmp_path):
+    simulations = {}
+    universes = {}
+    for i, angles in enumerate([(90, 90, 90), (60, 60, 60), (90, 90, 45)]):
+        universe = input_universe(angles)
+        pdbName = str(tmp_path / f"sim{i}.pdb")
+        dcdName = str(tmp_path / f"sim{i}.dcd")
+        universe.atoms.write(pdbName)
+        with MDAnalysis.Writer(dcdName, len(universe.atoms)) as dcd:
+            for _ in universe.trajectory:
+                dcd.write(universe.atoms)
+        simulations[f"sim{i}"] = [pdbName, dcdName]
+        universes[f"sim{i}"] = MDAnalysis.Universe(pdbName, dcdName)
+    attributes = {"ts": "1ps"}
+    fname = tmp_path / "multiple.hdf5"
+    HDF5er.multipleMDA2HDF5(
+        simulations, fname, trajChunkSize=2, attrs=attributes, n_jobs=2
+    )
+    serialFname = tmp_path / "serial.hdf5"
+    for name, universe in universes.items():
+        HDF5er.MDA2HDF5(universe, serialFname, name, trajChunkSize=2)
+    with h5py.File(fname, "r") as hdf5test, h5py.File(serialFname, "r") as serial:
+        assert set(hdf5test["Trajectories"].keys()) == set(simulations.keys())
+        for name in simulations:
+            group = hdf5test[f"Trajectories/{name}"]
+            assert HDF5er.isTrajectoryGroup(group)
+            assert group.attrs["ts"] == attributes["ts"]
+            for key in ["Types", "Trajectory", "Box"]:
+                assert group[key].shape == serial[f"Trajectories/{name}"][key].shape
+            assert_array_almost_equal(
+                group["Trajectory"][:], serial[f"Trajectories/{name}/Trajectory"][:]
+            )
+            assert_array_almost_equal(
+                group["Box"][:], serial[f"Trajectories/{name}/Box"][:]
+            )
+
+
+def test_multipleMDA2HDF5Errors(input_universe, tmp_path):
+    universe = input_universe()
+    pdbName = str(tmp_path / "sim.pdb")
+    universe.atoms.write(pdbName)
+    fname = tmp_path / "multiple.hdf5"
+    # 4 atoms cannot be described with three types
+    with pytest.raises(ValueError, match="atom types"):
+        HDF5er.multipleMDA2HDF5(
+            {"good": [pdbName], "bad": [pdbName]},
+            fname,
+            atomTypes=["A", "B", "C"],
+            n_jobs=1,
+        )
+    HDF5er.multipleMDA2HDF5({"good": [pdbName]}, fname, atomTypes=["A", "B"], n_jobs=1)
+    with h5py.File(fname, "r") as hdf5test:
+        assert list(hdf5test["Trajectories"].keys()) == ["good"]
+        assert list(hdf5test["Trajectories/good/Types"].asstr()) == ["A", "B"] * 2
+
+
+def _crashingChunks(*args, **kwargs):
+    # the worker process dies without sending its error
+    os._exit(1)
+
+
+def _raisesInTime(function, *args, timeout=60, **kwargs):
+    """returns the exception raised by function, failing if it takes too long"""
+    outcome = []
+
+    def target():
+        try:
+            function(*args, **kwargs)
+        except BaseException as error:  # pylint: disable=broad-except
+            outcome.append(error)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), f"still running after {timeout} s"
+    assert len(outcome) == 1
+    return outcome[0]
+
+
+def test_multipleMDA2HDF5Failures(input_universe, tmp_path, monkeypatch):
+    universe = input_universe()
+    pdbName = str(tmp_path / "sim.pdb")
+    dcdName = str(tmp_path / "sim.dcd")
+    universe.atoms.write(pdbName)
+    with MDAnalysis.Writer(dcdName, len(universe.atoms)) as dcd:
+        for _ in range(20):
+            for _ in universe.trajectory:
+                dcd.write(universe.atoms)
+    simulations = {"sim": [pdbName, dcdName], "copy": [pdbName, dcdName]}
+
+    def failingExport(*args, **kwargs):
+        raise OSError("disk full")
+
+    # the writer fails while the workers fill the queue
+    with monkeypatch.context() as patch:
+        patch.setattr(HDF5er.ToHDF5, "exportChunk2HDF5", failingExport)
+        error = _raisesInTime(
+            HDF5er.multipleMDA2HDF5,
+            simulations,
+            tmp_path / "writer.hdf5",
+            trajChunkSize=1,
+            n_jobs=1,
+        )
+    assert isinstance(error, OSError)
+
+    # a worker dies: the forked workers see the patched module
+    with monkeypatch.context() as patch:
+        patch.setattr(HDF5er.ToHDF5, "_trajectoryChunks", _crashingChunks)
+        error = _raisesInTime(
+            HDF5er.multipleMDA2HDF5,
+            simulations,
+            tmp_path / "crash.hdf5",
+            trajChunkSize=1,
+            n_jobs=1,
+        )
+    assert isinstance(error, BrokenProcessPool)
+
+
+def test_exportChunk2HDF5Resizes(tmp_path):
+    fname = tmp_path / "chunks.hdf5"
+    nat = 4
+    with h5py.File(fname, "w") as hdf5test:
+        group = hdf5test.create_group("Trajectories/test")
+        group.create_dataset("Trajectory", (0, nat, 3), maxshape=(None, nat, 3))
+        group.create_dataset("Box", (0, 6), maxshape=(None, 6))
+        boxes = numpy.ones((3, 6))
+        coordinates = numpy.ones((3, nat, 3))
+        HDF5er.HDF5erUtils.exportChunk2HDF5(group, 0, 3, boxes, coordinates)
+        assert group["Trajectory"].shape == (3, nat, 3)
+        HDF5er.HDF5erUtils.exportChunk2HDF5(
+            group, 3, 6, 2 * boxes, 2 * coordinates, growGeometrically=True
+        )
+        assert group["Trajectory"].shape == (6, nat, 3)
+        HDF5er.HDF5erUtils.exportChunk2HDF5(
+            group, 6, 8, boxes[:2], coordinates[:2], growGeometrically=True
+        )
+        # the datasets doubled their lenght
+        assert group["Trajectory"].shape == (12, nat, 3)
+        assert group["Box"].shape == (12, 6)
+        # writing inside the datasets does not resize them
+        HDF5er.HDF5erUtils.exportChunk2HDF5(group, 0, 3, 3 * boxes, 3 * coordinates)
+        assert group["Trajectory"].shape == (12, nat, 3)
+        HDF5er.HDF5erUtils.trimTrajectoryGroup(group, 8)
+        assert group["Trajectory"].shape == (8, nat, 3)
+        assert group["Box"].shape == (8, 6)
+        assert_array_almost_equal(group["Box"][:, 0], [3, 3, 3, 2, 2, 2, 1, 1])
+
+
+def test_MDA2HDF5OverwritesLongerTrajectories(input_universe, tmp_path):
+    fourAtomsFiveFrames = input_universe()
+    fname = tmp_path / "overwrite.hdf5"
+    HDF5er.MDA2HDF5(fourAtomsFiveFrames, fname, "traj", trajChunkSize=2)
+    HDF5er.MDA2HDF5(
+        fourAtomsFiveFrames, fname, "traj", trajChunkSize=2, trajslice=slice(0, 3)
+    )
+    with h5py.File(fname, "r") as hdf5test:
+        group = hdf5test["Trajectories/traj"]
+        assert group["Trajectory"].shape == (3, len(fourAtomsFiveFrames.atoms), 3)
+        assert group["Box"].shape == (3, 6)
+        for i, _ in enumerate(fourAtomsFiveFrames.trajectory[:3]):
+            assert_array_almost_equal(
+                group["Trajectory"][i], fourAtomsFiveFrames.atoms.positions
+            )
+
+
+@pytest.mark.parametrize("quantization", [0.1, 0.001])
+def test_MDA2HDF5Quantized(input_universe, tmp_path, quantization):
+    universe = input_universe((90.0, 60.0, 90.0))
+    fname = tmp_path / "quantized.hdf5"
+    HDF5er.MDA2HDF5(universe, fname, "float", trajChunkSize=3)
+    HDF5er.MDA2HDF5(
+        universe, fname, "quantized", trajChunkSize=3, quantization=quantization
+    )
+    with h5py.File(fname, "r") as hdf5test:
+        reference = hdf5test["Trajectories/float"]
+        group = hdf5test["Trajectories/quantized"]
+        assert HDF5er.isTrajectoryGroup(group)
+        assert group["Trajectory"].dtype == numpy.int32
+        trajectory = HDF5er.getTrajectoryDataset(group)
+        assert isinstance(trajectory, HDF5er.QuantizedTrajectory)
+        assert trajectory.shape == reference["Trajectory"].shape
+        expected = reference["Trajectory"][:]
+        # the error is at most half of the quantization
+        assert numpy.max(numpy.abs(trajectory[:] - expected)) <= quantization / 2
+        assert_array_almost_equal(
+            trajectory[:], numpy.rint(expected / quantization) * quantization
+        )
+        # any selection is decoded in the same way
+        for key in [
+            4,
+            slice(1, None, 2),
+            [0, 3, 4],
+            (slice(2, 5), [0, 3]),
+            ([4, 1], 2, 0),
+        ]:
+            assert_array_almost_equal(trajectory[key], trajectory[:][key])
+        # the readers decode the coordinates transparently
+        for stream in [False, True]:
+            newUniverse = HDF5er.createUniverseFromSlice(group, stream=stream)
+            for i, _ in enumerate(newUniverse.trajectory):
+                assert_array_almost_equal(
+                    newUniverse.atoms.positions, trajectory[i], decimal=5
+                )
+        aseAtoms = HDF5er.HDF52AseAtomsChunckedwithSymbols(
+            group, slice(None), slice(None), group["Types"].asstr()[:]
+        )
+        for i, frameAtoms in enumerate(aseAtoms):
+            assert_array_almost_equal(frameAtoms.positions, trajectory[i])
+
+
+def test_QuantizedTrajectoryWrite(tmp_path):
+    fname = tmp_path / "quantizedWrite.hdf5"
+    rng = numpy.random.default_rng(12345)
+    nat = 5
+    coordinates = rng.uniform(-10, 10, size=(11, nat, 3))
+    with h5py.File(fname, "w") as hdf5test:
+        group = hdf5test.create_group("traj")
+        dataset = group.create_dataset(
+            "Trajectory", (11, nat, 3), dtype=numpy.int32, chunks=(4, nat, 3)
+        )
+        dataset.attrs.create("quantization", 0.01)
+        dataset.attrs.create("keyframeInterval", 4)
+        dataset.attrs.create("decodedType", "<f8")
+        trajectory = HDF5er.getTrajectoryDataset(group)
+        trajectory[:] = coordinates
+        expected = numpy.rint(coordinates / 0.01) * 0.01
+        assert_array_almost_equal(trajectory[:], expected)
+        # the keyframes store the coordinates, the other frames the differences
+        assert_array_equal(dataset[4], numpy.rint(coordinates[4] / 0.01))
+        assert_array_equal(
+            dataset[5],
+            numpy.rint(coordinates[5] / 0.01) - numpy.rint(coordinates[4] / 0.01),
+        )
+        # overwriting some frames does not change the following ones
+        newCoordinates = rng.uniform(-10, 10, size=(3, nat, 3))
+        trajectory[2:5] = newCoordinates
+        expected[2:5] = numpy.rint(newCoordinates / 0.01) * 0.01
+        trajectory[6:7] = newCoordinates[:1]
+        expected[6:7] = numpy.rint(newCoordinates[:1] / 0.01) * 0.01
+        assert_array_almost_equal(trajectory[:], expected)
+        with pytest.raises(ValueError, match="contiguous"):
+            trajectory[[1, 2]] = newCoordinates[:2]
+        with pytest.raises(ValueError, match="too big"):
+            trajectory[0:1] = numpy.full((1, nat, 3), 1e10)
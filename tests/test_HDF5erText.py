@@ -0,0 +1,206 @@
+"""Tests for the importers of text trajectories of HDF5er"""
+import SOAPify.HDF5er as HDF5er
+import h5py
+import numpy
+import pytest
+from numpy.testing import assert_array_almost_equal, assert_array_equal
+from MDAnalysis.lib.mdamath import triclinic_vectors
+
+
+def __writeLAMMPSDump(filename, coordinates, boxes, types, scaled=False):
+    """writes a triclinic LAMMPS dump, with the atoms in a shuffled order"""
+    rng = numpy.random.default_rng(42)
+    nat = coordinates.shape[1]
+    with open(filename, "w") as file:
+        for frame, (coords, box) in enumerate(zip(coordinates, boxes)):
+            vectors = triclinic_vectors(box)
+            xy, xz, yz = vectors[1][0], vectors[2][0], vectors[2][1]
+            lo = numpy.array([-1.0, 0.5, 2.0])
+            hi = lo + numpy.diag(vectors)
+            bounds = [
+                (lo[0] + min(0.0, xy, xz, xy + xz), hi[0] + max(0.0, xy, xz, xy + xz)),
+                (lo[1] + min(0.0, yz), hi[1] + max(0.0, yz)),
+                (lo[2], hi[2]),
+            ]
+            file.write(f"ITEM: TIMESTEP\n{frame * 10}\n")
+            file.write(f"ITEM: NUMBER OF ATOMS\n{nat}\n")
+            file.write("ITEM: BOX BOUNDS xy xz yz pp pp pp\n")
+            for (blo, bhi), tilt in zip(bounds, (xy, xz, yz)):
+                file.write(f"{blo} {bhi} {tilt}\n")
+            if scaled:
+                file.write("ITEM: ATOMS id element xs ys zs\n")
+                coords = (coords - lo) @ numpy.linalg.inv(vectors)
+            else:
+                file.write("ITEM: ATOMS id type x y z\n")
+            for atomID in rng.permutation(nat):
+                x, y, z = coords[atomID]
+                file.write(f"{atomID + 1} {types[atomID]} {x!r} {y!r} {z!r}\n")
+
+
+def test_xyz2HDF5(hdf5_file, tmp_path):
+    testFname = hdf5_file[0]
+    xyzName = tmp_path / "exported.xyz"
+    with h5py.File(testFname, "r") as hdf5test:
+        group = hdf5test["Trajectories/4Atoms5Frames"]
+        nframes, nat = group["Trajectory"].shape[:2]
+        HDF5er.saveXYZfromTrajGroup(
+            xyzName, group, OneD=numpy.ones((nframes, nat), dtype=int)
+        )
+        expectedTraj = group["Trajectory"][:]
+        expectedBox = group["Box"][:]
+        expectedTypes = group["Types"].asstr()[:]
+
+    importedName = tmp_path / "imported.hdf5"
+    HDF5er.text2HDF5(xyzName, importedName, "imported", trajChunkSize=2)
+    with h5py.File(importedName, "r") as imported:
+        group = imported["Trajectories/imported"]
+        assert HDF5er.isTrajectoryGroup(group)
+        assert_array_equal(group["Types"].asstr()[:], expectedTypes)
+        assert_array_almost_equal(group["Trajectory"][:], expectedTraj)
+        assert_array_almost_equal(group["Box"][:], expectedBox, decimal=4)
+
+
+def test_xyz2HDF5WithoutLattice(tmp_path):
+    rng = numpy.random.default_rng(12345)
+    coordinates = rng.uniform(0, 10, size=(7, 3, 3))
+    xyzName = tmp_path / "plain.xyz"
+    with open(xyzName, "w") as file:
+        for coords in coordinates:
+            file.write("3\nno box here\n")
+            for atomType, (x, y, z) in zip(["O", "H", "H"], coords):
+                file.write(f"{atomType} {x!r} {y!r} {z!r}\n")
+
+    importedName = tmp_path / "imported.hdf5"
+    with pytest.raises(ValueError, match="box"):
+        HDF5er.text2HDF5(xyzName, importedName, "noBox")
+    box = [10.0, 10.0, 10.0, 90.0, 90.0, 90.0]
+    HDF5er.text2HDF5(xyzName, importedName, "plain", trajChunkSize=3, boxes=box)
+    with h5py.File(importedName, "r") as imported:
+        group = imported["Trajectories/plain"]
+        assert_array_equal(group["Types"].asstr()[:], ["O", "H", "H"])
+        assert_array_equal(group["Trajectory"][:], coordinates)
+        assert_array_equal(group["Box"][:], [box] * len(coordinates))
+
+
+@pytest.mark.parametrize("scaled", [False, True])
+def test_lammpsDump2HDF5(tmp_path, scaled):
+    rng = numpy.random.default_rng(12345)
+    nframes, nat = 9, 6
+    coordinates = rng.uniform(0, 5, size=(nframes, nat, 3))
+    boxes = numpy.array([[10.0 + i, 11.0, 12.0, 80.0, 70.0, 60.0] for i in range(9)])
+    types = ["Cu", "Ag", "Cu", "Au", "Ag", "Cu"]
+    dumpName = tmp_path / "traj.lammpsdump"
+    __writeLAMMPSDump(dumpName, coordinates, boxes, types, scaled=scaled)
+
+    importedName = tmp_path / "imported.hdf5"
+    HDF5er.text2HDF5(dumpName, importedName, "dump", trajChunkSize=4)
+    with h5py.File(importedName, "r") as imported:
+        group = imported["Trajectories/dump"]
+        if scaled:
+            assert_array_equal(group["Types"].asstr()[:], types)
+        assert_array_almost_equal(group["Trajectory"][:], coordinates)
+        assert_array_almost_equal(group["Box"][:], boxes, decimal=4)
+
+
+@pytest.mark.parametrize("fileFormat", ["xyz", "lammpsdump"])
+def test_textTrajectoryFrameOffsets(tmp_path, fileFormat):
+    rng = numpy.random.default_rng(12345)
+    nframes, nat = 11, 5
+    coordinates = rng.uniform(0, 5, size=(nframes, nat, 3))
+    boxes = numpy.array([[10.0, 11.0, 12.0, 90.0, 90.0, 90.0]] * nframes)
+    types = ["C"] * nat
+    fname = tmp_path / "traj.txt"
+    if fileFormat == "xyz":
+        with open(fname, "w") as file:
+            for coords in coordinates:
+                file.write(f'{nat}\nLattice="10 0 0 0 11 0 0 0 12"\n')
+                for x, y, z in coords:
+                    file.write(f"C {x!r} {y!r} {z!r}\n")
+    else:
+        __writeLAMMPSDump(fname, coordinates, boxes, types)
+
+    offsets = HDF5er.getFrameOffsets(fname, fileFormat)
+    assert len(offsets) == nframes + 1
+    with open(fname, "rb") as file:
+        assert offsets[-1] == len(file.read())
+
+    with h5py.File(tmp_path / "imported.hdf5", "w") as imported:
+        importedOffsets = HDF5er.textTrajectory2HDF5(
+            fname, imported.require_group("traj"), fileFormat, trajChunkSize=4
+        )
+    assert_array_equal(importedOffsets, offsets)
+
+    for start, stop in [(0, None), (3, 7), (10, 11), (5, 30)]:
+        expected = coordinates[start:stop]
+        for frameOffsets in [None, offsets]:
+            readTypes, readCoords, readBoxes = HDF5er.readTextTrajectoryFrames(
+                fname, start, stop, offsets=frameOffsets, fileFormat=fileFormat
+            )
+            assert_array_equal(readTypes, types)
+            assert_array_almost_equal(readCoords, expected)
+            assert_array_almost_equal(readBoxes, boxes[start:stop])
+
+
+def test_textTrajectoryUnknownFormat(tmp_path):
+    with pytest.raises(ValueError, match="not supported"):
+        HDF5er.getFrameOffsets(tmp_path / "traj.pdb")
+
+
+def test_frameOffsetsCache(tmp_path):
+    rng = numpy.random.default_rng(12345)
+    fname = tmp_path / "traj.xyz"
+
+    def writeXYZ(nframes):
+        with open(fname, "w") as file:
+            for coords in rng.uniform(0, 5, size=(nframes, 4, 3)):
+                file.write('4\nLattice="10 0 0 0 10 0 0 0 10"\n')
+                for x, y, z in coords:
+                    file.write(f"C {x!r} {y!r} {z!r}\n")
+
+    writeXYZ(6)
+    cacheName = HDF5er.getOffsetsCacheName(fname)
+    offsets = HDF5er.getFrameOffsets(fname, useCache=False)
+    assert not (tmp_path / "traj.xyz.offsets.npz").exists()
+    assert_array_equal(HDF5er.getFrameOffsets(fname), offsets)
+    with numpy.load(cacheName) as cache:
+        assert_array_equal(cache["offsets"], offsets)
+    # the cache is used until the file changes
+    assert_array_equal(HDF5er.getFrameOffsets(fname), offsets)
+    writeXYZ(9)
+    offsets = HDF5er.getFrameOffsets(fname)
+    assert len(offsets) == 10
+    assert_array_equal(HDF5er.getFrameOffsets(fname, useCache=False), offsets)
+
+
+@pytest.mark.parametrize("fileFormat", ["xyz", "lammpsdump"])
+def test_textTrajectory2HDF5InParallel(tmp_path, fileFormat):
+    rng = numpy.random.default_rng(12345)
+    nframes, nat = 23, 6
+    coordinates = rng.uniform(0, 5, size=(nframes, nat, 3))
+    boxes = numpy.array([[10.0 + i, 11.0, 12.0, 90.0, 90.0, 90.0] for i in range(23)])
+    types = ["Cu", "Ag", "Cu", "Au", "Ag", "Cu"]
+    fname = tmp_path / f"traj.{fileFormat}"
+    if fileFormat == "xyz":
+        with open(fname, "w") as file:
+            for coords in coordinates:
+                file.write(f"{nat}\nno box here\n")
+                for atomType, (x, y, z) in zip(types, coords):
+                    file.write(f"{atomType} {x!r} {y!r} {z!r}\n")
+    else:
+        __writeLAMMPSDump(fname, coordinates, boxes, types, scaled=True)
+    userBoxes = boxes if fileFormat == "xyz" else None
+
+    importedName = tmp_path / "imported.hdf5"
+    HDF5er.text2HDF5(fname, importedName, "serial", trajChunkSize=5, boxes=userBoxes)
+    HDF5er.text2HDF5(
+        fname, importedName, "parallel", trajChunkSize=5, boxes=userBoxes, n_jobs=2
+    )
+    with h5py.File(importedName, "r") as imported:
+        serial = imported["Trajectories/serial"]
+        parallel = imported["Trajectories/parallel"]
+        assert_array_equal(parallel["Types"].asstr()[:], serial["Types"].asstr()[:])
+        assert_array_equal(parallel["Trajectory"][:], serial["Trajectory"][:])
+        assert_array_equal(parallel["Box"][:], serial["Box"][:])
+        assert_array_almost_equal(parallel["Trajectory"][:], coordinates)
+        assert_array_almost_equal(parallel["Box"][:], boxes, decimal=4)
+    assert (tmp_path / f"traj.{fileFormat}.offsets.npz").exists()
@@ -102,6 +102,40 @@ def test_copyMDA2HDF52xyz(input_framesSlice, input_CreateParametersToExport, hdf
         )
 
 
+def test_copyMDA2HDF52xyzInChunks(
+    input_framesSlice, input_CreateParametersToExport, hdf5_file
+):
+    testFname = hdf5_file[0]
+    fourAtomsFiveFrames = hdf5_file[1]
+    additionalParameters = input_CreateParametersToExport(
+        frames=len(fourAtomsFiveFrames.trajectory),
+        nat=len(fourAtomsFiveFrames.atoms),
+        frameSlice=input_framesSlice,
+    )
+    with h5py.File(testFname, "r") as hdf5test:
+        group = hdf5test["Trajectories/4Atoms5Frames"]
+        stringDataAllInOne = StringIO()
+        HDF5er.getXYZfromTrajGroup(
+            stringDataAllInOne,
+            group,
+            framesToExport=input_framesSlice,
+            **additionalParameters,
+        )
+        stringData = StringIO()
+        HDF5er.getXYZfromTrajGroup(
+            stringData,
+            group,
+            framesToExport=input_framesSlice,
+            chunkSize=2,
+            **additionalParameters,
+        )
+        assert stringData.getvalue() == stringDataAllInOne.getvalue()
+        stringData.seek(0)
+        checkStringDataFromHDF5(
+            stringData, group, input_framesSlice, **additionalParameters
+        )
+
+
 def test_writeMDA2HDF52xyz(
     tmp_path_factory, input_framesSlice, input_CreateParametersToExport, hdf5_file
 ):
@@ -129,6 +163,48 @@ def test_writeMDA2HDF52xyz(
             )
 
 
+@pytest.mark.parametrize("splitFiles", [False, True])
+def test_writeMDA2HDF52xyzInParallel(
+    tmp_path, splitFiles, input_framesSlice, input_CreateParametersToExport, hdf5_file
+):
+    testFname = hdf5_file[0]
+    fourAtomsFiveFrames = hdf5_file[1]
+    additionalParameters = input_CreateParametersToExport(
+        frames=len(fourAtomsFiveFrames.trajectory),
+        nat=len(fourAtomsFiveFrames.atoms),
+        frameSlice=input_framesSlice,
+    )
+    outFname = tmp_path / "parallel.xyz"
+    with h5py.File(testFname, "r") as hdf5test:
+        group = hdf5test["Trajectories/4Atoms5Frames"]
+        nframes = len(numpy.arange(group["Trajectory"].shape[0])[input_framesSlice])
+        perFrameProperties = [f"frame={i}" for i in range(nframes)]
+        stringData = StringIO()
+        HDF5er.getXYZfromTrajGroup(
+            stringData,
+            group,
+            framesToExport=input_framesSlice,
+            perFrameProperties=perFrameProperties,
+            **additionalParameters,
+        )
+        outFiles = HDF5er.saveXYZfromTrajGroupInParallel(
+            outFname,
+            group,
+            framesToExport=input_framesSlice,
+            perFrameProperties=perFrameProperties,
+            splitFiles=splitFiles,
+            nSegments=3,
+            n_jobs=2,
+            **additionalParameters,
+        )
+        assert len(outFiles) == (min(3, nframes) if splitFiles else 1)
+        exported = ""
+        for outFile in outFiles:
+            with open(outFile, "r") as file:
+                exported += file.read()
+        assert exported == stringData.getvalue()
+
+
 def test_copyMDA2HDF52xyzAllFrameProperty(input_framesSlice, tmp_path):
     angles = (75.0, 60.0, 90.0)
     fourAtomsFiveFrames = giveUniverse(angles)
@@ -354,3 +430,136 @@ def test_HDF52Universe(
             assert_array_almost_equal(frameBox, newUniverse.dimensions)
 
         assert_array_equal(group["Types"].asstr(), newUniverse.atoms.types)
+
+
+def test_HDF52UniverseStreaming(
+    input_framesSlice,
+    hdf5_file,
+):
+    testFname = hdf5_file[0]
+    with h5py.File(testFname, "r") as hdf5test:
+        group = hdf5test["Trajectories/4Atoms5Frames"]
+        newUniverse = HDF5er.createUniverseFromSlice(
+            group, input_framesSlice, stream=True
+        )
+        assert isinstance(newUniverse.trajectory, HDF5er.TrajectoryGroupReader)
+        expectedTraj = group["Trajectory"][input_framesSlice]
+        expectedBox = group["Box"][input_framesSlice]
+        assert len(newUniverse.trajectory) == len(expectedTraj)
+        for _ in range(2):
+            nframes = 0
+            for frameTraj, frameBox, ts in zip(
+                expectedTraj, expectedBox, newUniverse.trajectory
+            ):
+                assert_array_almost_equal(frameTraj, newUniverse.atoms.positions)
+                assert_array_almost_equal(frameBox, newUniverse.dimensions)
+                nframes += 1
+            assert nframes == len(expectedTraj)
+        # random access
+        for frame in reversed(range(len(expectedTraj))):
+            newUniverse.trajectory[frame]
+            assert newUniverse.trajectory.ts.frame == frame
+            assert_array_almost_equal(expectedTraj[frame], newUniverse.atoms.positions)
+            assert_array_almost_equal(expectedBox[frame], newUniverse.dimensions)
+
+        assert_array_equal(group["Types"].asstr(), newUniverse.atoms.types)
+
+
+def test_TrajectoryGroupReaderReadsAheadByChunks(tmp_path):
+    fname = tmp_path / "chunked.hdf5"
+    universe = giveUniverse(repeatFrames=10)
+    nframes = len(universe.trajectory)
+    with h5py.File(fname, "w") as workFile:
+        HDF5er.universe2HDF5(universe, workFile.require_group("traj"), trajChunkSize=7)
+    with h5py.File(fname, "r") as workFile:
+        group = workFile["traj"]
+        reader = HDF5er.TrajectoryGroupReader(group)
+        assert reader.n_frames == nframes
+        assert reader.n_atoms == len(universe.atoms)
+        for ts in reader:
+            # the cache contains the chunk of the current frame
+            assert reader._cacheStart == ts.frame - ts.frame % 7
+            assert len(reader._cachedTraj) == min(7, nframes - reader._cacheStart)
+            assert_array_almost_equal(group["Trajectory"][ts.frame], ts.positions)
+
+
+def test_getAtomsSelection():
+    types = numpy.array(["H", "O", "H", "H", "O", "C"])
+    nat = len(types)
+    assert HDF5er.getAtomsSelection(nat) == slice(None)
+    assert HDF5er.getAtomsSelection(nat, [1, 2, 3]) == slice(1, 4)
+    assert HDF5er.getAtomsSelection(nat, slice(None, 2)) == slice(0, 2)
+    assert HDF5er.getAtomsSelection(nat, "C", types) == slice(5, 6)
+    assert HDF5er.getAtomsSelection(nat, [False] * nat) == slice(0, 0)
+    assert_array_equal(HDF5er.getAtomsSelection(nat, [4, 0, -1, 4]), [0, 4, 5])
+    assert_array_equal(HDF5er.getAtomsSelection(nat, slice(None, None, 2)), [0, 2, 4])
+    assert_array_equal(HDF5er.getAtomsSelection(nat, "O", types), [1, 4])
+    assert_array_equal(HDF5er.getAtomsSelection(nat, ["O", "C"], types), [1, 4, 5])
+    assert_array_equal(HDF5er.getAtomsSelection(nat, types == "H"), [0, 2, 3])
+    for selection in [[1, 2, 3], [4, 0], slice(None, None, 2), [False] * nat]:
+        atoms = HDF5er.getAtomsSelection(nat, selection)
+        assert HDF5er.getAtomsSelectionLength(nat, atoms) == len(
+            numpy.arange(nat)[atoms]
+        )
+    with pytest.raises(ValueError, match="types"):
+        HDF5er.getAtomsSelection(nat, "O")
+    with pytest.raises(ValueError, match="mask"):
+        HDF5er.getAtomsSelection(nat, [True, False])
+
+
+@pytest.mark.parametrize("atomsSelection", [[0, 3], [1, 2], "H", [True, False] * 2])
+def test_HDF5ReadersWithAtomsSelection(
+    tmp_path, input_framesSlice, hdf5_file, atomsSelection
+):
+    testFname, fourAtomsFiveFrames = hdf5_file
+    types = fourAtomsFiveFrames.atoms.types
+    atoms = numpy.arange(len(types))[
+        numpy.isin(types, atomsSelection)
+        if isinstance(atomsSelection, str)
+        else atomsSelection
+    ]
+    # a trajectory group with only the selected atoms, to confront the output
+    selectedFname = tmp_path / "selected.hdf5"
+    with h5py.File(selectedFname, "w") as workFile:
+        HDF5er.universe2HDF5(
+            fourAtomsFiveFrames.atoms[atoms], workFile.require_group("selected")
+        )
+    with h5py.File(testFname, "r") as hdf5test, h5py.File(
+        selectedFname, "r"
+    ) as selectedFile:
+        group = hdf5test["Trajectories/4Atoms5Frames"]
+        selectedGroup = selectedFile["selected"]
+        expectedTraj = group["Trajectory"][input_framesSlice][:, atoms]
+        expectedBox = group["Box"][input_framesSlice]
+        for stream in [False, True]:
+            newUniverse = HDF5er.createUniverseFromSlice(
+                group, input_framesSlice, stream=stream, atomsSelection=atomsSelection
+            )
+            assert_array_equal(newUniverse.atoms.types, types[atoms])
+            assert len(newUniverse.trajectory) == len(expectedTraj)
+            for frameTraj, frameBox, ts in zip(
+                expectedTraj, expectedBox, newUniverse.trajectory
+            ):
+                assert_array_almost_equal(frameTraj, newUniverse.atoms.positions)
+                assert_array_almost_equal(frameBox, newUniverse.dimensions)
+
+        stringData = StringIO()
+        HDF5er.getXYZfromTrajGroup(
+            stringData,
+            group,
+            framesToExport=input_framesSlice,
+            atomsSelection=atomsSelection,
+        )
+        expectedStringData = StringIO()
+        HDF5er.getXYZfromTrajGroup(
+            expectedStringData, selectedGroup, framesToExport=input_framesSlice
+        )
+        assert stringData.getvalue() == expectedStringData.getvalue()
+
+        chunkTraj = (slice(0, 2), slice(None), slice(None))
+        aseAtoms = HDF5er.HDF52AseAtomsChunckedwithSymbols(
+            group, chunkTraj, slice(0, 2), types, atomsSelection=atomsSelection
+        )
+        for frameAtoms, frameTraj in zip(aseAtoms, group["Trajectory"][0:2]):
+            assert_array_equal(frameAtoms.get_chemical_symbols(), types[atoms])
+            assert_array_almost_equal(frameAtoms.positions, frameTraj[atoms])
@@ -41,6 +41,19 @@ def test_norm3D():
     )
 
 
+def test_normOut():
+    rng = numpy.random.default_rng(12345)
+    a = rng.random((4, 5, 3))
+    a[1, 2] = 0.0
+    expected = SOAPify.normalizeArray(a)
+    out = numpy.empty_like(a)
+    assert SOAPify.normalizeArray(a, out=out) is out
+    assert_array_equal(out, expected)
+    # in place
+    assert SOAPify.normalizeArray(a, out=a) is a
+    assert_array_equal(a, expected)
+
+
 def test_normalizeMatrix():
     # this forces the test with an empy row
     mat = numpy.array([[0.0, 0.0, 0.0], [5.0, 5.0, 0.0], [4.0, 0.0, 0.0]])
@@ -246,3 +259,41 @@ def test_centerMaskCreator():
         mask = [i for i in range(len(symbols)) if symbols[i] in SOAPatomMask]
         getMask = SOAPify.centerMaskCreator(SOAPatomMask, symbols)
         assert_array_equal(mask, getMask)
+
+
+@pytest.mark.parametrize("shape", [(), (5,), (3, 5)])
+@pytest.mark.parametrize("outDtype", [numpy.float32, numpy.float64])
+def test_fillSOAPVectorFromdscribeOut(shape, outDtype):
+    lmax, nmax = 3, 4
+    species = ["H", "O"]
+    nfeats = (lmax + 1) * nmax * nmax
+    nfeatsreduced = (lmax + 1) * (nmax + 1) * nmax // 2
+    speciesSlices = {
+        "HH": slice(0, nfeatsreduced),
+        "HO": slice(nfeatsreduced, nfeatsreduced + nfeats),
+        "OO": slice(nfeatsreduced + nfeats, nfeats + 2 * nfeatsreduced),
+    }
+    rng = numpy.random.default_rng(12345)
+    a = rng.random(shape + (nfeats + 2 * nfeatsreduced,), dtype=numpy.float32)
+    expected = SOAPify.fillSOAPVectorFromdscribe(a, lmax, nmax, species, speciesSlices)
+    out = numpy.empty(shape + (3 * nfeats,), dtype=outDtype)
+    got = SOAPify.fillSOAPVectorFromdscribe(
+        a, lmax, nmax, species, speciesSlices, out=out
+    )
+    assert got is out
+    assert_array_equal(out, expected.astype(outDtype))
+
+    out = numpy.empty(shape + (3 * nfeats,), dtype=outDtype)
+    got = SOAPify.fillAndNormalizeSOAPVectorFromdscribe(
+        a, lmax, nmax, species, speciesSlices, out=out
+    )
+    assert got is out
+    numpy.testing.assert_array_almost_equal(
+        out, SOAPify.normalizeArray(expected), decimal=6
+    )
+    numpy.testing.assert_array_almost_equal(
+        SOAPify.fillAndNormalizeSOAPVectorFromdscribe(
+            a, lmax, nmax, species, speciesSlices
+        ),
+        SOAPify.normalizeArray(expected),
+    )
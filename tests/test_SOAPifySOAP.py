@@ -374,3 +374,117 @@ def test_MathSOAP():
                 numpy.sqrt(2.0 - 2.0 * nks),
                 decimal=8,
             )
+
+
+def test_saponifyTextTrajectory(tmp_path, referencesWater):
+    confFile, groupName, nMol = referencesWater
+    xyzName = tmp_path / "water.xyz"
+    n_max = 4
+    l_max = 4
+    rcut = 10.0
+    with h5py.File(confFile, "r") as conf:
+        HDF5er.saveXYZfromTrajGroup(xyzName, conf[f"Trajectories/{groupName}"])
+
+    fname = tmp_path / "waterFromText.hdf5"
+    with h5py.File(fname, "w") as f:
+        soapGroup = f.require_group("SOAP")
+        HDF5er.textTrajectory2HDF5(xyzName, f.require_group("Trajectories/water"))
+        SOAPify.saponifyTrajectory(
+            f["Trajectories/water"], soapGroup, rcut, n_max, l_max, verbose=False
+        )
+        for n_jobs in [1, 2]:
+            SOAPify.saponifyTextTrajectory(
+                xyzName,
+                soapGroup,
+                f"direct{n_jobs}",
+                rcut,
+                n_max,
+                l_max,
+                SOAPOutputChunkDim=2,
+                SOAPatomMask=["O"],
+                n_jobs=n_jobs,
+            )
+        SOAPify.saponifyTrajectory(
+            f["Trajectories/water"],
+            soapGroup,
+            rcut,
+            n_max,
+            l_max,
+            SOAPatomMask=["O"],
+            doOverride=True,
+            verbose=False,
+        )
+        expected = soapGroup["water"]
+        for n_jobs in [1, 2]:
+            direct = soapGroup[f"direct{n_jobs}"]
+            assert_array_equal(direct[:], expected[:])
+            for key in expected.attrs:
+                assert_array_equal(direct.attrs[key], expected.attrs[key])
+        with pytest.raises(ValueError):
+            SOAPify.saponifyTextTrajectory(
+                xyzName, soapGroup, "direct1", rcut, n_max, l_max
+            )
+
+
+def test_saponifyFrames(tmp_path, referencesTrajectory):
+    confFile, groupName = referencesTrajectory
+    n_max = 4
+    l_max = 4
+    rcut = 3.0
+    fname = tmp_path / "framesSOAP.hdf5"
+    with h5py.File(fname, "w") as f, h5py.File(confFile, "r") as conf:
+        trajGroup = conf[f"Trajectories/{groupName}"]
+        soapGroup = f.require_group("SOAP")
+        SOAPify.saponifyTrajectory(
+            trajGroup, soapGroup, rcut, n_max, l_max, verbose=False
+        )
+        expected = soapGroup[groupName]
+        universe = HDF5er.createUniverseFromSlice(trajGroup, slice(None))
+        nframes = len(trajGroup["Trajectory"])
+        symbols = trajGroup["Types"].asstr()[:]
+        aseFrames = HDF5er.HDF52AseAtomsChunckedwithSymbols(
+            trajGroup, slice(None), slice(None), symbols
+        )
+        sources = {
+            "universe": universe,
+            "atomGroup": universe.atoms,
+            "aseList": aseFrames,
+            "aseIterator": iter(aseFrames),
+        }
+        for name, frames in sources.items():
+            SOAPify.saponifyFrames(
+                frames,
+                soapGroup,
+                name,
+                rcut,
+                n_max,
+                l_max,
+                SOAPOutputChunkDim=3,
+                verbose=False,
+            )
+            assert soapGroup[name].shape == expected.shape
+            assert_array_equal(soapGroup[name][:], expected[:])
+            for key in expected.attrs:
+                assert_array_equal(soapGroup[name].attrs[key], expected.attrs[key])
+
+        for name, frames in [("universe", universe), ("aseIterator", iter(aseFrames))]:
+            SOAPify.saponifyFrames(
+                frames,
+                soapGroup,
+                name,
+                rcut,
+                n_max,
+                l_max,
+                trajslice=slice(1, None, 2),
+                SOAPOutputChunkDim=2,
+                doOverride=True,
+                verbose=False,
+            )
+            assert len(soapGroup[name]) == len(range(nframes)[1::2])
+            assert_array_equal(soapGroup[name][:], expected[1::2])
+        with pytest.raises(ValueError):
+            SOAPify.saponifyFrames(
+                universe, soapGroup, "universe", rcut, n_max, l_max, verbose=False
+            )
+        with pytest.raises(ValueError, match="no frames"):
+            SOAPify.saponifyFrames([], soapGroup, "empty", rcut, n_max, l_max)
@@ -187,6 +187,21 @@ def test_getTimeSOAPsimple(referencesTrajectorySOAP, window, backward):
     assert_array_almost_equal(deltaTimedSOAP, expectedDeltaTimedSOAP)
 
 
+@pytest.mark.parametrize(
+    "atomsSelection", [[0, 2], slice(1, 3), [True, False, False, True]]
+)
+def test_getTimeSOAPsimpleWithAtomsSelection(referencesTrajectorySOAP, atomsSelection):
+    confFile, groupName = referencesTrajectorySOAP
+    with h5py.File(confFile, "r") as f:
+        timedSOAP, deltaTimedSOAP = analysis.getTimeSOAPSimple(f[f"/SOAP/{groupName}"])
+        timedSOAPSel, deltaTimedSOAPSel = analysis.getTimeSOAPSimple(
+            f[f"/SOAP/{groupName}"], atomsSelection=atomsSelection
+        )
+    expectedAtoms = numpy.arange(timedSOAP.shape[1])[atomsSelection]
+    assert_array_almost_equal(timedSOAPSel, timedSOAP[:, expectedAtoms])
+    assert_array_almost_equal(deltaTimedSOAPSel, deltaTimedSOAP[expectedAtoms])
+
+
 @pytest.fixture(
     scope="module",
     params=[1, 2],
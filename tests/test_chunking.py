@@ -0,0 +1,160 @@
+import io
+import pytest
+import numpy
+import h5py
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+import SOAPify
+import SOAPify.HDF5er as HDF5er
+import SOAPify.analysis as analysis
+from SOAPify.chunking import MAXWRITECHUNKBYTES
+
+
+@pytest.fixture
+def restoreMemoryBudget():
+    budget = SOAPify.getMemoryBudget()
+    yield budget
+    SOAPify.setMemoryBudget(budget)
+
+
+def test_parseMemorySize():
+    assert SOAPify.parseMemorySize(1234) == 1234
+    assert SOAPify.parseMemorySize("1234") == 1234
+    assert SOAPify.parseMemorySize("512MB") == 512 * 10**6
+    assert SOAPify.parseMemorySize("1.5 kB") == 1500
+    assert SOAPify.parseMemorySize("4GiB") == 4 * 2**30
+    for wrong in ["", "many", "4 parsecs", "-1GB"]:
+        with pytest.raises(ValueError):
+            SOAPify.parseMemorySize(wrong)
+
+
+def test_memoryBudget(restoreMemoryBudget):
+    SOAPify.setMemoryBudget("2MiB")
+    assert SOAPify.getMemoryBudget() == 2 * 2**20
+    SOAPify.setMemoryBudget(1000)
+    assert SOAPify.getMemoryBudget() == 1000
+    with pytest.raises(ValueError):
+        SOAPify.setMemoryBudget(0)
+    assert SOAPify.getMemoryBudget() == 1000
+
+
+@pytest.mark.parametrize("nat", [1, 100, 10000])
+@pytest.mark.parametrize("nfeatures", [0, 50, 1000])
+@pytest.mark.parametrize("budget", ["64kB", "10MB", "1GiB"])
+def test_planChunks(nat, nfeatures, budget):
+    budget = SOAPify.parseMemorySize(budget)
+    plan = SOAPify.planChunks(nat, nfeatures, "float32", memoryBudget=budget)
+    inputBytes = (nat * 3 + 6) * 4
+    outputBytes = nat * nfeatures * 4 if nfeatures > 0 else inputBytes
+    frameBytes = inputBytes + 2 * nat * nfeatures * 8 + outputBytes
+    assert plan.read >= 1 and plan.compute >= 1 and plan.write >= 1
+    # the planned chunks fit in the budget, unless a single frame does not
+    assert plan.read == 1 or plan.read * inputBytes <= budget
+    assert plan.compute == 1 or plan.compute * frameBytes <= budget
+    assert plan.write == 1 or plan.write * outputBytes <= MAXWRITECHUNKBYTES
+    assert plan.write <= plan.compute <= plan.read
+    assert plan.compute % plan.write == 0
+    # the chunks are as big as the budget allows
+    assert (plan.read + 1) * inputBytes > budget
+    assert (plan.compute + plan.write) * frameBytes > budget
+
+    capped = SOAPify.planChunks(
+        nat, nfeatures, "float32", nframes=7, memoryBudget=budget
+    )
+    assert capped.read == min(plan.read, 7)
+    assert capped.compute <= 7 and capped.write <= 7
+    empty = SOAPify.planChunks(nat, nfeatures, nframes=0, memoryBudget=budget)
+    assert (empty.read, empty.compute, empty.write) == (1, 1, 1)
+
+
+def test_planChunksReferencesAndAlignment():
+    plan = SOAPify.planChunks(
+        10, 20, nreferences=4, nInputFeatures=15, memoryBudget=10**6
+    )
+    frameBytes = 10 * 15 * 8 + 2 * 10 * 20 * 8 + 10 * 4 * 8
+    assert plan.read == 10**6 // (10 * 15 * 8)
+    assert plan.compute <= 10**6 // frameBytes
+    aligned = SOAPify.planChunks(
+        10, 20, nreferences=4, nInputFeatures=15, alignTo=7, memoryBudget=10**6
+    )
+    assert aligned.read % 7 == 0 and aligned.compute % 7 == 0
+    assert aligned.compute > plan.compute - 7
+    # the alignment does not make the chunks bigger than the budget allows
+    tiny = SOAPify.planChunks(
+        10, 20, nreferences=4, nInputFeatures=15, alignTo=10**6, memoryBudget=10**6
+    )
+    assert tiny == plan
+
+
+def _streamedResults(trajGroup, soapGroup):
+    """calculates SOAP and its analyses with the planned chunks"""
+    SOAPify.saponifyTrajectory(trajGroup, soapGroup, 3.0, 4, 4, verbose=False)
+    dataset = soapGroup[trajGroup.name.split("/")[-1]]
+    settings = SOAPify.getSOAPSettings(dataset)
+    references = SOAPify.SOAPReferences(
+        ["a", "b", "c"],
+        SOAPify.normalizeArray(dataset[0, :3]),
+        settings["lMax"],
+        settings["nMax"],
+    )
+    xyz = io.StringIO()
+    HDF5er.getXYZfromTrajGroup(xyz, trajGroup)
+    return (
+        dataset,
+        analysis.getTimeSOAPSimple(dataset),
+        SOAPify.getDistancesFromRef(
+            dataset, references, SOAPify.SOAPdistanceNormalized, doNormalize=True
+        ),
+        xyz.getvalue(),
+    )
+
+
+def test_tinyMemoryBudget(tmp_path, referencesTrajectory, restoreMemoryBudget):
+    confFile, groupName = referencesTrajectory
+    with h5py.File(confFile, "r") as conf, h5py.File(
+        tmp_path / "default.hdf5", "w"
+    ) as default, h5py.File(tmp_path / "tiny.hdf5", "w") as tiny:
+        trajGroup = conf[f"Trajectories/{groupName}"]
+        expected = _streamedResults(trajGroup, default.require_group("SOAP"))
+        universe = HDF5er.createUniverseFromSlice(trajGroup, slice(None))
+
+        # with a budget smaller than a frame everything is done frame by frame
+        SOAPify.setMemoryBudget(1)
+        tinyTraj = tiny.require_group(f"Trajectories/{groupName}")
+        HDF5er.universe2HDF5(universe, tinyTraj)
+        assert tinyTraj["Trajectory"].chunks[0] == 1
+        assert_array_almost_equal(tinyTraj["Trajectory"][:], trajGroup["Trajectory"][:])
+        results = _streamedResults(tinyTraj, tiny.require_group("SOAP"))
+        assert results[0].chunks[0] == 1
+        assert_array_almost_equal(results[0][:], expected[0][:])
+        for got, wanted in zip(results[1:3], expected[1:3]):
+            for gotArray, wantedArray in zip(
+                got if isinstance(got, tuple) else (got,),
+                wanted if isinstance(wanted, tuple) else (wanted,),
+            ):
+                assert_array_almost_equal(gotArray, wantedArray)
+        assert results[3] == expected[3]
+
+
+def test_textTrajectoryChunks(tmp_path, restoreMemoryBudget):
+    rng = numpy.random.default_rng(42)
+    nframes, nat = 9, 5
+    coordinates = rng.uniform(0, 10, (nframes, nat, 3))
+    with open(tmp_path / "traj.xyz", "w") as xyz:
+        for frame in coordinates:
+            xyz.write(f'{nat}\nLattice="10 0 0 0 10 0 0 0 10"\n')
+            xyz.writelines(f"Cu {x:.6f} {y:.6f} {z:.6f}\n" for x, y, z in frame)
+    SOAPify.setMemoryBudget(1)
+    with h5py.File(tmp_path / "traj.hdf5", "w") as h5file:
+        for n_jobs in [1, 2]:
+            trajGroup = h5file.require_group(f"jobs{n_jobs}")
+            HDF5er.textTrajectory2HDF5(tmp_path / "traj.xyz", trajGroup, n_jobs=n_jobs)
+            assert trajGroup["Trajectory"].chunks[0] == 1
+            assert_array_almost_equal(trajGroup["Trajectory"][:], coordinates)
+        SOAPify.saponifyTextTrajectory(
+            tmp_path / "traj.xyz", h5file, "soap", 3.0, 4, 4, n_jobs=2
+        )
+        SOAPify.saponifyTrajectory(
+            h5file["jobs1"], h5file.require_group("SOAP"), 3.0, 4, 4, verbose=False
+        )
+        assert h5file["soap"].chunks[0] == 1
+        assert_array_equal(h5file["soap"][:], h5file["SOAP/jobs1"][:])
@@ -6,6 +6,7 @@ from numpy.testing import (
     assert_almost_equal,
 )
 import h5py
+import pytest
 
 
 def test_creatingReferencesFromTrajectoryAndSavingThem(
@@ -158,6 +159,23 @@ def test_distanceFromRefs(getReferencesConfs, referencesTest):
             assert_almost_equal(distances[frameID, centerID, centerIDRefs], 0.0)
 
 
+def test_distanceFromRefsWithAtomsSelection(getReferencesConfs, referencesTest):
+    referenceDict, _ = referencesTest
+    with h5py.File(getReferencesConfs, "r") as f:
+        ds = f["SOAP/ico923_6"]
+        atomsSelection = numpy.arange(0, ds.shape[1], 7)
+        distances = SOAPify.getDistancesFromRefNormalized(ds, referenceDict["ico923_6"])
+        distancesSel = SOAPify.getDistancesFromRefNormalized(
+            ds, referenceDict["ico923_6"], atomsSelection=atomsSelection
+        )
+        assert distancesSel.shape == (
+            ds.shape[0],
+            len(atomsSelection),
+            len(referenceDict["ico923_6"]),
+        )
+        assert_array_almost_equal(distancesSel, distances[:, atomsSelection])
+
+
 def test_classifyShortcut(getReferencesConfs, referencesTest):
     referenceDict, _ = referencesTest
     k = "ico923_6"
@@ -182,3 +200,96 @@ def test_classifyShortcut(getReferencesConfs, referencesTest):
         )
         assert_array_almost_equal(minimumDist, classification.distances)
         assert_array_equal(minimumDistID, classification.references)
+
+
+def test_classifyIndexed(getReferencesConfs, referencesTest):
+    referenceDict, _ = referencesTest
+    k = "ico923_6"
+    rng = numpy.random.default_rng(42)
+    with h5py.File(getReferencesConfs, "r") as f:
+        ds = f["SOAP/ico923_6"]
+        nmax = ds.attrs["n_max"]
+        lmax = ds.attrs["l_max"]
+        # many references, some of them very similar to the atoms
+        data = SOAPify.fillSOAPVectorFromdscribe(ds[0], lMax=lmax, nMax=nmax)
+        picked = rng.choice(len(data), 200, replace=False)
+        manyReferences = SOAPify.mergeReferences(
+            referenceDict[k],
+            SOAPify.SOAPReferences(
+                [f"r{i}" for i in picked],
+                SOAPify.normalizeArray(
+                    data[picked] * rng.uniform(0.9, 1.1, data[picked].shape)
+                ),
+                lmax=lmax,
+                nmax=nmax,
+            ),
+        )
+        for references in [referenceDict[k], manyReferences]:
+            expected = SOAPify.applyClassification(
+                ds, references, SOAPify.SOAPdistanceNormalized, doNormalize=True
+            )
+            for nComponents in [None, 2, 16, 10000]:
+                index = SOAPify.SOAPReferencesIndex(references, nComponents)
+                classification = SOAPify.applyClassificationIndexed(
+                    ds, index, doNormalize=True
+                )
+                assert_array_equal(classification.references, expected.references)
+                assert_array_almost_equal(classification.distances, expected.distances)
+                assert classification.legend == references.names
+            selected = SOAPify.applyClassificationIndexed(
+                ds, references, doNormalize=True, atomsSelection=[1, 5, 7]
+            )
+            assert_array_equal(selected.references, expected.references[:, [1, 5, 7]])
+
+
+def test_createReferencesFromKMeans(getReferencesConfs, tmp_path):
+    with h5py.File(getReferencesConfs, "r") as f:
+        ds = f["SOAP/ico923_6"]
+        nmax = ds.attrs["n_max"]
+        lmax = ds.attrs["l_max"]
+        data = SOAPify.normalizeArray(
+            SOAPify.fillSOAPVectorFromdscribe(ds[:], lMax=lmax, nMax=nmax)
+        ).reshape(-1, (lmax + 1) * nmax * nmax)
+        references = SOAPify.createReferencesFromKMeans(ds, 4, batchSize=100, seed=42)
+        assert len(references) == 4
+        assert references.names == ["kmeans0", "kmeans1", "kmeans2", "kmeans3"]
+        assert (references.lmax, references.nmax) == (lmax, nmax)
+        assert references.spectra.shape == (4, data.shape[-1])
+        assert_array_almost_equal(numpy.linalg.norm(references.spectra, axis=-1), 1.0)
+        # reproducible with the same seed
+        again = SOAPify.createReferencesFromKMeans(ds, 4, batchSize=100, seed=42)
+        assert_array_equal(again.spectra, references.spectra)
+
+        # the centroids describe the atoms better than the typical random atoms
+        def inertia(spectra):
+            return numpy.sum(numpy.min(2.0 - 2.0 * data @ spectra.T, axis=-1))
+
+        rng = numpy.random.default_rng(42)
+        randomInertias = [
+            inertia(data[rng.choice(len(data), 4, replace=False)]) for _ in range(11)
+        ]
+        assert inertia(references.spectra) < numpy.median(randomInertias)
+
+        # compatible with the other references utilities
+        classification = SOAPify.applyClassification(
+            ds, references, SOAPify.SOAPdistanceNormalized, doNormalize=True
+        )
+        assert classification.legend == references.names
+        assert_array_equal(
+            classification.references.reshape(-1),
+            numpy.argmax(data @ references.spectra.T, axis=-1),
+        )
+        with h5py.File(tmp_path / "refs.hdf5", "w") as refFile:
+            SOAPify.saveReferences(refFile, "kmeans", references)
+            loaded = SOAPify.getReferencesFromDataset(refFile["kmeans"])
+        assert loaded.names == references.names
+        assert_array_equal(loaded.spectra, references.spectra)
+
+        selected = SOAPify.createReferencesFromKMeans(
+            ds, 2, seed=1, atomsSelection=[0, 1, 2], names=["a", "b"]
+        )
+        assert selected.names == ["a", "b"]
+        with pytest.raises(ValueError):
+            SOAPify.createReferencesFromKMeans(ds, 2, names=["a"])
+        with pytest.raises(ValueError):
+            SOAPify.createReferencesFromKMeans(ds, 10**9)
@@ -0,0 +1,115 @@
+import os
+import sys
+import warnings
+import inspect
+import subprocess
+import importlib
+import pytest
+import SOAPify
+import SOAPify.HDF5er as HDF5er
+
+HEAVYMODULES = ["MDAnalysis", "ase", "scipy", "dscribe", "quippy", "numba", "sparse"]
+
+
+def _loadedAfter(code: str) -> "list[str]":
+    """runs `code` in a new interpreter and returns the heavy modules it imported"""
+    check = (
+        f"{code}\nimport sys\n"
+        f"print(' '.join(m for m in {HEAVYMODULES!r} if m in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", check],
+        capture_output=True,
+        text=True,
+        check=True,
+        env=dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path)),
+    )
+    return result.stdout.split()
+
+
+def test_lazyImport():
+    assert _loadedAfter("import SOAPify") == []
+    assert _loadedAfter("import SOAPify.HDF5er") == []
+    assert _loadedAfter("from SOAPify import setMemoryBudget") == []
+    # the classification does not need the trajectories nor the SOAP engines
+    loaded = _loadedAfter("import SOAPify\nSOAPify.getDistancesFromRef")
+    assert "MDAnalysis" not in loaded
+    assert "dscribe" not in loaded
+    loaded = _loadedAfter("import SOAPify\nSOAPify.saponifyTrajectory")
+    assert "MDAnalysis" in loaded
+    assert "dscribe" not in loaded
+    assert "dscribe" in _loadedAfter("import SOAPify\nSOAPify.HAVE_DSCRIBE")
+
+
+@pytest.mark.parametrize(
+    "package, submodules",
+    [
+        (
+            SOAPify,
+            [
+                "classify",
+                "distances",
+                "saponify",
+                "utils",
+                "transitions",
+                "transitions.tracker",
+                "transitions.online",
+                "engine",
+                "analysis",
+                "instrumentation",
+                "chunking",
+                "sharedmemory",
+                "reduction",
+                "multianalysis",
+            ],
+        ),
+        (HDF5er, ["ToHDF5", "HDF5To", "TextToHDF5"]),
+    ],
+)
+def test_lazyPublicAPI(package, submodules):
+    for name in package.__all__:
+        assert getattr(package, name) is not None
+        assert name in dir(package)
+    # all the public functions and classes of the submodules are exported
+    for submodule in submodules:
+        module = importlib.import_module(f"{package.__name__}.{submodule}")
+        for name, value in vars(module).items():
+            if name.startswith("_") or not (
+                inspect.isfunction(value) or inspect.isclass(value)
+            ):
+                continue
+            if value.__module__ == module.__name__:
+                assert name in package.__all__, f"{module.__name__}.{name}"
+    with pytest.raises(AttributeError):
+        getattr(package, "notAnAttribute")
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    [
+        ("HDF2ase", lambda: HDF5er.HDF52AseAtomsChunckedwithSymbols),
+        ("isTrajectoryGroup", lambda: HDF5er.isTrajectoryGroup),
+        ("tracker", lambda: SOAPify.transitions.tracker),
+    ],
+)
+def test_deprecatedNames(name, expected):
+    # these names leaked from the star imports of the old __init__
+    assert name in dir(SOAPify)
+    assert name not in SOAPify.__all__
+    with pytest.warns(DeprecationWarning):
+        assert getattr(SOAPify, name) is expected()
+    # each access warns
+    with pytest.warns(DeprecationWarning):
+        getattr(SOAPify, name)
+
+
+def test_lazyStarImport():
+    namespace = {}
+    exec("from SOAPify import *", namespace)
+    assert set(SOAPify.__all__) <= set(namespace)
+    assert namespace["getSoapEngine"] is SOAPify.engine.getSoapEngine
+    assert namespace["HAVE_DSCRIBE"]
+    # the deprecated names are not imported, so the star import does not warn
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", DeprecationWarning)
+        exec("from SOAPify import *", {})
@@ -0,0 +1,92 @@
+import logging
+import pytest
+import numpy
+import h5py
+import SOAPify
+import SOAPify.HDF5er as HDF5er
+
+
+def test_timedStage():
+    records = []
+    with SOAPify.instrumentationCallback(records.append):
+        with SOAPify.timedStage("test", "compute", 3, 7, extraKey="extra") as stage:
+            stage["bytes"] = 42
+        with pytest.raises(RuntimeError):
+            with SOAPify.timedStage("test", "compute", 7, 9):
+                raise RuntimeError("the records of failed stages are not emitted")
+    SOAPify.emitRecord("test", "read", 0, 1, 0.5)
+    assert len(records) == 1
+    record = records[0]
+    assert record["pipeline"] == "test"
+    assert record["stage"] == "compute"
+    assert (record["first"], record["last"], record["frames"]) == (3, 7, 4)
+    assert record["bytes"] == 42
+    assert record["extraKey"] == "extra"
+    assert record["seconds"] >= 0
+    assert record["framesPerSecond"] > 0
+
+
+def test_saponifyInstrumentation(tmp_path, referencesTrajectory, caplog):
+    confFile, groupName = referencesTrajectory
+    records = []
+    with h5py.File(confFile, "r") as conf, h5py.File(
+        tmp_path / "soap.hdf5", "w"
+    ) as soapFile, SOAPify.instrumentationCallback(records.append):
+        trajGroup = conf[f"Trajectories/{groupName}"]
+        nframes = len(trajGroup["Trajectory"])
+        with caplog.at_level(logging.INFO, logger="SOAPify"):
+            SOAPify.saponifyTrajectory(
+                trajGroup, soapFile, 3.0, 4, 4, SOAPOutputChunkDim=7
+            )
+        soapRecords = [record for record in records if record["pipeline"] == "saponify"]
+        for stage in ["read", "compute", "write"]:
+            stageRecords = [
+                record for record in soapRecords if record["stage"] == stage
+            ]
+            assert sum(record["frames"] for record in stageRecords) == nframes
+            assert all(record["bytes"] > 0 for record in stageRecords)
+            assert all(
+                record["dataset"] == soapFile[groupName].name for record in stageRecords
+            )
+        written = [record for record in soapRecords if record["stage"] == "write"]
+        assert sum(record["bytes"] for record in written) == soapFile[groupName].nbytes
+        # the records are logged with the structured data attached
+        logged = [
+            logRecord.soapify
+            for logRecord in caplog.records
+            if hasattr(logRecord, "soapify") and "stage" in logRecord.soapify
+        ]
+        assert logged == soapRecords
+
+        records.clear()
+        caplog.clear()
+        SOAPify.saponifyTrajectory(
+            trajGroup, soapFile, 3.0, 4, 4, doOverride=True, verbose=False
+        )
+        assert len(records) > 0
+        assert not [r for r in caplog.records if r.levelno >= logging.INFO]
+
+
+def test_hdf5erInstrumentation(tmp_path, input_universe):
+    universe = input_universe()
+    nframes = len(universe.trajectory)
+    records = []
+    SOAPify.addInstrumentationCallback(records.append)
+    try:
+        with h5py.File(tmp_path / "traj.hdf5", "w") as trajFile:
+            HDF5er.universe2HDF5(universe, trajFile.require_group("traj"), 2)
+    finally:
+        SOAPify.removeInstrumentationCallback(records.append)
+    for stage in ["read", "write"]:
+        stageRecords = [
+            record
+            for record in records
+            if record["pipeline"] == "hdf5er" and record["stage"] == stage
+        ]
+        assert [(record["first"], record["last"]) for record in stageRecords] == [
+            (first, min(first + 2, nframes)) for first in range(0, nframes, 2)
+        ]
+        assert (
+            sum(record["bytes"] for record in stageRecords)
+            == nframes * (len(universe.atoms) * 3 + 6) * numpy.dtype("float64").itemsize
+        )
@@ -0,0 +1,127 @@
+import pytest
+import numpy
+from numpy.testing import assert_array_almost_equal
+import SOAPify
+import SOAPify.analysis as analysis
+
+
+def _fingerprints(dataset, atoms=slice(None)):
+    return SOAPify.normalizeArray(
+        SOAPify.fillSOAPVectorFromdscribe(
+            dataset[:, atoms], **SOAPify.getSOAPSettings(dataset)
+        )
+    )
+
+
+@pytest.mark.parametrize("budget", [None, "1KB"])
+def test_multiAnalysisPass(soapDatasetAndReferences, budget):
+    dataset, references = soapDatasetAndReferences
+    previousBudget = SOAPify.getMemoryBudget()
+    records = []
+    try:
+        if budget is not None:
+            # forces many chunks
+            SOAPify.setMemoryBudget(budget)
+        with SOAPify.instrumentationCallback(records.append):
+            (
+                timeSOAP,
+                timeSOAP2,
+                distances,
+                classification,
+                statistics,
+            ) = SOAPify.multiAnalysisPass(
+                dataset,
+                [
+                    SOAPify.TimeSOAPConsumer(),
+                    SOAPify.TimeSOAPConsumer(window=2),
+                    SOAPify.ReferencesDistancesConsumer(references),
+                    SOAPify.ClassificationConsumer(references),
+                    SOAPify.AtomStatisticsConsumer(),
+                ],
+            )
+    finally:
+        SOAPify.setMemoryBudget(previousBudget)
+    # each frame is read only once
+    reads = [record for record in records if record["stage"] == "read"]
+    assert sum(record["frames"] for record in reads) == dataset.shape[0]
+    if budget is not None:
+        assert len(reads) > 1
+
+    for got, expected in zip(timeSOAP, analysis.getTimeSOAPSimple(dataset)):
+        assert_array_almost_equal(got, expected)
+    fingerprints = _fingerprints(dataset)
+    assert_array_almost_equal(
+        timeSOAP2[0], analysis.timeSOAP(fingerprints, window=2)[0]
+    )
+    assert_array_almost_equal(
+        distances, SOAPify.getDistancesFromRefNormalized(dataset, references)
+    )
+    expected = SOAPify.applyClassification(
+        dataset, references, SOAPify.SOAPdistanceNormalized, doNormalize=True
+    )
+    assert_array_almost_equal(classification.distances, expected.distances)
+    # the atoms of this small system can be equidistant from two references
+    assert_array_almost_equal(
+        numpy.take_along_axis(
+            distances, classification.references[..., numpy.newaxis], axis=-1
+        )[..., 0],
+        expected.distances,
+    )
+    assert classification.legend == expected.legend
+    assert statistics.nframes == dataset.shape[0]
+    assert_array_almost_equal(statistics.mean, fingerprints.mean(axis=0))
+    assert_array_almost_equal(statistics.variance, fingerprints.var(axis=0))
+
+
+def test_multiAnalysisPassOnArray(soapDatasetAndReferences):
+    dataset, references = soapDatasetAndReferences
+    atoms = slice(2, 6)
+    fingerprints = _fingerprints(dataset, atoms)
+    fromDataset = SOAPify.multiAnalysisPass(
+        dataset,
+        [
+            SOAPify.TimeSOAPConsumer(),
+            SOAPify.ReferencesDistancesConsumer(
+                references, SOAPify.SOAPdistanceNormalized
+            ),
+        ],
+        atomsSelection=atoms,
+    )
+    with SOAPify.SharedSOAPBlock.fromArray(fingerprints) as block:
+        soap = block.array
+        fromArray = SOAPify.multiAnalysisPass(
+            soap,
+            [
+                SOAPify.TimeSOAPConsumer(),
+                SOAPify.ReferencesDistancesConsumer(
+                    references, SOAPify.simpleSOAPdistance
+                ),
+            ],
+        )
+        del soap
+    for got, expected in zip(fromArray[0], fromDataset[0]):
+        assert_array_almost_equal(got, expected)
+    assert_array_almost_equal(fromArray[1], fromDataset[1])
+
+
+class _WritingConsumer(SOAPify.SOAPConsumer):
+    def consume(self, start, frames):
+        frames[:] = 0.0
+
+    def result(self):
+        return None
+
+
+def test_multiAnalysisPassErrors(soapDatasetAndReferences):
+    dataset, references = soapDatasetAndReferences
+    with pytest.raises(ValueError):
+        SOAPify.TimeSOAPConsumer(window=0)
+    with pytest.raises(ValueError):
+        SOAPify.multiAnalysisPass(
+            dataset, [SOAPify.TimeSOAPConsumer(window=dataset.shape[0])]
+        )
+    # the chunks are shared by all the consumers
+    with pytest.raises(ValueError):
+        SOAPify.multiAnalysisPass(dataset, [_WritingConsumer()])
+    with pytest.raises(TypeError):
+        SOAPify.SOAPConsumer()
@@ -0,0 +1,98 @@
+import pytest
+import numpy
+import h5py
+from numpy.testing import assert_array_almost_equal
+import SOAPify
+import SOAPify.analysis as analysis
+
+
+@pytest.fixture(scope="module")
+def soapDataset(soapDatasetAndReferences):
+    return soapDatasetAndReferences[0]
+
+
+def test_fullProjectionIsExact(soapDatasetAndReferences, tmp_path):
+    soapDataset, references = soapDatasetAndReferences
+    nfeatures = SOAPify.utils._filledSOAPLength(**SOAPify.getSOAPSettings(soapDataset))
+    projection = SOAPify.fitSOAPProjection(soapDataset, nfeatures, seed=42)
+    with h5py.File(tmp_path / "reduced.hdf5", "w") as f:
+        projection = SOAPify.reduceSOAPDataset(soapDataset, f, projection)
+        reduced = f[soapDataset.name.split("/")[-1]]
+        assert reduced.shape == soapDataset.shape[:2] + (nfeatures,)
+        assert projection.maxResidual < 1e-6
+        assert SOAPify.isReducedSOAPDataset(reduced)
+        assert not SOAPify.isReducedSOAPDataset(soapDataset)
+        for got, expected in zip(
+            analysis.getTimeSOAPSimple(reduced), analysis.getTimeSOAPSimple(soapDataset)
+        ):
+            assert_array_almost_equal(got, expected)
+        assert_array_almost_equal(
+            SOAPify.getDistancesFromRef(
+                reduced,
+                projection.projectReferences(references),
+                SOAPify.SOAPdistanceProjected,
+            ),
+            SOAPify.getDistancesFromRefNormalized(soapDataset, references),
+        )
+
+
+@pytest.mark.parametrize("method", ["pca", "random"])
+def test_reducedBounds(soapDataset, tmp_path, method):
+    projection = SOAPify.fitSOAPProjection(
+        soapDataset, 5, method=method, nSamples=200, seed=42
+    )
+    assert projection.nComponents == 5
+    assert_array_almost_equal(
+        projection.components @ projection.components.T, numpy.eye(5)
+    )
+    with h5py.File(tmp_path / "reduced.hdf5", "w") as f:
+        written = SOAPify.reduceSOAPDataset(
+            soapDataset, f, projection, name="reduced", atomsSelection=slice(1, 4)
+        )
+        reduced = f["reduced"]
+        assert reduced.shape == (soapDataset.shape[0], 3, 5)
+        assert reduced.attrs["projection_method"] == method
+        assert reduced.attrs["projection_source"] == soapDataset.name
+        stored = SOAPify.getSOAPProjection(reduced)
+        assert stored.maxResidual == written.maxResidual > 0
+        assert_array_almost_equal(stored.components, projection.components)
+        assert_array_almost_equal(stored.mean, projection.mean)
+
+        # the exact distances, in double precision
+        settings = SOAPify.getSOAPSettings(soapDataset)
+        fingerprints = SOAPify.normalizeArray(
+            SOAPify.fillSOAPVectorFromdscribe(
+                soapDataset[:, 1:4].astype(numpy.float64), **settings
+            )
+        )
+        tolerance = 1e-9
+        expected = numpy.linalg.norm(fingerprints[1:] - fingerprints[:-1], axis=-1)
+        lower, upper = stored.distanceBounds(analysis.getTimeSOAPSimple(reduced)[0])
+        assert numpy.all(lower <= expected + tolerance)
+        assert numpy.all(expected <= upper + tolerance)
+
+        # the references are fingerprints of the reduced dataset
+        references = SOAPify.SOAPReferences(
+            ["a", "b"], fingerprints[0, :2], settings["lMax"], settings["nMax"]
+        )
+        expected = numpy.linalg.norm(
+            fingerprints[:, :, numpy.newaxis] - references.spectra, axis=-1
+        )
+        lower, upper = stored.distanceBounds(
+            SOAPify.getDistancesFromRef(
+                reduced,
+                stored.projectReferences(references),
+                SOAPify.SOAPdistanceProjected,
+            )
+        )
+        assert numpy.all(lower <= expected + tolerance)
+        assert numpy.all(expected <= upper + tolerance)
+
+
+def test_fitSOAPProjectionErrors(soapDataset):
+    with pytest.raises(ValueError):
+        SOAPify.fitSOAPProjection(soapDataset, 5, method="tSNE")
+    with pytest.raises(ValueError):
+        SOAPify.fitSOAPProjection(soapDataset, 10**6)
+    with pytest.raises(ValueError):
+        SOAPify.fitSOAPProjection(soapDataset, 0)
@@ -0,0 +1,87 @@
+from concurrent.futures import ProcessPoolExecutor
+import pickle
+import pytest
+import numpy
+from numpy.testing import assert_array_equal, assert_array_almost_equal
+import SOAPify
+import SOAPify.analysis as analysis
+
+
+def _timeSOAPWorker(handle, atomSlice):
+    with SOAPify.attachSharedSOAP(handle) as soap:
+        assert not soap.flags.writeable
+        return analysis.getTimeSOAPSimple(soap, atomsSelection=atomSlice)
+
+
+def _distancesWorker(handle, references):
+    with SOAPify.attachSharedSOAP(handle) as soap:
+        return SOAPify.getDistancesFromRef(
+            soap, references, SOAPify.SOAPdistanceNormalized
+        )
+
+
+def test_sharedBlockFromDataset(soapDatasetAndReferences):
+    dataset, _ = soapDatasetAndReferences
+    settings = SOAPify.getSOAPSettings(dataset)
+    expected = SOAPify.normalizeArray(
+        SOAPify.fillSOAPVectorFromdscribe(dataset[1::2, 2:5], **settings)
+    )
+    with SOAPify.SharedSOAPBlock.fromDataset(
+        dataset, frames=slice(1, None, 2), atomsSelection=slice(2, 5)
+    ) as block:
+        assert block.shape == expected.shape
+        assert block.dtype == numpy.float64
+        soap = block.array
+        assert not soap.flags.writeable
+        with pytest.raises(ValueError):
+            soap[0, 0, 0] = 1.0
+        assert_array_almost_equal(soap, expected)
+        # the handle is all the workers need
+        handle = pickle.loads(pickle.dumps(block.handle))
+        with SOAPify.attachSharedSOAP(handle) as attached:
+            assert_array_equal(attached, soap)
+        del soap
+    with pytest.raises(ValueError):
+        block.array
+    # closing twice is harmless
+    block.close()
+
+
+def test_sharedBlockFromArray():
+    data = numpy.arange(24, dtype=numpy.float32).reshape(2, 3, 4)
+    with SOAPify.SharedSOAPBlock.fromArray(data) as block:
+        assert block.dtype == numpy.float32
+        assert_array_equal(block.array, data)
+    with SOAPify.SharedSOAPBlock((0, 3, 4)) as empty:
+        assert empty.array.shape == (0, 3, 4)
+
+
+def test_analysisOnSharedViews(soapDatasetAndReferences):
+    dataset, references = soapDatasetAndReferences
+    expectedTimeSOAP = analysis.getTimeSOAPSimple(dataset)
+    expectedDistances = SOAPify.getDistancesFromRefNormalized(dataset, references)
+    nat = dataset.shape[1]
+    with SOAPify.SharedSOAPBlock.fromDataset(dataset) as block:
+        soap = block.array
+        timedSOAP, deltaTimedSOAP = analysis.getTimeSOAPSimple(soap)
+        assert_array_almost_equal(timedSOAP, expectedTimeSOAP[0])
+        assert_array_almost_equal(deltaTimedSOAP, expectedTimeSOAP[1])
+        assert_array_almost_equal(
+            SOAPify.getDistancesFromRef(
+                soap, references, SOAPify.SOAPdistanceNormalized
+            ),
+            expectedDistances,
+        )
+        del soap
+
+        shards = [slice(0, nat // 2), slice(nat // 2, nat)]
+        with ProcessPoolExecutor(2) as workers:
+            results = list(workers.map(_timeSOAPWorker, [block.handle] * 2, shards))
+            distances = workers.submit(
+                _distancesWorker, block.handle, references
+            ).result()
+    assert_array_almost_equal(
+        numpy.concatenate([result[0] for result in results], axis=1),
+        expectedTimeSOAP[0],
+    )
+    assert_array_almost_equal(distances, expectedDistances)
@@ -0,0 +1,94 @@
+"""tests for the OnlineStateTracker utility"""
+from numpy.testing import assert_array_equal
+import numpy
+import h5py
+import pytest
+import SOAPify
+
+
+def _splitInBlocks(references, nblocks):
+    limits = numpy.linspace(0, references.shape[0], nblocks + 1, dtype=int)
+    return [references[start:stop] for start, stop in zip(limits[:-1], limits[1:])]
+
+
+@pytest.fixture(scope="module", params=[1, 2, 7])
+def input_nblocks(request):
+    return request.param
+
+
+def test_onlineStateTracker(
+    input_mockedTrajectoryClassification, inputStrides, inputWindows, input_nblocks
+):
+    data = input_mockedTrajectoryClassification
+    stride = inputStrides
+    window = inputWindows
+    if (
+        window > data.references.shape[0]
+        or stride > data.references.shape[0]
+        or stride > window
+    ):
+        pytest.skip("failing condition are tested separately")
+    online = SOAPify.OnlineStateTracker(
+        data.references.shape[1], data.legend, window=window, stride=stride
+    )
+    for block in _splitInBlocks(data.references, input_nblocks):
+        online.update(block)
+    assert online.nframes == data.references.shape[0]
+
+    expectedTmat = SOAPify.transitionMatrixFromSOAPClassification(
+        data, stride=stride, window=window
+    )
+    assert_array_equal(online.transitionMatrix, expectedTmat)
+
+    expectedEvents = SOAPify.trackStates(data, window=window, stride=stride)
+    events = online.getStateTracker()
+    assert len(events) == len(expectedEvents)
+    for atomID in range(data.references.shape[1]):
+        assert_array_equal(events[atomID], expectedEvents[atomID])
+
+    expectedResidenceTimes = SOAPify.calculateResidenceTimes(data, expectedEvents)
+    for rt, rtExpected in zip(online.getResidenceTimes(), expectedResidenceTimes):
+        assert_array_equal(rt, rtExpected)
+
+
+def test_onlineStateTrackerWrongShape():
+    online = SOAPify.OnlineStateTracker(3, ["state0", "state1"])
+    with pytest.raises(ValueError):
+        online.update(numpy.zeros((5, 4), dtype=int))
+    with pytest.raises(ValueError) as excinfo:
+        SOAPify.OnlineStateTracker(3, ["state0", "state1"], window=1, stride=2)
+    assert "window must be bigger" in str(excinfo.value)
+
+
+def test_onlineStateTrackerSaveAndLoad(tmp_path, input_mockedTrajectoryClassification):
+    data = input_mockedTrajectoryClassification
+    window = 2
+    stride = 1
+    nframes = data.references.shape[0]
+    online = SOAPify.OnlineStateTracker(
+        data.references.shape[1], data.legend, window=window, stride=stride
+    )
+    online.update(data.references[: nframes // 2])
+    fname = tmp_path / "online.hdf5"
+    with h5py.File(fname, "w") as workFile:
+        SOAPify.saveOnlineStateTracker(workFile, "online", online)
+    with h5py.File(fname, "r") as workFile:
+        reloaded = SOAPify.getOnlineStateTrackerFromGroup(workFile["online"])
+    assert reloaded.window == window
+    assert reloaded.stride == stride
+    assert reloaded.legend == data.legend
+    assert reloaded.nframes == nframes // 2
+    reloaded.update(
+        SOAPify.SOAPclassification([], data.references[nframes // 2 :], data.legend)
+    )
+
+    expectedEvents = SOAPify.trackStates(data, window=window, stride=stride)
+    events = reloaded.getStateTracker()
+    for atomID in range(data.references.shape[1]):
+        assert_array_equal(events[atomID], expectedEvents[atomID])
+    assert_array_equal(
+        reloaded.transitionMatrix,
+        SOAPify.transitionMatrixFromSOAPClassification(
+            data, stride=stride, window=window
+        ),
+    )
@@ -341,3 +341,74 @@ def test_RemoveAtomIdentityFromEventTracker(input_mockedTrajectoryClassification
     otherevents = SOAPify.removeAtomIdentityFromEventTracker(newevents)
     # nothing should happen
     assert otherevents == newevents
+
+
+def test_stateTrackerInParallel(input_mockedTrajectoryClassification, inputWindows):
+    """the parallel tracker must give the same events of the serial one"""
+    data = input_mockedTrajectoryClassification
+    window = inputWindows
+    if window > data.references.shape[0]:
+        pytest.skip("failing condition are tested separately")
+    expectedEvents = SOAPify.trackStates(data, window=window)
+    events = SOAPify.trackStates(data, window=window, n_jobs=2)
+    assert len(events) == len(expectedEvents)
+    assert events.window == expectedEvents.window
+    assert events.stride == expectedEvents.stride
+    for atomID in range(data.references.shape[1]):
+        assert len(events[atomID]) == len(expectedEvents[atomID])
+        assert_array_equal(events[atomID], expectedEvents[atomID])
+
+
+def test_residenceTimesInParallel(input_mockedTrajectoryClassification):
+    """the residence times calculated in parallel must be the same of the serial ones"""
+    from concurrent.futures import ProcessPoolExecutor
+
+    data = input_mockedTrajectoryClassification
+    expectedResidenceTimes = SOAPify.calculateResidenceTimes(data)
+    residenceTimes = SOAPify.calculateResidenceTimes(data, n_jobs=3)
+    with ProcessPoolExecutor(2) as executor:
+        residenceTimesExecutor = SOAPify.calculateResidenceTimes(
+            data, executor=executor
+        )
+    for rt, rtExecutor, rtExpected in zip(
+        residenceTimes, residenceTimesExecutor, expectedResidenceTimes
+    ):
+        assert_array_equal(rt, rtExpected)
+        assert_array_equal(rtExecutor, rtExpected)
+
+
+def test_saveAndLoadStateTracker(tmp_path, input_mockedTrajectoryClassification):
+    """the tracker reloaded from the file must give the same results"""
+    import h5py
+
+    data = input_mockedTrajectoryClassification
+    events = SOAPify.trackStates(data, window=2, stride=1)
+    fname = tmp_path / "tracker.hdf5"
+    with h5py.File(fname, "w") as workFile:
+        SOAPify.saveStateTracker(workFile, "tracker", events)
+    with h5py.File(fname, "r") as workFile:
+        reloaded = SOAPify.getStateTrackerFromGroup(workFile["tracker"])
+        assert isinstance(reloaded, SOAPify.StateTracker)
+        assert len(reloaded) == len(events)
+        assert reloaded.window == events.window
+        assert reloaded.stride == events.stride
+        # random access
+        for atomID in reversed(range(len(events))):
+            assert_array_equal(reloaded[atomID], events[atomID])
+        assert_array_equal(reloaded[-1], events[-1])
+        with pytest.raises(IndexError):
+            reloaded[len(events)]
+        with pytest.raises(TypeError):
+            reloaded[0] = []
+        # sequential access
+        for reloadedEvents, expectedEvents in zip(reloaded, events):
+            assert_array_equal(reloadedEvents, expectedEvents)
+        assert_array_equal(
+            SOAPify.transitionMatrixFromStateTracker(reloaded, data.legend),
+            SOAPify.transitionMatrixFromStateTracker(events, data.legend),
+        )
+        for rt, rtExpected in zip(
+            SOAPify.calculateResidenceTimes(data, reloaded),
+            SOAPify.calculateResidenceTimes(data, events),
+        ):
+            assert_array_equal(rt, rtExpected)
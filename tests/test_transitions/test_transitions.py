@@ -299,3 +299,137 @@ def test_residenceTime(
         print(stateID, residenceTimes[stateID], expectedResidenceTimes[stateID])
         assert_array_equal(residenceTimes[stateID], expectedResidenceTimes[stateID])
         assert isSorted(residenceTimes[stateID])
+
+
+@pytest.fixture(scope="module", params=[(1, 1), (3, 1), (1, 2), (2, 3)])
+def input_blocks(request):
+    return request.param
+
+
+def test_transitionMatrixBlocks(
+    input_mockedTrajectoryClassification, inputStrides, input_blocks
+):
+    data: SOAPclassification = input_mockedTrajectoryClassification
+    stride = inputStrides
+    nTimeBlocks, nAtomBlocks = input_blocks
+    nTransitions = len(range(stride, data.references.shape[0], stride))
+    if (
+        stride > data.references.shape[0]
+        or nTimeBlocks > max(1, nTransitions)
+        or nAtomBlocks > data.references.shape[1]
+    ):
+        pytest.skip("failing condition are tested separately")
+    blocks = SOAPify.transitionMatrixBlocksFromSOAPClassification(
+        data, nTimeBlocks=nTimeBlocks, nAtomBlocks=nAtomBlocks, stride=stride
+    )
+    nclasses = len(data.legend)
+    assert blocks.shape == (nTimeBlocks, nAtomBlocks, nclasses, nclasses)
+    assert_array_equal(
+        numpy.sum(blocks, axis=(0, 1)),
+        SOAPify.transitionMatrixFromSOAPClassification(data, stride=stride),
+    )
+    # each block must be the transition matrix of its slice of atoms
+    atomLimits = numpy.linspace(0, data.references.shape[1], nAtomBlocks + 1)
+    for atomBlock in range(nAtomBlocks):
+        atoms = slice(
+            int(numpy.ceil(atomLimits[atomBlock])),
+            int(numpy.ceil(atomLimits[atomBlock + 1])),
+        )
+        subData = SOAPclassification([], data.references[:, atoms], data.legend)
+        assert_array_equal(
+            numpy.sum(blocks[:, atomBlock], axis=0),
+            SOAPify.transitionMatrixFromSOAPClassification(subData, stride=stride),
+        )
+
+
+def test_transitionMatrixBlocksErrors(input_mockedTrajectoryClassification):
+    data: SOAPclassification = input_mockedTrajectoryClassification
+    with pytest.raises(ValueError):
+        SOAPify.transitionMatrixBlocksFromSOAPClassification(data, nTimeBlocks=0)
+    with pytest.raises(ValueError):
+        SOAPify.transitionMatrixBlocksFromSOAPClassification(
+            data, nAtomBlocks=data.references.shape[1] + 1
+        )
+
+
+def test_bootstrapTransitionMatrix(input_mockedTrajectoryClassification):
+    data: SOAPclassification = input_mockedTrajectoryClassification
+    nAtomBlocks = data.references.shape[1]
+    blocks = SOAPify.transitionMatrixBlocksFromSOAPClassification(
+        data, nAtomBlocks=nAtomBlocks
+    )
+    tmat, lower, upper = SOAPify.bootstrapTransitionMatrix(
+        blocks, nResamples=200, seed=12345
+    )
+    assert_array_equal(
+        tmat, SOAPify.transitionMatrixFromSOAPClassificationNormalized(data)
+    )
+    assert lower.shape == tmat.shape
+    assert upper.shape == tmat.shape
+    assert numpy.all(lower <= upper)
+    # reproducibility
+    _, lowerBis, upperBis = SOAPify.bootstrapTransitionMatrix(
+        blocks, nResamples=200, seed=12345
+    )
+    assert_array_equal(lower, lowerBis)
+    assert_array_equal(upper, upperBis)
+    counts, lowerCounts, upperCounts = SOAPify.bootstrapTransitionMatrix(
+        blocks, nResamples=200, normalize=False, seed=12345
+    )
+    assert_array_equal(counts, SOAPify.transitionMatrixFromSOAPClassification(data))
+    assert numpy.all(lowerCounts <= upperCounts)
+    with pytest.raises(ValueError):
+        SOAPify.bootstrapTransitionMatrix(blocks, confidence=1.5)
+
+
+def test_sparseTransitionMatrix(input_mockedTrajectoryClassification, inputStrides):
+    import scipy.sparse
+
+    data: SOAPclassification = input_mockedTrajectoryClassification
+    stride = inputStrides
+    if stride > data.references.shape[0]:
+        pytest.skip("failing condition are tested separately")
+    tmat = SOAPify.transitionMatrixFromSOAPClassification(data, stride=stride)
+    sparseTmat = SOAPify.transitionMatrixFromSOAPClassification(
+        data, stride=stride, sparse=True
+    )
+    assert scipy.sparse.issparse(sparseTmat)
+    assert_array_equal(sparseTmat.toarray(), tmat)
+    sparseTmatNorm = SOAPify.transitionMatrixFromSOAPClassificationNormalized(
+        data, stride=stride, sparse=True
+    )
+    assert scipy.sparse.issparse(sparseTmatNorm)
+    numpy.testing.assert_array_almost_equal(
+        sparseTmatNorm.toarray(), SOAPify.normalizeMatrixByRow(tmat)
+    )
+    events = SOAPify.trackStates(data, window=stride)
+    sparseTmatFromTracker = SOAPify.calculateTransitionMatrix(
+        data, statesTracker=events, sparse=True
+    )
+    assert scipy.sparse.issparse(sparseTmatFromTracker)
+    assert_array_equal(sparseTmatFromTracker.toarray(), tmat)
+
+
+def test_stationaryDistributionAndTimescales():
+    import scipy.sparse
+
+    rng = numpy.random.default_rng(12345)
+    nclasses = 30
+    # a sparse matrix with a strong diagonal
+    tmat = rng.random((nclasses, nclasses)) * (rng.random((nclasses, nclasses)) > 0.8)
+    tmat += numpy.eye(nclasses) * 10
+    tmatNorm = SOAPify.normalizeMatrixByRow(tmat)
+    distribution = SOAPify.stationaryDistribution(tmat)
+    numpy.testing.assert_approx_equal(numpy.sum(distribution), 1.0)
+    numpy.testing.assert_array_almost_equal(distribution @ tmatNorm, distribution)
+    sparseDistribution = SOAPify.stationaryDistribution(scipy.sparse.csr_matrix(tmat))
+    numpy.testing.assert_array_almost_equal(sparseDistribution, distribution)
+
+    timescales = SOAPify.impliedTimescales(tmat, lagTime=2)
+    assert timescales.shape == (nclasses - 1,)
+    eigenvalues = numpy.sort(numpy.abs(numpy.linalg.eigvals(tmatNorm)))[::-1]
+    numpy.testing.assert_array_almost_equal(timescales, -2 / numpy.log(eigenvalues[1:]))
+    sparseTimescales = SOAPify.impliedTimescales(
+        scipy.sparse.csr_matrix(tmat), lagTime=2, nTimescales=3
+    )
+    numpy.testing.assert_array_almost_equal(sparseTimescales, timescales[:3])